@@ -1,46 +1,92 @@
 import os
+import re
 
 from PyQt5 import uic
-from PyQt5.QtWidgets import QWidget, QTreeWidgetItem, QTableWidgetItem, QTextBrowser
-from PyQt5.QtCore import pyqtSignal, QObject
-from packages.dexparser import Dexparser
+from PyQt5.QtWidgets import QWidget, QTreeWidgetItem, QTableWidgetItem, QTextBrowser, QTableView, QHeaderView
+from PyQt5.QtCore import pyqtSignal, QObject, QThread
+from packages.dexparser import Dexparser, DEX_PHASES
 from Page.utils import org2Hex, man_show
-#from packages.hexdump.hexdump import hexdump
-from packages.hexdump2 import hexdump
+from Page.DexAnalyzing.models import DexIdTableModel
 from packages.log import LOG
+from packages.progress import Progress
+
+
+# 目录树的节点 -> 后台解析的区段名
+SECTION_OF_ITEM = {
+    "string-ids": "strings",
+    "type-ids": "types",
+    "proto-ids": "protos",
+    "field-ids": "fields",
+    "method-ids": "methods",
+    "class-defs": "classes",
+    "map-lists": "maps",
+}
+
+# stackedWidget 的页面 -> (搜索的表, 页面上的 tableView)
+SEARCH_OF_PAGE = {
+    "widget_Dex_strids": ("strings", "tableView_Dex_strids"),
+    "widget_Dex_typeids": ("types", "tableView_Dex_typeids"),
+    "widget_Dex_protoids": ("protos", "tableView_Dex_protoids"),
+    "widget_Dex_fieldids": ("fields", "tableView_Dex_fieldids"),
+    "widget_Dex_methodids": ("methods", "tableView_Dex_methodids"),
+}
 
 
 class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
     f_fname: str
     f_widget: QWidget
     f_dex_parser: Dexparser
-    f_sig_showhex: pyqtSignal = pyqtSignal(bytes,int)  # 往父容器发信号,说没有tab了
+    f_progress: Progress
+    f_worker: "DexParseWorker"
+    f_ready_sections: set  # 后台已经解析完的区段
+    f_pending_item: str  # 点击时区段还没解析完, 解析完再显示
+    f_sig_showhex: pyqtSignal = pyqtSignal(int,int)  # hex view 高亮 [start, end)
+    f_sig_cost: pyqtSignal = pyqtSignal(float)  # 进度, Dexparser 通过回调转发过来
 
 
-    def __init__(self, dex_fpath: str, ui_path: str):
+    def __init__(self, dex_fpath: str, ui_path: str, dex_parser: Dexparser = None, dex_loader=None):
+        '''
+        :param dex_loader: 返回 Dexparser 的函数 (apk 里的 dex), 在后台线程里调用, 压缩的 dex 在那里解压;
+                           这时要等 m_activate (tab 第一次显示) 才开始
+        '''
 
         super().__init__()
 
         # 最好加一个异常处理, 不然看上去没水平
         self.f_fname = os.path.basename(dex_fpath)
         self.f_widget = uic.loadUi(ui_path)
-        self.f_dex_parser = Dexparser(dex_fpath)
+        self.f_progress = Progress(self.f_sig_cost.emit)
+        self.f_dex_parser = None  # 后台线程打开以后才有 (m_dex_opened)
+        self.f_ready_sections = set()
+        self.f_pending_item = None
+        if dex_loader is None:
+            # 单独的 dex 这里只读头部, tab 可以马上显示; 其余区段交给后台线程
+            if dex_parser is None:
+                dex_parser = Dexparser(dex_fpath, load_tables=False)
+            dex_loader = lambda: dex_parser
+        self.f_worker = DexParseWorker(dex_loader)
         self.m_msg_binding()
-        self.m_ui_init()
+        if dex_parser is not None:
+            self.m_dex_opened(dex_parser)
+            self.m_activate()
 
     def m_msg_binding(self):
         self.f_widget.treeWidget_Dex.itemClicked['QTreeWidgetItem*', 'int'].connect(
             self.m_treeWidget_Dex_itemClicked_func)  # type: ignore
-        self.f_dex_parser.sig_cost.connect(self.m_showProcessBar)
+        self.f_sig_cost.connect(self.m_showProcessBar)
+        self.f_worker.f_sig_cost.connect(self.m_showProcessBar)
+        self.f_worker.f_sig_opened.connect(self.m_dex_opened)
+        self.f_worker.f_sig_section.connect(self.m_section_ready)
+        self.f_widget.lineEdit_Search.returnPressed.connect(self.m_search_current_table)
 
-        self.f_sig_showhex.connect(self.m_showHex_intextBrowser)
+        self.f_sig_showhex.connect(self.m_showHex_inHexView)
         #self.f_sig_showhex.emit()
 
     def m_ui_init(self):
         self.m_deal_tableWidget_DexBaseInfo()
         # hex view
-        self.f_dex_parser.file.seek(0)
-        self.f_sig_showhex.emit(self.f_dex_parser.file.read(), 0)
+        self.f_widget.hexView_Dex.m_set_data(self.f_dex_parser.data)  # 直接用 mmap, 只绘制可见的行
+        self.f_sig_showhex.emit(0, 0)
         self.f_widget.stackedWidget_Dex.setCurrentWidget(self.f_widget.widget_DexBaseInfo)
 
         #self.f_widget.textEdit_hexTitle.textChanged.connect(self.__update_height)
@@ -50,15 +96,73 @@ class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
 
         pass
 
+    def m_activate(self):
+        # tab 第一次显示时才开始读取/解析, 重复调用没有影响
+        if not self.f_worker.isRunning() and not self.f_worker.isFinished():
+            self.f_worker.start()
+
+    def m_dex_opened(self, dex_parser: Dexparser):
+        # dex 打开了 (只读了头部), 在 GUI 线程里填基本信息和 hex view
+        if self.f_dex_parser is not None:
+            return
+        self.f_dex_parser = dex_parser
+        self.m_ui_init()
+        if self.f_pending_item is not None and self.f_pending_item not in SECTION_OF_ITEM:
+            item_choose = self.f_pending_item
+            self.f_pending_item = None
+            self.m_show_item(item_choose)
+
     def m_treeWidget_Dex_itemClicked_func(self, item: QTreeWidgetItem, column: int):
 
         item_choose = item.text(column)
+        section = SECTION_OF_ITEM.get(item_choose)
+        if self.f_dex_parser is None or section is not None and section not in self.f_ready_sections:
+            # 后台还没打开 dex 或者还没解析到这个区段, 完成后在 m_dex_opened / m_section_ready 里显示
+            self.f_pending_item = item_choose
+            return
+        self.f_pending_item = None
+        self.m_show_item(item_choose)
+
+    def m_section_ready(self, section: str):
+        self.f_ready_sections.add(section)
+        if self.f_pending_item is not None and SECTION_OF_ITEM.get(self.f_pending_item) == section:
+            item_choose = self.f_pending_item
+            self.f_pending_item = None
+            self.m_show_item(item_choose)
+
+    def m_search_current_table(self):
+        # 过滤当前页面的 id 表; 空查询恢复全部, "re:" 开头按正则搜索
+        page = self.f_widget.stackedWidget_Dex.currentWidget().objectName()
+        if page not in SEARCH_OF_PAGE or self.f_dex_parser is None:
+            return
+        table, view_name = SEARCH_OF_PAGE[page]
+        model = getattr(self.f_widget, view_name).model()
+        if model is None:
+            return
+        query = self.f_widget.lineEdit_Search.text()
+        if not query:
+            model.m_set_rows(None)
+            return
+        is_regex = query.startswith("re:")
+        try:
+            rows = self.f_dex_parser.dex_search().find(table, query[3:] if is_regex else query, regex=is_regex)
+        except re.error as e:
+            LOG.log_error(tag="search", msg=f"bad regex: {e}")
+            return
+        model.m_set_rows(rows)
+        LOG.log_info(tag="search", msg=f"{table}: {len(rows)} rows match {query!r}")
+
+    def m_close(self):
+        # tab 关闭时先停掉后台线程, 不然线程对象被回收时还在跑
+        self.f_worker.requestInterruption()
+        self.f_worker.wait()
+
+    def m_show_item(self, item_choose: str):
         if item_choose == "base-info":
             if self.f_widget.stackedWidget_Dex.currentWidget().objectName() != "widget_DexBaseInfo":
                 self.m_deal_tableWidget_DexBaseInfo()
                 # hex view
-                self.f_dex_parser.file.seek(0)
-                self.f_sig_showhex.emit(self.f_dex_parser.file.read(), 0)
+                self.f_sig_showhex.emit(0, 0)
                 self.f_widget.stackedWidget_Dex.setCurrentWidget(self.f_widget.widget_DexBaseInfo)
 
         if item_choose == "dex-header":  #dex header
@@ -66,9 +170,7 @@ class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
                 # 写入数据? 有没有必要每次写入数据呢? 没必要吧
                 self.m_deal_tableWidget_DexHeader()
                 # hex view
-                self.f_sig_showhex.emit(
-                    self.f_dex_parser.data[:self.f_dex_parser.dex_header.data_off._end_position_], 0
-                )
+                self.f_sig_showhex.emit(0, self.f_dex_parser.dex_header.data_off._end_position_)
                 self.f_widget.stackedWidget_Dex.setCurrentWidget(self.f_widget.widget_DexHeader)
 
 
@@ -76,50 +178,40 @@ class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
             if self.f_widget.stackedWidget_Dex.currentWidget().objectName() != "widget_Dex_strids":
                 self.m_deal_tableWidget_Dex_strids()
                 self.f_sig_showhex.emit(
-                    self.f_dex_parser.data[
-                    self.f_dex_parser.dex_header.string_ids_off.value:
-                    self.f_dex_parser.dex_string_ids[-1].string_data_off._end_position_],
-                    self.f_dex_parser.dex_header.string_ids_off.value
+                    self.f_dex_parser.dex_header.string_ids_off.value,
+                    self.f_dex_parser.dex_string_ids.end_position
                 )
                 self.f_widget.stackedWidget_Dex.setCurrentWidget(self.f_widget.widget_Dex_strids)
         elif item_choose == "type-ids":
             if self.f_widget.stackedWidget_Dex.currentWidget().objectName() != "widget_Dex_typeids":
                 self.m_deal_tableWidget_Dex_typeids()
                 self.f_sig_showhex.emit(
-                    self.f_dex_parser.data[
-                    self.f_dex_parser.dex_header.type_ids_off.value:
-                    self.f_dex_parser.dex_type_ids[-1].descriptor_idx._end_position_],
-                    self.f_dex_parser.dex_header.type_ids_off.value
+                    self.f_dex_parser.dex_header.type_ids_off.value,
+                    self.f_dex_parser.dex_type_ids.end_position
                 )
                 self.f_widget.stackedWidget_Dex.setCurrentWidget(self.f_widget.widget_Dex_typeids)
         elif item_choose == "proto-ids":
             if self.f_widget.stackedWidget_Dex.currentWidget().objectName() != "widget_Dex_protoids":
                 self.m_deal_tableWidget_Dex_protoids()
                 self.f_sig_showhex.emit(
-                    self.f_dex_parser.data[
-                    self.f_dex_parser.dex_header.proto_ids_off.value:
-                    self.f_dex_parser.dex_proto_ids[-1].parameters_off._end_position_],
-                    self.f_dex_parser.dex_header.proto_ids_off.value
+                    self.f_dex_parser.dex_header.proto_ids_off.value,
+                    self.f_dex_parser.dex_proto_ids.end_position
                 )
                 self.f_widget.stackedWidget_Dex.setCurrentWidget(self.f_widget.widget_Dex_protoids)
         elif item_choose == "field-ids":
             if self.f_widget.stackedWidget_Dex.currentWidget().objectName() != "widget_Dex_fieldids":
                 self.m_deal_tableWidget_Dex_fieldids()
                 self.f_sig_showhex.emit(
-                    self.f_dex_parser.data[
-                    self.f_dex_parser.dex_header.field_ids_off.value:
-                    self.f_dex_parser.dex_field_ids[-1].name_idx._end_position_],
-                    self.f_dex_parser.dex_header.field_ids_off.value
+                    self.f_dex_parser.dex_header.field_ids_off.value,
+                    self.f_dex_parser.dex_field_ids.end_position
                 )
                 self.f_widget.stackedWidget_Dex.setCurrentWidget(self.f_widget.widget_Dex_fieldids)
         elif item_choose == "method-ids":
             if self.f_widget.stackedWidget_Dex.currentWidget().objectName() != "widget_Dex_methodids":
                 self.m_deal_tableWidget_Dex_methodids()
                 self.f_sig_showhex.emit(
-                    self.f_dex_parser.data[
-                    self.f_dex_parser.dex_header.method_ids_off.value:
-                    self.f_dex_parser.dex_method_ids[-1].name_idx._end_position_],
-                    self.f_dex_parser.dex_header.method_ids_off.value
+                    self.f_dex_parser.dex_header.method_ids_off.value,
+                    self.f_dex_parser.dex_method_ids.end_position
                 )
                 self.f_widget.stackedWidget_Dex.setCurrentWidget(self.f_widget.widget_Dex_methodids)
         elif item_choose == "class-defs":
@@ -130,10 +222,8 @@ class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
             if self.f_widget.stackedWidget_Dex.currentWidget().objectName() != "widget_Dex_maplists":
                 self.m_deal_tableWidget_Dex_maplists()
                 self.f_sig_showhex.emit(
-                    self.f_dex_parser.data[
-                    self.f_dex_parser.dex_header.map_off.value + 4:
-                    self.f_dex_parser.dex_map_list[-1].offset._end_position_],
-                    self.f_dex_parser.dex_header.map_off.value + 4
+                    self.f_dex_parser.dex_header.map_off.value + 4,
+                    self.f_dex_parser.dex_map_list[-1].offset._end_position_
                 )
                 self.f_widget.stackedWidget_Dex.setCurrentWidget(self.f_widget.widget_Dex_maplists)
 
@@ -145,7 +235,7 @@ class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
             return
         LOG.log_info(tag="QTableWidget", msg="Dex base info init")
         self.m_deal_tableWidget_DexBaseInfo_thread()
-        self.f_dex_parser.sig_cost.emit(1)
+        self.f_sig_cost.emit(1)
         # 还没有去处理只能加载一次的情况
 
     def m_deal_tableWidget_DexHeader(self):
@@ -155,46 +245,46 @@ class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
         #加载,不显示
         LOG.log_info(tag="QTableWidget", msg="Dex_Header init")
         self.m_deal_tableWidget_DexHeader_thread()
-        self.f_dex_parser.sig_cost.emit(1)
+        self.f_sig_cost.emit(1)
         # 还没有去处理只能加载一次的情况
 
     def m_deal_tableWidget_Dex_strids(self):
-        if self.f_widget.tableWidget_Dex_strids.rowCount() != 0:
+        if self.f_widget.tableView_Dex_strids.model() is not None:
             return
         LOG.log_info(tag="QTableWidget", msg="Dex_strids init")
         self.m_deal_tableWidget_Dex_string_ids_thread()
-        self.f_dex_parser.sig_cost.emit(1)
+        self.f_sig_cost.emit(1)
 
     def m_deal_tableWidget_Dex_typeids(self):
-        if self.f_widget.tableWidget_Dex_typeids.rowCount() != 0:
+        if self.f_widget.tableView_Dex_typeids.model() is not None:
             return
         #env
         LOG.log_info(tag="QTableWidget", msg="Dex_typeids init")
         self.deal_tableWidget_Dex_typeids_thread()
-        self.f_dex_parser.sig_cost.emit(1)  # 进度展示
+        self.f_sig_cost.emit(1)  # 进度展示
 
     def m_deal_tableWidget_Dex_protoids(self):
-        if self.f_widget.tableWidget_Dex_protoids.rowCount() != 0:
+        if self.f_widget.tableView_Dex_protoids.model() is not None:
             return
         #env
 
         LOG.log_info(tag="QTableWidget", msg="Dex_protoids init")
         self.m_deal_tableWidget_Dex_protoids_thread()
-        self.f_dex_parser.sig_cost.emit(1)
+        self.f_sig_cost.emit(1)
 
     def m_deal_tableWidget_Dex_fieldids(self):
-        if self.f_widget.tableWidget_Dex_fieldids.rowCount() != 0:
+        if self.f_widget.tableView_Dex_fieldids.model() is not None:
             return
         LOG.log_info(tag="QTableWidget", msg="Dex_fieldids init")
         self.m_deal_tableWidget_Dex_fieldids_thread()
-        self.f_dex_parser.sig_cost.emit(1)
+        self.f_sig_cost.emit(1)
 
     def m_deal_tableWidget_Dex_methodids(self):
-        if self.f_widget.tableWidget_Dex_methodids.rowCount() != 0:
+        if self.f_widget.tableView_Dex_methodids.model() is not None:
             return
         LOG.log_info(tag="QTableWidget", msg="Dex_methodids init")
         self.m_deal_tableWidget_Dex_methodids_thread()
-        self.f_dex_parser.sig_cost.emit(1)
+        self.f_sig_cost.emit(1)
 
     def m_deal_tablelWidget_Dex_classdefs(self):
         return
@@ -202,23 +292,19 @@ class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
         #     return
         LOG.log_info(tag="QTableWidget", msg="Dex_classdefs init")
         self.m_deal_tablelWidget_Dex_classdefs_thread()
-        self.f_dex_parser.sig_cost.emit(1)
+        self.f_sig_cost.emit(1)
 
     def m_deal_tableWidget_Dex_maplists(self):
         if self.f_widget.tableWidget_Dex_maplists.rowCount() != 0:
             return
         LOG.log_info(tag="QTableWidget", msg="Dex_maplists init")
         self.m_deal_tableWidget_Dex_maplists_thread()
-        self.f_dex_parser.sig_cost.emit(1)
+        self.f_sig_cost.emit(1)
 
 
-    def m_showHex_intextBrowser(self, bytes_data, arg_offset):
-        # []{org:str, hex:str}
-        more = ""
-        hex_data = hexdump(bytes_data[:0x400], result = 'return', offset=arg_offset)#最多显示0x1000, 这不是控制台,不能用 color=True
-        if len( bytes_data) > 0x400 :
-            more = " | ...more"
-        self.f_widget.textBrowser_HexView.setText(hex_data + more)#数据太多会特别卡顿
+    def m_showHex_inHexView(self, start: int, end: int):
+        # 整个文件都在 hex view 里, 这里只是滚动到 start 并高亮 [start, end)
+        self.f_widget.hexView_Dex.m_highlight_range(start, end)
 
     # 打开dex,显示最基本的信息
     def m_deal_tableWidget_DexBaseInfo_thread(self) -> bool:
@@ -295,114 +381,43 @@ class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
 
 
     def m_deal_tableWidget_Dex_string_ids_thread(self):
-
+        # 表格只保存行数, 显示到哪一行才去取哪一行的字符串
         string_ids = self.f_dex_parser.dex_init_string_ids()
-        str_ids_len = len(string_ids)
-
-        self.f_widget.tableWidget_Dex_strids.setRowCount(str_ids_len)
-
-        for i in range(str_ids_len):
-            # # 在ui文件中,默认设置了1行的
-            # row_cnt = self.tableWidget_Dex_strids.rowCount()
-            # self.tableWidget_Dex_strids.insertRow(row_cnt)
-            self.f_widget.tableWidget_Dex_strids.setItem(i, 0, QTableWidgetItem(str(i)))  # c_size
-            # self.f_widget.tableWidget_Dex_strids.setItem(i, 1, QTableWidgetItem(hex(string_ids[i].string_data_off.value)))  # c_size
-            # self.f_widget.tableWidget_Dex_strids.setItem(i, 2, QTableWidgetItem(str(string_ids[i].string_data_off.info.len_size._data_)))  # size_off
-            # 一次性显示的数据可能太大太大, 会导致界面卡顿
-            self.f_widget.tableWidget_Dex_strids.setItem(i, 1, QTableWidgetItem(string_ids[i].string_data_off.info.str_cbytes.str[:256]))  # c_char 最多取长度32
-
-            self.f_dex_parser.sig_cost.emit(i / str_ids_len)
-            # QThread.sleep(1)
-            # QApplication.processEvents()
-        # self.tableWidget_Dex_strids.resizeColumnsToContents()
-        # self.tableWidget_Dex_strids.resizeRowsToContents()
-
-        self.f_dex_parser.sig_cost.emit(1)
-
+        self.m_set_id_table_model(self.f_widget.tableView_Dex_strids, ("idx", "string"), len(string_ids),
+                                  self.f_dex_parser.dex_get_str)
 
     def deal_tableWidget_Dex_typeids_thread(self):
-
         type_ids = self.f_dex_parser.dex_init_type_ids()
-        type_ids_len = len(type_ids)
-        self.f_widget.tableWidget_Dex_typeids.setRowCount(type_ids_len)
-
-        for i in range(type_ids_len):
-            # # 在ui文件中,默认设置了1行的
-            #row_cnt = self.tableWidget_Dex_typeids.rowCount()
-            #self.tableWidget_Dex_typeids.insertRow(row_cnt)
-            self.f_widget.tableWidget_Dex_typeids.setItem(i, 0, QTableWidgetItem(str(i)))  # c_size
-            # self.f_widget.tableWidget_Dex_typeids.setItem(i, 1, QTableWidgetItem(str(type_ids[i].descriptor_idx.value)))  # size_off
-            # self.f_widget.tableWidget_Dex_typeids.setItem(i, 2, QTableWidgetItem(type_ids[i].descriptor_idx.info['type_str']))  # c_char
-            self.f_widget.tableWidget_Dex_typeids.setItem(i, 1, QTableWidgetItem(type_ids[i].descriptor_idx.info['full_type_str']))
-
-            self.f_dex_parser.sig_cost.emit(i / type_ids_len)  #进度展示
-
-        #self.tableWidget_Dex_typeids.resizeColumnsToContents()
-        #self.tableWidget_Dex_typeids.resizeRowsToContents()
+        self.m_set_id_table_model(self.f_widget.tableView_Dex_typeids, ("idx", "type_str"), len(type_ids),
+                                  self.f_dex_parser.dex_get_type)
 
     def m_deal_tableWidget_Dex_protoids_thread(self):
         proto_ids = self.f_dex_parser.dex_init_proto_ids()
-        proto_ids_len = len(proto_ids)
-        self.f_widget.tableWidget_Dex_protoids.setRowCount(proto_ids_len)
-
-        for i in range(proto_ids_len):
-            # # 在ui文件中,默认设置了1行的
-            #row_cnt = self.tableWidget_Dex_protoids.rowCount()
-            #self.tableWidget_Dex_protoids.insertRow(row_cnt)
-            self.f_widget.tableWidget_Dex_protoids.setItem(i, 0, QTableWidgetItem(str(i)))  # c_size
-            # self.f_widget.tableWidget_Dex_protoids.setItem(i, 1, QTableWidgetItem(str(proto_ids[i].shorty_idx.value)))  # size_off
-            # self.f_widget.tableWidget_Dex_protoids.setItem(i, 2, QTableWidgetItem(str(proto_ids[i].return_type_idx.value)))  # c_char
-            # self.f_widget.tableWidget_Dex_protoids.setItem(i, 3, QTableWidgetItem(hex(proto_ids[i].parameters_off.value)))  # c_char
-            self.f_widget.tableWidget_Dex_protoids.setItem(i, 1, QTableWidgetItem(proto_ids[i].info))  # c_char
-
-            self.f_dex_parser.sig_cost.emit(i / proto_ids_len)  #进度展示
-        #self.tableWidget_Dex_protoids.resizeColumnsToContents()
-        #self.tableWidget_Dex_protoids.resizeRowsToContents()
+        self.m_set_id_table_model(self.f_widget.tableView_Dex_protoids, ("idx", "full_proto"), len(proto_ids),
+                                  self.f_dex_parser.dex_get_proto)
 
     def m_deal_tableWidget_Dex_fieldids_thread(self):
-
         field_ids = self.f_dex_parser.dex_init_field_ids()
-        field_ids_len = len(field_ids)
-        self.f_widget.tableWidget_Dex_fieldids.setRowCount(field_ids_len)
-
-        for i in range(field_ids_len):
-            # # 在ui文件中,默认设置了1行的
-            #row_cnt = self.tableWidget_Dex_fieldids.rowCount()
-            #self.tableWidget_Dex_fieldids.insertRow(row_cnt)
-            self.f_widget.tableWidget_Dex_fieldids.setItem(i, 0, QTableWidgetItem(str(i)))  # c_size
-            # self.f_widget.tableWidget_Dex_fieldids.setItem(i, 1, QTableWidgetItem(str(field_ids[i].class_idx.value)))  # size_off
-            # self.f_widget.tableWidget_Dex_fieldids.setItem(i, 2, QTableWidgetItem(str(field_ids[i].type_idx.value)))  # c_char
-            # self.f_widget.tableWidget_Dex_fieldids.setItem(i, 3, QTableWidgetItem(str(field_ids[i].name_idx.value)))  # c_char
-            self.f_widget.tableWidget_Dex_fieldids.setItem(i, 1, QTableWidgetItem(field_ids[i].info))  # c_char
-
-            self.f_dex_parser.sig_cost.emit(i / field_ids_len)  #进度展示
-        #self.tableWidget_Dex_fieldids.resizeColumnsToContents()
-        #self.tableWidget_Dex_fieldids.resizeRowsToContents()
+        self.m_set_id_table_model(self.f_widget.tableView_Dex_fieldids, ("idx", "field_str"), len(field_ids),
+                                  self.f_dex_parser.dex_get_field)
 
     def m_deal_tableWidget_Dex_methodids_thread(self):
         method_ids = self.f_dex_parser.dex_init_method_ids()
-        method_ids_len = len(method_ids)
-        self.f_widget.tableWidget_Dex_methodids.setRowCount(method_ids_len)
+        self.m_set_id_table_model(self.f_widget.tableView_Dex_methodids, ("idx", "method_name"), len(method_ids),
+                                  self.f_dex_parser.dex_get_method)
 
-        for i in range(method_ids_len):
-            # # 在ui文件中,默认设置了1行的
-            #row_cnt = self.tableWidget_Dex_methodids.rowCount()
-            #self.tableWidget_Dex_methodids.insertRow(row_cnt)
-            self.f_widget.tableWidget_Dex_methodids.setItem(i, 0, QTableWidgetItem(str(i)))  # c_size
-            # self.f_widget.tableWidget_Dex_methodids.setItem(i, 1, QTableWidgetItem( str(method_ids[i].class_idx.value)))  # size_off
-            # self.f_widget.tableWidget_Dex_methodids.setItem(i, 2,  QTableWidgetItem(str(method_ids[i].proto_idx.value)))  # c_char
-            # self.f_widget.tableWidget_Dex_methodids.setItem(i, 3,  QTableWidgetItem(str(method_ids[i].name_idx.value)))  # c_char
-            self.f_widget.tableWidget_Dex_methodids.setItem(i, 1,  QTableWidgetItem( method_ids[i].info))  # c_char
-
-            self.f_dex_parser.sig_cost.emit(i / method_ids_len)  #进度展示
-        #resizeColumnsToContents()
-        #self.tableWidget_Dex_methodids.resizeRowsToContents()
+    def m_set_id_table_model(self, table_view: QTableView, headers: tuple, row_count: int, getter):
+        table_view.setModel(DexIdTableModel(headers, row_count, getter, self))
+        # 行高固定, 不按内容计算, 行数再多滚动也不会卡
+        table_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        table_view.horizontalHeader().setStretchLastSection(True)
 
     def m_deal_tablelWidget_Dex_classdefs_thread(self):
 
         classdef_ids = self.f_dex_parser.dex_init_classdef_ids()
         classdef_ids_len = len(classdef_ids)
         self.f_widget.tableWidget_Dex_classdefs.setRowCount(classdef_ids_len)
+        progress = self.f_progress.phase("class-defs", classdef_ids_len)  # 按步长合并, 不是每行都发信号
         for i in range(classdef_ids_len):
             # # 在ui文件中,默认设置了1行的
             #row_cnt = self.tablelWidget_Dex_classdefs.rowCount()
@@ -418,7 +433,7 @@ class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
             self.f_widget.tableWidget_Dex_classdefs.setItem(i, 8, QTableWidgetItem(hex(classdef_ids[i]['static_values_off'])))
             self.f_widget.tableWidget_Dex_classdefs.setItem(i, 9, QTableWidgetItem(classdef_ids[i]['full_class_name']))
 
-            self.f_dex_parser.sig_cost.emit(i / classdef_ids_len)  #进度展示
+            progress.update(i)  #进度展示
 
         #self.tableWidget_Dex_classdefs.resizeColumnsToContents()
         #self.tableWidget_Dex_classdefs.resizeRowsToContents()
@@ -428,6 +443,7 @@ class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
         map_lists = self.f_dex_parser.dex_init_maplist()
         map_lists_len = len(map_lists)
         self.f_widget.tableWidget_Dex_maplists.setRowCount(map_lists_len)
+        progress = self.f_progress.phase("map-list", map_lists_len)  # 按步长合并, 不是每行都发信号
         for i in range(map_lists_len):
             # # 在ui文件中,默认设置了1行的
             #row_cnt = self.tableWidget_Dex_maplists.rowCount()
@@ -439,7 +455,7 @@ class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
             self.f_widget.tableWidget_Dex_maplists.setItem(i, 4, QTableWidgetItem(hex(map_lists[i].offset.value)))
             self.f_widget.tableWidget_Dex_maplists.setItem(i, 5, QTableWidgetItem(map_lists[i].info))
 
-            self.f_dex_parser.sig_cost.emit(i / map_lists_len)  #进度展示
+            progress.update(i)  #进度展示
 
         #self.tableWidget_Dex_maplists.resizeColumnsToContents()
         #self.tableWidget_Dex_maplists.resizeRowsToContents()
@@ -450,13 +466,37 @@ class DexAnalyzing(QObject): # 文件解析结果 + widget 对象
         self.f_widget.progressBar_Dex.setValue(cur_value)
         pass
 
-# class BACK_Thread(QThread):
-#     def __init__(self, func, *args, **kwargs):
-#         super(BACK_Thread,self).__init__()
-#         self.func = func
-#         self.args = args
-#         self.kwargs = kwargs
-#
-#
-#     def run(self):
-#         self.func(*self.args, **self.kwargs)
+class DexParseWorker(QThread):  # 后台打开 dex, 再按顺序解析各个区段, 每完成一个发一次 f_sig_section
+    f_sig_opened: pyqtSignal = pyqtSignal(object)  # 打开好的 Dexparser
+    f_sig_section: pyqtSignal = pyqtSignal(str)
+    f_sig_cost: pyqtSignal = pyqtSignal(float)
+
+    def __init__(self, dex_loader):
+        super().__init__()
+        self.f_dex_loader = dex_loader
+
+    def run(self):
+        try:
+            parser = self.f_dex_loader()  # apk 里压缩的 dex 在这里解压, 不占 GUI 线程
+        except Exception as e:
+            LOG.log_error(tag="DexParseWorker", msg=f"open failed: {type(e).__name__}: {e}")
+            return
+        self.f_sig_opened.emit(parser)
+        progress = Progress(self.f_sig_cost.emit, DEX_PHASES)
+        progress.phase('header').finish()
+        # 只解析区段本身, 展示用的字符串由表格模型在显示到那一行时才生成
+        steps = [
+            ('strings', parser.dex_init_string_ids),
+            ('types', parser.dex_init_type_ids),
+            ('protos', parser.dex_init_proto_ids),
+            ('fields', parser.dex_init_field_ids),
+            ('methods', parser.dex_init_method_ids),
+            ('classes', parser.dex_init_classdef_ids),
+            ('maps', parser.dex_init_maplist),
+        ]
+        for section, init in steps:
+            if self.isInterruptionRequested():
+                return
+            init()
+            progress.phase(section).finish()
+            self.f_sig_section.emit(section)
@@ -0,0 +1,50 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class DexIdTableModel(QAbstractTableModel):  # id 区段的表格模型, 只有显示到的行才会去取字符串
+    f_headers: tuple
+    f_row_count: int
+    f_rows: list  # 搜索过滤后显示的行 (ids 表的下标), None 表示显示全部
+
+    def __init__(self, headers: tuple, row_count: int, getter, parent=None):
+        '''
+        :param headers: 列头, 第 0 列是下标
+        :param getter: 下标 -> 展示的字符串, 例如 Dexparser.dex_get_str
+        '''
+        super().__init__(parent)
+        self.f_headers = headers
+        self.f_row_count = row_count
+        self.f_getter = getter
+        self.f_rows = None
+
+    def m_set_rows(self, rows):
+        '''
+            只显示 rows 中的行, 例如 DexSearch.find 的结果; None 恢复显示全部
+        '''
+        self.beginResetModel()
+        self.f_rows = rows
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self.f_row_count if self.f_rows is None else len(self.f_rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.f_headers)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        row = index.row() if self.f_rows is None else self.f_rows[index.row()]
+        if index.column() == 0:
+            return str(row)
+        text = self.f_getter(row)
+        if role == Qt.DisplayRole:
+            return text[:256]  # 一次性显示的数据可能太大, 完整内容放在 tooltip 里
+        return text
+
+    def headerData(self, section: int, orientation: int, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.f_headers[section]
+        return None
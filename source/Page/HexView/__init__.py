@@ -0,0 +1,128 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont, QPainter, QColor, QKeySequence
+from PyQt5.QtWidgets import QAbstractScrollArea, QInputDialog
+from packages.hexdump2 import format_lines
+
+BYTES_PER_LINE = 16
+HEX_COLUMN = 11  # "00000000 | " 之后是 16 进制
+ASCII_COLUMN = HEX_COLUMN + BYTES_PER_LINE * 3 + 1  # "|" 之后是 ascii
+LINE_CHARS = ASCII_COLUMN + BYTES_PER_LINE + 1
+
+
+class myHexView(QAbstractScrollArea):  # 只绘制可见的行, 数据直接从 mmap 里取, 不拷贝整个文件
+    f_data: bytes
+    f_highlight: tuple  # [start, end) 高亮的范围
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.f_data = b""
+        self.f_highlight = (0, 0)
+
+        font = QFont("Courier New")
+        font.setStyleHint(QFont.Monospace)
+        font.setFixedPitch(True)
+        self.setFont(font)
+        self.f_highlight_color = QColor(255, 220, 120)
+        self.setFocusPolicy(Qt.StrongFocus)
+
+    def m_set_data(self, data):
+        self.f_data = data
+        self.f_highlight = (0, 0)
+        self.verticalScrollBar().setValue(0)
+        self.m_update_scrollbar()
+        self.viewport().update()
+
+    def m_line_height(self) -> int:
+        return self.fontMetrics().height()
+
+    def m_char_width(self) -> int:
+        return self.fontMetrics().horizontalAdvance(' ')
+
+    def m_line_count(self) -> int:
+        return (len(self.f_data) + BYTES_PER_LINE - 1) // BYTES_PER_LINE
+
+    def m_visible_lines(self) -> int:
+        return max(1, self.viewport().height() // self.m_line_height())
+
+    def m_update_scrollbar(self):
+        visible = self.m_visible_lines()
+        self.verticalScrollBar().setRange(0, max(0, self.m_line_count() - visible))
+        self.verticalScrollBar().setPageStep(visible)
+        content_width = LINE_CHARS * self.m_char_width()
+        self.horizontalScrollBar().setRange(0, max(0, content_width - self.viewport().width()))
+        self.horizontalScrollBar().setPageStep(self.viewport().width())
+
+    def m_jump_to(self, offset: int):
+        # offset 所在的行不在可见范围内时才滚动
+        line = offset // BYTES_PER_LINE
+        first = self.verticalScrollBar().value()
+        if not first <= line < first + self.m_visible_lines():
+            self.verticalScrollBar().setValue(line)
+
+    def m_highlight_range(self, start: int, end: int):
+        self.f_highlight = (start, end)
+        self.m_jump_to(start)
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.m_update_scrollbar()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Find) or (event.key() == Qt.Key_G and event.modifiers() & Qt.ControlModifier):
+            self.m_ask_jump()
+            return
+        scrollbar = self.verticalScrollBar()
+        steps = {
+            Qt.Key_Up: -1, Qt.Key_Down: 1,
+            Qt.Key_PageUp: -scrollbar.pageStep(), Qt.Key_PageDown: scrollbar.pageStep(),
+        }
+        if event.key() in steps:
+            scrollbar.setValue(scrollbar.value() + steps[event.key()])
+        elif event.key() == Qt.Key_Home:
+            scrollbar.setValue(0)
+        elif event.key() == Qt.Key_End:
+            scrollbar.setValue(scrollbar.maximum())
+        else:
+            super().keyPressEvent(event)
+
+    def m_ask_jump(self):
+        text, ok = QInputDialog.getText(self, "Go to offset", "offset (hex):")
+        if not ok or not text.strip():
+            return
+        try:
+            offset = int(text.strip(), 16)
+        except ValueError:
+            return
+        if 0 <= offset < len(self.f_data):
+            self.m_highlight_range(offset, offset + 1)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        line_height = self.m_line_height()
+        char_width = self.m_char_width()
+        ascent = self.fontMetrics().ascent()
+        x0 = -self.horizontalScrollBar().value()
+        first = self.verticalScrollBar().value()
+        start, end = self.f_highlight
+        first_offset = first * BYTES_PER_LINE
+        # 可见的行一次格式化: 00000010 | 00 01 .. 0F |................|
+        lines = format_lines(
+            self.f_data[first_offset:first_offset + (self.m_visible_lines() + 1) * BYTES_PER_LINE], first_offset)
+
+        for row, line in enumerate(lines):
+            offset = first_offset + row * BYTES_PER_LINE
+            chunk_size = min(BYTES_PER_LINE, len(self.f_data) - offset)
+            y = row * line_height
+
+            # 高亮 [start, end) 与这一行的交集, 16 进制和 ascii 两列都画
+            left, right = max(start, offset), min(end, offset + chunk_size)
+            if left < right:
+                first_byte, count = left - offset, right - left
+                painter.fillRect(x0 + (HEX_COLUMN + first_byte * 3) * char_width, y,
+                                 (count * 3 - 1) * char_width, line_height, self.f_highlight_color)
+                painter.fillRect(x0 + (ASCII_COLUMN + first_byte) * char_width, y,
+                                 count * char_width, line_height, self.f_highlight_color)
+
+            painter.drawText(x0, y + ascent, line)
+        painter.end()
@@ -1,11 +1,13 @@
 import os
-import threading
+from functools import partial
+from zipfile import is_zipfile
 
 from PyQt5.QtCore import Qt, QPoint
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import QTabWidget, QMenu, QAction
 
 from Page.DexAnalyzing import DexAnalyzing
+from packages.dexparser.apk import APKParser, AABParser
 from packages.log import LOG
 
 PAGE_DEX_ANALYZING_UI = "asset/ui/dex_widget.ui"
@@ -48,25 +50,47 @@ class myTabWidget(QTabWidget):
         self.tabBar().customContextMenuRequested['QPoint'].connect(self.m_tabBar_customContextMenuRequested_func)
 
     def m_msg_binding(self):
-        pass
+        self.currentChanged['int'].connect(self.m_currentChanged_activateTab)
         # self.action_CloseAllTabs.triggered['bool'].connect(self.action_CloseAllTabs_triggered_freeTabs)
         # self.action_CloseTab.triggered['bool'].connect(self.action_CloseTab_triggered_freeTab)
 
     def m_create_newTab(self, fpath: str):
+        if is_zipfile(fpath):
+            # apk/aab 里的每个 dex 开一个 tab, 名字是 app.apk!classes2.dex
+            # 这里只读 zip 的目录; dex 在 tab 第一次显示时由它的后台线程读取/解压
+            container = (AABParser if fpath.lower().endswith(".aab") else APKParser)(fpath)
+            for i, dex_name in enumerate(container.get_all_dex_filenames()):
+                dex_loader = partial(container.get_dex, dex_name, load_tables=False)
+                self.m_add_dexTab(fpath, os.path.basename(fpath) + "!" + dex_name,
+                                  DexAnalyzing(dex_name, PAGE_DEX_ANALYZING_UI, dex_loader=dex_loader),
+                                  container, select=i == 0)
+            return
+        self.m_add_dexTab(fpath, os.path.basename(fpath), DexAnalyzing(fpath, PAGE_DEX_ANALYZING_UI))
 
-        fname = os.path.basename(fpath)
+    def m_add_dexTab(self, fpath: str, fname: str, dexobj: DexAnalyzing, container: APKParser = None,
+                     select: bool = True):
         # 注意会有重合的名字,
         if fname in self.f_dexDict.keys():
             fname = fname + "$" + str(len(self.f_dexDict))  # 这样构造的fname是不重复的, 因为重复
         dict_tmp = {
             'fpath': fpath,
-            'dexobj': DexAnalyzing(fpath, PAGE_DEX_ANALYZING_UI)
+            'dexobj': dexobj,
+            'container': container,  # apk/aab 的 dex 共用一个, 最后一个 tab 关闭时才关闭
         }
         self.f_dexDict.update({fname: dict_tmp})
 
         #self.widget_DexBaseInfo_workprocess(fname)
         new_tab_idx = self.addTab(dict_tmp['dexobj'].f_widget, fname)  #添加显示的页面
-        self.setCurrentIndex(new_tab_idx)
+        if select:
+            self.setCurrentIndex(new_tab_idx)
+
+    def m_currentChanged_activateTab(self, index: int):
+        # 切到哪个 tab, 才开始读取/解析哪个 dex
+        widget = self.widget(index)
+        for dict_tmp in self.f_dexDict.values():
+            if dict_tmp['dexobj'].f_widget is widget:
+                dict_tmp['dexobj'].m_activate()
+                return
 
     def m_tabBar_customContextMenuRequested_func(self, pos: QPoint):
 
@@ -90,7 +114,11 @@ class myTabWidget(QTabWidget):
         else:
             LOG.log_info(msg=f"record tab_cur = {self.f_tab_choose}")
         self.removeTab(self.f_tab_choose)
+        self.f_dexDict[fname]['dexobj'].m_close()
+        container = self.f_dexDict[fname]['container']
         del self.f_dexDict[fname]  # 更新字典
+        if container is not None and all(d['container'] is not container for d in self.f_dexDict.values()):
+            container.close()
 
         tab_count = self.count()
         if tab_count > 0:
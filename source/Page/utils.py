@@ -30,7 +30,7 @@ def isDexFile(file_path):
     retValue=False
 
     check1=file_path.lower().endswith(".dex")
-    check2=file_path.lower().endswith(".apk")
+    check2=file_path.lower().endswith((".apk", ".aab"))
 
     f =open(file_path, 'rb')
     first_3_bytes = f.read(3).decode("utf-8",errors="ignore")
@@ -0,0 +1,329 @@
+'''
+    dex-viewer 的命令行入口, 不依赖 PyQt5
+
+    python cli.py dump classes.dex                     # 文本输出全部区段
+    python cli.py dump classes.dex --json -o out.json  # JSON 输出
+    python cli.py dump classes.dex -s header,maps      # 只输出部分区段
+    python cli.py multidex app.apk -j 8                # 多个 dex 并行解析, 合并索引
+    python cli.py scan samples/ -o corpus.jsonl        # 批量扫描, 中断后再次运行会接着扫
+    python cli.py xref classes.dex --method 12         # 交叉引用: 谁调用了 method_ids[12], 它又调用了谁
+    python cli.py search classes.dex onCreate          # 搜索字符串/类型/字段/方法, -r 正则, -i 忽略大小写
+    python cli.py hierarchy app.apk java.lang.Thread   # 父类链, 全部子类, 接口的实现者 (多 dex 合并)
+'''
+import argparse
+import json
+import os
+import re
+import sys
+from zipfile import is_zipfile
+
+from packages.dexparser import Dexparser
+from packages.dexparser.batch import collect_inputs, open_sink, scan_corpus, DEFAULT_TIMEOUT
+from packages.dexparser.hierarchy import to_descriptor
+from packages.dexparser.multidex import index_multidex
+from packages.dexparser.search import SEARCH_TABLES
+from packages.log import LOG
+from packages.mm_type.mm_dextype import Dex_HeaderItem
+
+SECTIONS = ('header', 'strings', 'types', 'protos', 'fields', 'methods', 'maps', 'classes')
+
+
+def dump_header(parser: Dexparser) -> dict:
+    header = {}
+    for field in Dex_HeaderItem._layout_().fields:
+        value = getattr(parser.dex_header, field.name).value
+        header[field.name] = value.hex() if isinstance(value, bytes) else value
+    return header
+
+
+def dump_maps(parser: Dexparser) -> list:
+    return [
+        {'type': item.info, 'size': item.size.value, 'offset': item.offset.value}
+        for item in parser.dex_init_maplist()
+    ]
+
+
+def dump_classes(parser: Dexparser) -> list:
+    classes = []
+    # 打开时 classes 阶段只读了 class_defs 表, class_data 到这里才解析, 进度条回到这个阶段重新走一遍
+    progress = parser.progress.phase('classes', len(parser.dex_init_classdef_ids()))
+    for row in parser.dex_init_classdef_ids():
+        class_data = row.class_data
+        entry = {
+            'class': parser.dex_get_type(row.class_idx),
+            'info': row.info,
+            'access_flags': row.access_flags,
+            'superclass': parser.dex_get_type(row.superclass_idx) if row.superclass_idx != 0xffffffff else None,
+            'fields': [],
+            'methods': [],
+        }
+        if class_data is not None:
+            for name in ('static_fields', 'instance_fields'):
+                entry['fields'] += [item.info for item in getattr(class_data, name, [])]
+            for name in ('direct_methods', 'virtual_methods'):
+                entry['methods'] += [item.info for item in getattr(class_data, name, [])]
+        classes.append(entry)
+        progress.update(len(classes))
+    progress.finish()
+    parser.progress.emit(1.0, force=True)  # classes 后面的阶段在打开时已经走完
+    return classes
+
+
+def dump(parser: Dexparser, sections=SECTIONS) -> dict:
+    '''
+        把指定区段整理成可以直接 json.dumps 的 dict
+    '''
+    getters = {
+        'header': lambda: dump_header(parser),
+        'strings': lambda: [parser.dex_get_str(i) for i in range(len(parser.dex_string_ids))],
+        'types': lambda: [parser.dex_get_type(i) for i in range(len(parser.dex_type_ids))],
+        'protos': lambda: [parser.dex_get_proto(i) for i in range(len(parser.dex_proto_ids))],
+        'fields': lambda: [parser.dex_get_field(i) for i in range(len(parser.dex_field_ids))],
+        'methods': lambda: [parser.dex_get_method(i) for i in range(len(parser.dex_method_ids))],
+        'maps': lambda: dump_maps(parser),
+        'classes': lambda: dump_classes(parser),
+    }
+    return {section: getters[section]() for section in sections}
+
+
+def write_text(result: dict, out):
+    for section, value in result.items():
+        out.write(f"[{section}]\n")
+        if isinstance(value, dict):
+            for name, item in value.items():
+                out.write(f"{name:<20}{hex(item) if isinstance(item, int) else item}\n")
+        elif section == 'maps':
+            for item in value:
+                out.write(f"{item['type']:<40}{item['size']:<10}{item['offset']:#x}\n")
+        elif section == 'classes':
+            for item in value:
+                out.write(f"{item['info']}\n")
+                for member in item['fields'] + item['methods']:
+                    out.write(f"    {member}\n")
+        else:
+            for i, item in enumerate(value):
+                out.write(f"{i:<8}{item}\n")
+        out.write("\n")
+
+
+def show_progress(value: float):
+    sys.stderr.write(f"\r{int(value * 100):3d}%")
+    if value >= 1:
+        sys.stderr.write("\n")
+
+
+def cmd_dump(args) -> int:
+    sections = args.sections.split(',') if args.sections else SECTIONS
+    unknown = [section for section in sections if section not in SECTIONS]
+    if unknown:
+        LOG.log_error(tag="cli", msg=f"unknown section: {', '.join(unknown)}")
+        return 2
+
+    parser = Dexparser(args.file, progress=show_progress if args.progress else None, cache_dir=args.cache)
+    result = dump(parser, sections)
+    if args.cache and parser.dex_cache is None:
+        parser.dex_save_cache(args.cache)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.json:
+            json.dump(result, out, ensure_ascii=False, indent=1)
+            out.write("\n")
+        else:
+            write_text(result, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def cmd_multidex(args) -> int:
+    index = index_multidex(args.file, processes=args.jobs, progress=show_progress if args.progress else None)
+    result = {
+        'dex': index.dex_names,
+        'strings': len(index.strings),
+        'classes': len(index.classes),
+        'methods': len(index.methods),
+        'duplicate_classes': index.duplicate_classes(),
+    }
+    if args.classes:
+        result['class_locations'] = {name: places[0][0] for name, places in index.classes.items()}
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.json:
+            json.dump(result, out, ensure_ascii=False, indent=1)
+            out.write("\n")
+        else:
+            out.write(f"dex: {', '.join(result['dex'])}\n")
+            for name in ('strings', 'classes', 'methods'):
+                out.write(f"{name:<20}{result[name]}\n")
+            for name, places in result['duplicate_classes'].items():
+                out.write(f"duplicate class {name}: {', '.join(dex for dex, _ in places)}\n")
+            for name, dex in result.get('class_locations', {}).items():
+                out.write(f"{dex:<20}{name}\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def cmd_scan(args) -> int:
+    paths = collect_inputs(args.paths, args.list)
+    stats = scan_corpus(paths, open_sink(args.output), workers=args.jobs, timeout=args.timeout,
+                        progress=show_progress if args.progress else None)
+    sys.stderr.write(f"{stats['scanned']} scanned, {stats['errors']} errors, {stats['skipped']} already done\n")
+    return 0
+
+
+def cmd_xref(args) -> int:
+    parser = Dexparser(args.file)
+    xrefs = parser.dex_xrefs()
+    queries = []
+    if args.method is not None:
+        queries += [(f"callers of {parser.dex_get_method(args.method)}", xrefs.callers(args.method)),
+                    (f"callees of {parser.dex_get_method(args.method)}", xrefs.callees(args.method))]
+    if args.field is not None:
+        queries += [(f"readers of {parser.dex_get_field(args.field)}", xrefs.field_readers(args.field)),
+                    (f"writers of {parser.dex_get_field(args.field)}", xrefs.field_writers(args.field))]
+    if args.string is not None:
+        queries.append((f"users of {parser.dex_get_str(args.string)!r}", xrefs.string_users(args.string)))
+    if args.type is not None:
+        queries.append((f"instantiations of {parser.dex_get_type(args.type)}", xrefs.instantiations(args.type)))
+    if not queries:
+        LOG.log_error(tag="cli", msg="one of --method/--field/--string/--type is required")
+        return 2
+
+    for title, methods in queries:
+        sys.stdout.write(f"[{title}]\n")
+        for method_idx in methods:
+            sys.stdout.write(f"{method_idx:<8}{parser.dex_get_method(method_idx)}\n")
+        sys.stdout.write("\n")
+    return 0
+
+
+def cmd_search(args) -> int:
+    parser = Dexparser(args.file, load_tables=False)
+    search = parser.dex_search()
+    tables = args.tables.split(',') if args.tables else SEARCH_TABLES
+    unknown = [table for table in tables if table not in SEARCH_TABLES]
+    if unknown:
+        LOG.log_error(tag="cli", msg=f"unknown table: {','.join(unknown)}")
+        return 2
+
+    for table in tables:
+        try:
+            rows = search.find(table, args.query, regex=args.regex, ignore_case=args.ignore_case, limit=args.limit)
+        except re.error as e:
+            LOG.log_error(tag="cli", msg=f"bad regex: {e}")
+            return 2
+        index = search.index(table)
+        for row in rows:
+            sys.stdout.write(f"{table:<8}{row:<8}{index.text(row)}\n")
+    return 0
+
+
+def cmd_hierarchy(args) -> int:
+    if is_zipfile(args.file):
+        hierarchy = index_multidex(args.file, processes=args.jobs).hierarchy()
+    else:
+        hierarchy = Dexparser(args.file, load_tables=False).dex_class_hierarchy()
+    node_id = hierarchy.ids.get(to_descriptor(args.cls))
+    if node_id is None:
+        LOG.log_error(tag="cli", msg=f"class not found: {args.cls}")
+        return 1
+
+    origin = hierarchy.origin[node_id]
+    kind = "interface" if hierarchy.is_interface(node_id) else "class"
+    sys.stdout.write(f"{kind} {hierarchy.name(node_id)} ({origin or 'not defined in this file'})\n\n")
+    sections = [
+        ("superclasses", hierarchy.superclasses(node_id)),
+        ("interfaces", hierarchy.interfaces(node_id)),
+        ("direct subclasses" if args.direct else "subclasses", hierarchy.subclasses(node_id, direct=args.direct)),
+        ("implementers", hierarchy.implementers(node_id)),
+        ("subinterfaces", hierarchy.subinterfaces(node_id)),
+    ]
+    for title, nodes in sections:
+        if not len(nodes):
+            continue
+        sys.stdout.write(f"[{title}: {len(nodes)}]\n")
+        for name in sorted(hierarchy.names(nodes)):
+            sys.stdout.write(f"{name}\n")
+        sys.stdout.write("\n")
+    return 0
+
+
+def auto_int(value: str) -> int:
+    return int(value, 0)
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(prog='dex-viewer', description='dex file format parser (headless)')
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    dump_cmd = commands.add_parser('dump', help='dump header, id tables, map list and classes')
+    dump_cmd.add_argument('file', help='dex file')
+    dump_cmd.add_argument('-s', '--sections', help=f"comma separated, default all: {','.join(SECTIONS)}")
+    dump_cmd.add_argument('--json', action='store_true', help='output JSON instead of text')
+    dump_cmd.add_argument('-o', '--output', help='write to file instead of stdout')
+    dump_cmd.add_argument('--progress', action='store_true', help='show progress on stderr')
+    dump_cmd.add_argument('--cache', help='parse cache directory; reused when the same dex is opened again')
+    dump_cmd.set_defaults(func=cmd_dump)
+
+    multidex_cmd = commands.add_parser('multidex', help='parse every dex of an apk/aab in parallel and merge the indexes')
+    multidex_cmd.add_argument('file', help='apk, aab or dex file')
+    multidex_cmd.add_argument('-j', '--jobs', type=int, help='worker processes, default: number of CPUs')
+    multidex_cmd.add_argument('--classes', action='store_true', help='list every class with the dex defining it')
+    multidex_cmd.add_argument('--json', action='store_true', help='output JSON instead of text')
+    multidex_cmd.add_argument('-o', '--output', help='write to file instead of stdout')
+    multidex_cmd.add_argument('--progress', action='store_true', help='show progress on stderr')
+    multidex_cmd.set_defaults(func=cmd_multidex)
+
+    scan_cmd = commands.add_parser('scan', help='scan a corpus of dex/apk files into a JSON-lines or SQLite file')
+    scan_cmd.add_argument('paths', nargs='*', help='files or directories (recursive)')
+    scan_cmd.add_argument('-l', '--list', help='file with one path per line')
+    scan_cmd.add_argument('-o', '--output', required=True, help='.jsonl, or .db/.sqlite for SQLite; files already scanned successfully are skipped')
+    scan_cmd.add_argument('-j', '--jobs', type=int, help='worker processes, default: number of CPUs')
+    scan_cmd.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='seconds per file')
+    scan_cmd.add_argument('--progress', action='store_true', help='show progress on stderr')
+    scan_cmd.set_defaults(func=cmd_scan)
+
+    xref_cmd = commands.add_parser('xref', help='cross references of a method, field, string or type')
+    xref_cmd.add_argument('file', help='dex file')
+    xref_cmd.add_argument('--method', type=auto_int, help='method_ids index: callers and callees')
+    xref_cmd.add_argument('--field', type=auto_int, help='field_ids index: readers and writers')
+    xref_cmd.add_argument('--string', type=auto_int, help='string_ids index: methods loading it')
+    xref_cmd.add_argument('--type', type=auto_int, help='type_ids index: new-instance/new-array sites')
+    xref_cmd.set_defaults(func=cmd_xref)
+
+    search_cmd = commands.add_parser('search', help='substring or regex search over strings, types, fields and methods')
+    search_cmd.add_argument('file', help='dex file')
+    search_cmd.add_argument('query', help='substring, or regular expression with -r')
+    search_cmd.add_argument('-t', '--tables', help=f"comma separated, default all: {','.join(SEARCH_TABLES)}")
+    search_cmd.add_argument('-r', '--regex', action='store_true', help='query is a regular expression')
+    search_cmd.add_argument('-i', '--ignore-case', action='store_true', help='ignore ASCII case')
+    search_cmd.add_argument('--limit', type=int, help='at most this many rows per table')
+    search_cmd.set_defaults(func=cmd_search)
+
+    hierarchy_cmd = commands.add_parser('hierarchy', help='superclasses, subclasses and implementers of a class')
+    hierarchy_cmd.add_argument('file', help='dex, apk or aab file; every dex of an apk is merged')
+    hierarchy_cmd.add_argument('cls', metavar='class', help='descriptor (Ljava/lang/Object;) or java name')
+    hierarchy_cmd.add_argument('--direct', action='store_true', help='direct subclasses only')
+    hierarchy_cmd.add_argument('-j', '--jobs', type=int, help='worker processes for apk/aab, default: number of CPUs')
+    hierarchy_cmd.set_defaults(func=cmd_hierarchy)
+    return arg_parser
+
+
+def main(argv=None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    LOG.stream = sys.stderr  # 日志不要混进 stdout 的输出
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # 例如 `| head`; 还在缓冲区里的输出丢给 devnull, 退出时 flush 不会再失败
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
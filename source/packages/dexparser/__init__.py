@@ -1,27 +1,54 @@
 import time
-from io import BytesIO
-from ctypes import c_byte, c_uint32, c_uint16
 
 from typing import TypeVar
-from zipfile import ZipFile, is_zipfile
 import struct
 import mmap
 import os
 
 from packages.dexparser import disassembler
-from packages.dexparser.errors import InsufficientParameterError, IsNotAPKFileFormatError
-from packages.dexparser.utils import uleb128_value, encoded_field, encoded_method, encoded_annotation, type2full, \
-    map_type
+from packages.dexparser.xref import build_xrefs, XrefIndex
+from packages.dexparser.search import DexSearch
+from packages.dexparser.hierarchy import build_hierarchy, ClassHierarchy
+from packages.dexparser.annotations import AnnotationDecoder, AnnotationsDirectory
+from packages.dexparser.encoded_value import ValueReader
+from packages.dexparser.cache import TABLES as CACHE_TABLES, load_cache, save_cache
+from packages.dexparser.errors import InsufficientParameterError
+from packages.dexparser.string_pool import StringPool, DEFAULT_CACHE_SIZE
+from packages.dexparser.leb128 import read_uleb128, read_uleb128p1, read_sleb128, read_uleb128_spans, \
+    read_uleb128p1_run
+from packages.dexparser.utils import type2full, map_type
 from packages.log import LOG
+from packages.progress import Progress
 
-from PyQt5.QtCore import pyqtSignal, QObject
-
-from packages.mm_type import FileString, sizeof, read_file_from_struct
+from packages.mm_type import FileString, sizeof, read_buffer_from_struct
 from packages.mm_type.mm_ctype import DataToCClass
-from packages.mm_type.mm_dextype import Dex_HeaderItem, Dex_StringId_Item, structure, Dex_TypeId_Item, Dex_ProtoId_Item, \
-    Dex_FieldId_Item, Dex_MethodId_Item, Dex_ClassDef_Item, Dex_Map_Item, Dex_class_data_item, Dex_class_data_field, \
-    Dex_class_data_method, Dex_CodeItem, Dex_AnnotationsDirectory_Item, Dex_MethodAnnotation, Dex_ParameterAnnotation, \
-    Dex_FieldAnnotation
+from packages.mm_type.mm_table import StructTable, StructRow
+from packages.mm_type.mm_dextype import Dex_HeaderItem, Dex_StringId_Item, Dex_TypeId_Item, Dex_ProtoId_Item, \
+    Dex_FieldId_Item, Dex_MethodId_Item, Dex_ClassDef_Item, Dex_Map_Item, Dex_CodeItem, Dex_TypeList, \
+    Dex_ClassDataHeader, Dex_EncodedField, Dex_EncodedMethod
+
+
+class DexClassDef(StructRow):
+    '''
+        class_defs 的行视图, class_data 第一次访问时才解析
+    '''
+    __slots__ = ()
+
+    @property
+    def class_data(self):
+        return self._table_.owner.dex_get_class_data(self._index_)
+
+    @property
+    def annotations(self):
+        return self._table_.owner.dex_get_annotations(self._index_)
+
+    @property
+    def static_values(self) -> list:
+        return self._table_.owner.dex_get_static_values(self._index_)
+
+    @property
+    def info(self) -> str:
+        return self._table_.owner.dex_get_classdef(self._index_)
 
 
 # SHORT_TYPES={
@@ -35,17 +62,43 @@ from packages.mm_type.mm_dextype import Dex_HeaderItem, Dex_StringId_Item, struc
 #     'F': "float",
 #     'D': "double",
 # }
-class Dexparser(QObject):  # 因为要发信号,所以得继承Qobject
-
-    sig_cost: pyqtSignal = pyqtSignal(float)
-
-    def __init__(self, filedir=None):
-        super().__init__()
+# 打开 dex 时各阶段占整体进度的权重
+DEX_PHASES = {
+    'header': 1,
+    'strings': 2,
+    'types': 1,
+    'protos': 1,
+    'fields': 1,
+    'methods': 1,
+    'classes': 1,
+    'maps': 1,
+}
+
+
+class Dexparser:  # 不依赖 Qt, 进度通过 progress 回调通知 (GUI 里接到自己的信号上)
+
+    def __init__(self, filedir=None, string_cache_size=DEFAULT_CACHE_SIZE, progress=None, load_tables=True,
+                 fileobj=None, cache_dir=None):
+        '''
+        :param fileobj: dex 的内容 (bytes / bytearray / mmap / memoryview), 代替 filedir;
+                        偏移都相对于它的开头, 比如 APK 里未压缩的 classes.dex 可以直接传 mmap 的切片
+        :param cache_dir: 解析缓存的目录 (见 cache.py), 有这个 dex 的缓存时字符串和各种名字直接从缓存取;
+                          dex_save_cache 写入缓存
+        :param progress: 进度回调, 参数是 0~1 的 float, 可以为 None; 上报经过 Progress 合并节流
+        :param load_tables: 为 False 时只读取头部, 各个 id 区段在 dex_init_* 或第一次用到时再解析
+                            (GUI 在后台线程里逐个解析)
+        '''
+        self.progress = Progress(progress, DEX_PHASES)
+        self.file = None
         if filedir:
             if not os.path.isfile(filedir):
                 raise FileNotFoundError
             self.file = open(filedir, 'rb')
             self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        elif fileobj is not None:
+            self.data = fileobj
+        else:
+            raise InsufficientParameterError('fileobj or filedir parameter required.')
 
         #确定端序
         end_tag = struct.unpack('<L', self.data[0x28:0x2C])[0]
@@ -54,17 +107,46 @@ class Dexparser(QObject):  # 因为要发信号,所以得继承Qobject
         )
 
         # 声明一下把
+        # 定长的 id 区段都是 StructTable (列式存储), 展示用的字符串按需生成并缓存
         self.dex_header: Dex_HeaderItem = None
-        self.dex_string_ids = []
-        self.dex_type_ids = []
-        self.dex_proto_ids = []
-        self.dex_field_ids = []
-        self.dex_method_ids = []
-        self.dex_classdef_ids = []
+        self.dex_string_ids: StructTable = None
+        self.dex_type_ids: StructTable = None
+        self.dex_proto_ids: StructTable = None
+        self.dex_field_ids: StructTable = None
+        self.dex_method_ids: StructTable = None
+        self.dex_classdef_ids: StructTable = None
         self.dex_map_list = []
 
+        self.dex_string_pool: StringPool = None
+        self.__string_cache_size = string_cache_size
+        self.__class_data = {}  # classdef 下标 -> 解析好的 class_data (没有则为 None)
+        self.__xrefs = None
+        self.__search = None
+        self.__hierarchy = None
+        self.__annotations = None
+        self.__values = None
+        self.__type_names = []
+        self.__proto_names = []
+        self.__field_names = []
+        self.__method_names = []
+        self.__classdef_names = []
+
         # 读取头部
         self.dex_init_header()
+        self.dex_cache = None
+        if cache_dir:
+            header = self.dex_header
+            counts = {
+                'strings': header.string_ids_size.value,
+                'types': header.type_ids_size.value,
+                'protos': header.proto_ids_size.value,
+                'fields': header.field_ids_size.value,
+                'methods': header.method_ids_size.value,
+                'classes': header.class_defs_size.value,
+            }
+            self.dex_cache = load_cache(cache_dir, header.signature.value, header.checksum.value, counts)
+        if not load_tables:
+            return
         # 读取并解析string_ids
         self.dex_init_string_ids()
         # 读取并解析type_ids
@@ -75,179 +157,124 @@ class Dexparser(QObject):  # 因为要发信号,所以得继承Qobject
         self.dex_init_field_ids()
         # 读取并解析method_ids
         self.dex_init_method_ids()
-        # 读取并解析classdef_ids
+        # 读取并解析classdef_ids (class_data / code_item 都是访问时才解析)
         self.dex_init_classdef_ids()
         # # 读取并解析map_list
         # self.dex_init_maplist()
 
-        #回到最初的位置
-        #self.file.seek(0)
+    def close(self):
+        '''
+            关闭缓存文件和 dex 文件, 之后这个 parser 不能再用
+        '''
+        if self.dex_cache is not None:
+            self.dex_cache.close()
+            self.dex_cache = None
+        if self.file is not None:
+            try:
+                self.data.close()
+            except BufferError:
+                pass  # 头部等结构体还引用着 mmap, 交给 gc
+            self.file.close()
+            self.file = None
 
     def dex_init_header(self):
         if self.dex_header is not None:
             return self.dex_header
-        org_pos = self.file.tell()
-        # -------------------------
-        self.file.seek(0)
-        self.dex_header: Dex_HeaderItem = read_file_from_struct(self.file, Dex_HeaderItem)
-        #-------------------------
-        self.file.seek(org_pos)
+        self.dex_header: Dex_HeaderItem = read_buffer_from_struct(self.data, 0, Dex_HeaderItem)
+        self.progress.phase('header').finish()
         return self.dex_header
 
     def dex_init_string_ids(self):
-        if len(self.dex_string_ids) != 0:
+        if self.dex_string_ids is not None:
             return self.dex_string_ids
-        org_pos = self.file.tell()
-        # -------------------------
-        self.file.seek(self.dex_header.string_ids_off.value)
-        for i in range(self.dex_header.string_ids_size.value):
-            stringId_item_tmp = read_file_from_struct(self.file, Dex_StringId_Item)  #返回的是一个对象
-            stringId_item_tmp.string_data_off.info = self.__parse_string_ids(stringId_item_tmp.string_data_off.value)
-            self.dex_string_ids.append(stringId_item_tmp)
-            # -------------------------
-            self.sig_cost.emit(i / self.dex_header.string_ids_size.value)
-        # -------------------------
-        self.file.seek(org_pos)
+        self.dex_string_ids = StructTable(Dex_StringId_Item, self.data, self.dex_header.string_ids_off.value,
+                                          self.dex_header.string_ids_size.value)
+        # 字符串内容在 dex_get_str 第一次访问时才解码
+        self.dex_string_pool = StringPool(self.data, self.dex_string_ids.column('string_data_off'),
+                                          self.__string_cache_size)
+        self.progress.phase('strings').finish()
         return self.dex_string_ids
 
     def dex_init_type_ids(self):
-        if len(self.dex_type_ids) != 0:
+        if self.dex_type_ids is not None:
             return self.dex_type_ids
-        org_pos = self.file.tell()
-        # -------------------------
-
-        self.file.seek(self.dex_header.type_ids_off.value)
-        for i in range(self.dex_header.type_ids_size.value):
-            typeid_item_tmp = read_file_from_struct(self.file, Dex_TypeId_Item)
-            tmp_str = self.dex_get_str(typeid_item_tmp.descriptor_idx.value)
-            typeid_item_tmp.descriptor_idx.info = {
-                'type_str': tmp_str,
-                'full_type_str': type2full(tmp_str)
-            }
-            self.dex_type_ids.append(typeid_item_tmp)
-            # -------------------------
-            self.sig_cost.emit(i / self.dex_header.type_ids_size.value)
-
-        # -------------------------
-        self.file.seek(org_pos)
+        self.dex_type_ids = StructTable(Dex_TypeId_Item, self.data, self.dex_header.type_ids_off.value,
+                                        self.dex_header.type_ids_size.value)
+        self.__type_names = [None] * len(self.dex_type_ids)
+        self.progress.phase('types').finish()
         return self.dex_type_ids
 
     def dex_init_proto_ids(self):
-        if len(self.dex_proto_ids) != 0:
+        if self.dex_proto_ids is not None:
             return self.dex_proto_ids
-        org_pos = self.file.tell()
-        # -------------------------
-        self.file.seek(self.dex_header.proto_ids_off.value)
-        for i in range(self.dex_header.proto_ids_size.value):
-            protoid_item_tmp = read_file_from_struct(self.file, Dex_ProtoId_Item)
-            protoid_item_tmp.shorty_idx.info = self.dex_get_str(protoid_item_tmp.shorty_idx.value)
-            protoid_item_tmp.return_type_idx.info = self.dex_get_type(protoid_item_tmp.return_type_idx.value)
-            protoid_item_tmp.parameters_off.info = self.__parse_type_list_parameters_off(protoid_item_tmp.parameters_off.value)#没有返回空
-            protoid_item_tmp.info = self.__parse_type_ids(protoid_item_tmp)
-            self.dex_proto_ids.append(protoid_item_tmp)
-            # -------------------------
-            self.sig_cost.emit(i / self.dex_header.proto_ids_size.value)
-        # -------------------------
-        self.file.seek(org_pos)
+        self.dex_proto_ids = StructTable(Dex_ProtoId_Item, self.data, self.dex_header.proto_ids_off.value,
+                                         self.dex_header.proto_ids_size.value)
+        self.__proto_names = [None] * len(self.dex_proto_ids)
+        self.progress.phase('protos').finish()
         return self.dex_proto_ids
 
     def dex_init_field_ids(self):
-        if len(self.dex_field_ids) != 0:
+        if self.dex_field_ids is not None:
             return self.dex_field_ids
-        org_pos = self.file.tell()
-        # -------------------------
-
-        self.file.seek(self.dex_header.field_ids_off.value)
-        for i in range(self.dex_header.field_ids_size.value):
-            field_id_item_tmp = read_file_from_struct(self.file, Dex_FieldId_Item)
-            field_id_item_tmp.class_idx.info = self.dex_get_type(field_id_item_tmp.class_idx.value)
-            field_id_item_tmp.type_idx.info = self.dex_get_type(field_id_item_tmp.type_idx.value)
-            field_id_item_tmp.name_idx.info = self.dex_get_str(field_id_item_tmp.name_idx.value)
-            field_id_item_tmp.info = self.__parse_field_ids(field_id_item_tmp)
-            self.dex_field_ids.append(field_id_item_tmp)
-            # -------------------------
-            self.sig_cost.emit(i / self.dex_header.field_ids_size.value)
-        # -------------------------
-        self.file.seek(org_pos)
+        self.dex_field_ids = StructTable(Dex_FieldId_Item, self.data, self.dex_header.field_ids_off.value,
+                                         self.dex_header.field_ids_size.value)
+        self.__field_names = [None] * len(self.dex_field_ids)
+        self.progress.phase('fields').finish()
         return self.dex_field_ids
 
     def dex_init_method_ids(self):
-        if len(self.dex_method_ids) != 0:
+        if self.dex_method_ids is not None:
             return self.dex_method_ids
-        org_pos = self.file.tell()
-        # -------------------------
-
-        self.file.seek(self.dex_header.method_ids_off.value)
-        for i in range(self.dex_header.method_ids_size.value):
-            method_id_item_tmp: Dex_MethodId_Item = read_file_from_struct(self.file, Dex_MethodId_Item)
-            method_id_item_tmp.class_idx.info = self.dex_get_type(method_id_item_tmp.class_idx.value)
-            method_id_item_tmp.proto_idx.info = self.dex_get_proto(method_id_item_tmp.proto_idx.value)
-            method_id_item_tmp.name_idx.info = self.dex_get_str(method_id_item_tmp.name_idx.value)
-            method_id_item_tmp.info = self.__parse_method_ids(method_id_item_tmp)
-            self.dex_method_ids.append(method_id_item_tmp)
-            # -------------------------
-            self.sig_cost.emit(i / self.dex_header.method_ids_size.value)
-        # -------------------------
-        self.file.seek(org_pos)
+        self.dex_method_ids = StructTable(Dex_MethodId_Item, self.data, self.dex_header.method_ids_off.value,
+                                          self.dex_header.method_ids_size.value)
+        self.__method_names = [None] * len(self.dex_method_ids)
+        self.progress.phase('methods').finish()
         return self.dex_method_ids
 
     def dex_init_classdef_ids(self):
-        if len(self.dex_classdef_ids) != 0:
+        if self.dex_classdef_ids is not None:
             return self.dex_classdef_ids
-        org_pos = self.file.tell()
-        # -------------------------
-
-        self.file.seek(self.dex_header.class_defs_off.value)
-        for i in range(self.dex_header.class_defs_size.value):
-
-            classdef_item_tmp: Dex_ClassDef_Item = read_file_from_struct(self.file, Dex_ClassDef_Item)
-
-            classdef_item_tmp.class_idx.info = self.dex_get_type(classdef_item_tmp.class_idx.value)
-            classdef_item_tmp.access_flags.info = self.__parse_access_flags("classes", classdef_item_tmp.access_flags.value)
-            classdef_item_tmp.superclass_idx.info = self.dex_get_type( classdef_item_tmp.superclass_idx.value)  # 父类好像是一定存在的...那么是0
-            classdef_item_tmp.interfaces_off.info = self.__parse_interfaces_off(classdef_item_tmp.interfaces_off.value)
-            classdef_item_tmp.source_file_idx.info = self.dex_get_str(classdef_item_tmp.source_file_idx.value)
-            #classdef_item_tmp.annotations_off.info = self.__parse_annotations_off(classdef_item_tmp.annotations_off.value)
-            classdef_item_tmp.class_data_off.info = self.__parse_class_data(classdef_item_tmp.class_data_off.value)
-            #classdef_item_tmp.static_values_off.info
-            classdef_item_tmp.info = self.__parse_classdef_item(classdef_item_tmp)
-            self.dex_classdef_ids.append(classdef_item_tmp)
-        self.file.seek(org_pos)
+        self.dex_classdef_ids = StructTable(Dex_ClassDef_Item, self.data, self.dex_header.class_defs_off.value,
+                                            self.dex_header.class_defs_size.value, row_type=DexClassDef, owner=self)
+        self.__classdef_names = [None] * len(self.dex_classdef_ids)
+        self.progress.phase('classes').finish()
         return self.dex_classdef_ids
 
     def dex_init_maplist(self):
         if len(self.dex_map_list) != 0:
             return self.dex_map_list
-        org_pos = self.file.tell()
+        item_size = sizeof(Dex_Map_Item)
         # -------------------------
         offset = self.dex_header.map_off.value
         mapitem_cnt = struct.unpack('<L', self.data[offset:offset + 4])[0]
 
-        self.file.seek(self.dex_header.map_off.value + 4)
+        offset += 4
+        progress = self.progress.phase('maps', mapitem_cnt)
         for i in range(mapitem_cnt):
-            MapList_item_tmp = read_file_from_struct(self.file, Dex_Map_Item)
+            MapList_item_tmp = read_buffer_from_struct(self.data, offset + i * item_size, Dex_Map_Item)
             MapList_item_tmp.info = map_type(MapList_item_tmp.type.value)
             self.dex_map_list.append(MapList_item_tmp)
             # -------------------------
-            self.sig_cost.emit(i / mapitem_cnt)
+            progress.update(i)
+        progress.finish()
         # -------------------------
-        self.file.seek(org_pos)
         return self.dex_map_list
 
     # 最基础的3个get
     # dex_get_str, dex_get_type , dex_get_proto
     def dex_get_str(self, index: int) -> str:
-        string_ids_len = len(self.dex_string_ids)
-        if string_ids_len == 0:
+        if self.dex_string_ids is None:
             self.dex_init_string_ids()
-            string_ids_len = len(self.dex_string_ids)
+        string_ids_len = len(self.dex_string_pool)
         if index == 0xffffffff:
             LOG.log_info(tag="dex_get_str",msg="NO INDEX")  #这个确实存在
-            return self.dex_string_ids[0].string_data_off.info.str_cbytes.str
+            return self.dex_string_pool[0]
         if index >= string_ids_len:  #这个是异常
             LOG.log_error(tag="dex_get_str",msg="INDEX OUT OF RANGE")
             return " "
-        return self.dex_string_ids[index].string_data_off.info.str_cbytes.str
+        if self.dex_cache is not None:
+            return self.dex_cache.get('strings', index)
+        return self.dex_string_pool[index]
 
     def dex_get_type(self, idx: int) -> str:
         '''
@@ -255,96 +282,218 @@ class Dexparser(QObject):  # 因为要发信号,所以得继承Qobject
         :param idx:
         :return
         '''
-        type_ids_len = len(self.dex_type_ids)
-        if type_ids_len == 0:
+        if self.dex_type_ids is None:
             self.dex_init_type_ids()
-            type_ids_len = len(self.dex_type_ids)
+        type_ids_len = len(self.dex_type_ids)
         if idx == 0xffffffff:
             LOG.log_error(tag="dex_get_type", msg="NO INDEX")
             return ""
         if idx >= type_ids_len:  # 这个是异常
             LOG.log_error(tag="dex_get_type", msg="INDEX OUT OF RANGE")
             return ""
-        return self.dex_type_ids[idx].descriptor_idx.info['full_type_str']
+        full_type_str = self.__type_names[idx]
+        if full_type_str is None:
+            full_type_str = self.__from_cache('types', idx) or type2full(self.dex_get_type_descriptor(idx))
+            self.__type_names[idx] = full_type_str
+        return full_type_str
+
+    def dex_get_type_descriptor(self, idx: int) -> str:
+        '''
+        返回类型描述符原文, 例如 Ljava/lang/Object;
+        '''
+        if self.dex_type_ids is None:
+            self.dex_init_type_ids()
+        return self.dex_get_str(self.dex_type_ids.column('descriptor_idx')[idx])
 
     def dex_get_proto(self, idx: int) -> str:
-        proto_ids_len = len(self.dex_proto_ids)
-        if proto_ids_len == 0:
+        if self.dex_proto_ids is None:
             self.dex_init_proto_ids()
-            proto_ids_len = len(self.dex_proto_ids)
+        proto_ids_len = len(self.dex_proto_ids)
         if idx == 0xffffffff:
             LOG.log_error(tag="dex_get_proto", msg="NO INDEX")
             return " "
         if idx >= proto_ids_len:  # 这个是异常
             LOG.log_error(tag="dex_get_proto", msg="INDEX OUT OF RANGE")
             return " "
-        return self.dex_proto_ids[idx].info
+        info = self.__proto_names[idx]
+        if info is None:
+            info = self.__proto_names[idx] = self.__from_cache('protos', idx) or self.__parse_type_ids(idx)
+        return info
 
     def dex_get_field(self, index):
-        field_ids_len = len(self.dex_field_ids)
-        if field_ids_len == 0:
+        if self.dex_field_ids is None:
             self.dex_init_field_ids()
-            field_ids_len = len(self.dex_field_ids)
+        field_ids_len = len(self.dex_field_ids)
         if index == 0xffffffff:
             LOG.log_error(tag="field", msg="NO INDEX")
             return " "
         if index >= field_ids_len:  # 这个是异常
             LOG.log_error(tag="field", msg="INDEX OUT OF RANGE")
             return " "
-        return self.dex_field_ids[index].info
+        info = self.__field_names[index]
+        if info is None:
+            info = self.__field_names[index] = self.__from_cache('fields', index) or self.__parse_field_ids(index)
+        return info
 
     def dex_get_method(self, index):
-        method_ids_len = len(self.dex_method_ids)
-        if method_ids_len == 0:
+        if self.dex_method_ids is None:
             self.dex_init_method_ids()
-            method_ids_len = len(self.dex_method_ids)
+        method_ids_len = len(self.dex_method_ids)
         if index == 0xffffffff:
             LOG.log_error(tag="method", msg="NO INDEX")
             return " "
         if index >= method_ids_len:  # 这个是异常
             LOG.log_error(tag="method", msg="INDEX OUT OF RANGE")
             return " "
-        return self.dex_method_ids[index].info
+        info = self.__method_names[index]
+        if info is None:
+            info = self.__method_names[index] = self.__from_cache('methods', index) or self.__parse_method_ids(index)
+        return info
+
+    def dex_get_classdef(self, index):
+        if self.dex_classdef_ids is None:
+            self.dex_init_classdef_ids()
+        if index >= len(self.dex_classdef_ids):  # 这个是异常
+            LOG.log_error(tag="classdef", msg="INDEX OUT OF RANGE")
+            return " "
+        info = self.__classdef_names[index]
+        if info is None:
+            info = self.__classdef_names[index] = (self.__from_cache('classes', index)
+                                                   or self.__parse_classdef_item(index))
+        return info
+
+    def __from_cache(self, table: str, index: int):
+        if self.dex_cache is None:
+            return None
+        return self.dex_cache.get(table, index)
 
-    def __parse_string_ids(self, offset):  #属于临时的解析,所以fseek后,要把指针指回去
-        org_fpostion = self.file.tell()
-        # -------------------------
-        self.file.seek(offset)
+    def dex_save_cache(self, cache_dir: str) -> str:
+        '''
+            生成全部字符串和名字并写入缓存, 下次用同一个 cache_dir 打开这个 dex 时直接读取
+        :return: 缓存文件路径
+        '''
+        getters = {
+            'strings': (self.dex_get_str, self.dex_init_string_ids),
+            'types': (self.dex_get_type, self.dex_init_type_ids),
+            'protos': (self.dex_get_proto, self.dex_init_proto_ids),
+            'fields': (self.dex_get_field, self.dex_init_field_ids),
+            'methods': (self.dex_get_method, self.dex_init_method_ids),
+            'classes': (self.dex_get_classdef, self.dex_init_classdef_ids),
+        }
+        tables = {}
+        for name in CACHE_TABLES:
+            getter, init = getters[name]
+            tables[name] = [getter(i) for i in range(len(init()))]
+        if self.dex_cache is not None:
+            # 映射着的旧缓存要先关掉, Windows 上才能替换同名文件
+            self.dex_cache.close()
+            self.dex_cache = None
+        return save_cache(cache_dir, self.dex_header.signature.value, self.dex_header.checksum.value, tables)
+
+    def dex_get_class_data(self, index):
+        '''
+            返回第 index 个 class_def 的 class_data, 第一次访问时才解析
+            (方法的 code_item 也是访问 method.code 时才解析)
+        '''
+        if self.dex_classdef_ids is None:
+            self.dex_init_classdef_ids()
+        if index in self.__class_data:
+            return self.__class_data[index]
+        class_data = self.__class_data[index] = self.__parse_class_data(
+            self.dex_classdef_ids.column('class_data_off')[index])
+        return class_data
+
+    def dex_values(self) -> ValueReader:
+        '''
+            encoded_value 解码器, static_values 等 encoded_array_item 按偏移缓存
+        '''
+        if self.__values is None:
+            self.__values = ValueReader(self)
+        return self.__values
+
+    def dex_get_static_values(self, index) -> list:
+        '''
+            第 index 个 class_def 的静态字段初始值 (按 static_fields 的顺序, 可能比字段少), 没有时为 []
+        '''
+        if self.dex_classdef_ids is None:
+            self.dex_init_classdef_ids()
+        return self.get_static_values(self.dex_classdef_ids.column('static_values_off')[index])
+
+    def dex_annotations(self) -> AnnotationDecoder:
+        '''
+            注解解码器, 目录/注解集/注解都按偏移缓存, 共用的注解只解码一次
+        '''
+        if self.__annotations is None:
+            self.__annotations = AnnotationDecoder(self)
+        return self.__annotations
 
-        str_len, str_len_size = uleb128_value(self.data, offset)
+    def dex_get_annotations(self, index) -> AnnotationsDirectory:
+        '''
+            第 index 个 class_def 的注解目录, 没有注解时为 None; 具体的注解在访问时才解码
+        '''
+        if self.dex_classdef_ids is None:
+            self.dex_init_classdef_ids()
+        return self.dex_annotations().directory(self.dex_classdef_ids.column('annotations_off')[index])
 
-        @structure
-        class new_string_item:
-            len_size: c_byte * str_len_size
-            str_cbytes: c_byte * str_len
+    def dex_disassemble(self, code_item):
+        '''
+            反汇编一个 code_item (例如 method.code), 索引操作数解析成文本
+        :return: disassembler.Instruction 列表
+        '''
+        if code_item is None:
+            return []
+        return disassembler.disassemble(code_item.insns, self)
 
-        string_item_tmp = read_file_from_struct(self.file, new_string_item)
-        string_item_tmp.str_cbytes.str = string_item_tmp.str_cbytes._data_.decode('utf-8', errors='ignore')
-        # -------------------------
-        self.file.seek(org_fpostion)
-        return string_item_tmp
+    def dex_xrefs(self) -> XrefIndex:
+        '''
+            交叉引用索引 (调用者/被调用者, 字段读写, 字符串, new-instance), 第一次调用时扫描全部 code_item
+        '''
+        if self.__xrefs is None:
+            self.__xrefs = build_xrefs(self)
+        return self.__xrefs
 
-    def __parse_type_ids(self, proto_item) -> str:
-        if proto_item.parameters_off.info == None:
+    def dex_search(self) -> DexSearch:
+        '''
+            字符串/类型/原型/字段/方法的搜索, 结果是 ids 表的下标; 每个表的索引在第一次查询时建立
+        '''
+        if self.__search is None:
+            self.__search = DexSearch(self)
+        return self.__search
+
+    def dex_class_hierarchy(self) -> ClassHierarchy:
+        '''
+            类继承关系 (子类, 接口的实现者), 第一次调用时建立
+        '''
+        if self.__hierarchy is None:
+            self.__hierarchy = build_hierarchy(self)
+        return self.__hierarchy
+
+    def __parse_type_ids(self, idx) -> str:
+        proto_ids = self.dex_proto_ids
+        parameters_off = proto_ids.column('parameters_off')[idx]
+        if parameters_off == 0:
             parameters_str = "()"
         else:
-            parameters_str = proto_item.parameters_off.info.info
-        return proto_item.return_type_idx.info + " " + parameters_str
-
-    def __parse_field_ids(self, field_id_item) -> str:
-        return field_id_item.type_idx.info + " " + \
-            field_id_item.class_idx.info + "." + \
-            field_id_item.name_idx.info
-
-    def __parse_method_ids(self, method_id_item) -> str:
-        proto_full_name = method_id_item.proto_idx.info
+            parameters_str = self.__parse_type_list_parameters_off(parameters_off).info
+        return self.dex_get_type(proto_ids.column('return_type_idx')[idx]) + " " + parameters_str
+
+    def __parse_field_ids(self, idx) -> str:
+        field_id_item = self.dex_field_ids[idx]
+        return self.dex_get_type(field_id_item.type_idx) + " " + \
+            self.dex_get_type(field_id_item.class_idx) + "." + \
+            self.dex_get_str(field_id_item.name_idx)
+
+    def __parse_method_ids(self, idx) -> str:
+        method_id_item = self.dex_method_ids[idx]
+        proto_full_name = self.dex_get_proto(method_id_item.proto_idx)
         # class_type_str=self.__type_ids[class_idx]['type_str']
         # if 'L' not in class_type_str or ';' not in class_type_str: #在有限的认知下, 该类型一定是一个 class 类, 后来发现类不一定是L开头, ';'结尾
         #     raise Exception('proto_str error')
         met_proto_split = proto_full_name.index(" ")  # str.find()找不到返回-1, index会抛出异常
         ret_type_str = proto_full_name[:met_proto_split]
         arg_type_str = proto_full_name[met_proto_split + 1:]  # 不从空格开始
-        full_method_str = ret_type_str + " " + method_id_item.class_idx.info + "." + method_id_item.name_idx.info + arg_type_str
+        full_method_str = ret_type_str + " " + self.dex_get_type(method_id_item.class_idx) + "." + \
+            self.dex_get_str(method_id_item.name_idx) + arg_type_str
         return full_method_str
 
     def __parse_access_flags(self, type_str, access_flags) -> str:
@@ -368,192 +517,112 @@ class Dexparser(QObject):  # 因为要发信号,所以得继承Qobject
         return access_str
 
     def __parse_interfaces_off(self, offset) -> str:
-        org_pos = self.file.tell()
-        # -------------------------
         interfaces_str = ""
         if offset != 0:
             interfaces_cnt = struct.unpack('<L', self.data[offset:offset + 4])[0]
-
-            @structure
-            class new_interfaces_typelist:
-                size_: c_uint32
-                list_: c_uint16 * interfaces_cnt
-
-            self.file.seek(offset)
-            interfaces_typelist_item = read_file_from_struct(self.file, new_interfaces_typelist)
+            interfaces_typelist_item = read_buffer_from_struct(self.data, offset, Dex_TypeList(interfaces_cnt))
 
             for i in range(interfaces_cnt):
                 interfaces_str = interfaces_str + self.dex_get_type(interfaces_typelist_item.list_[i])
                 if i + 1 < interfaces_cnt:
                     interfaces_str = interfaces_str + ","
 
-        # -------------------------
-        self.file.seek(org_pos)
         return interfaces_str
 
-    def __parse_classdef_item(self, classdef_item_tmp) -> str:
+    def __parse_classdef_item(self, idx) -> str:
+        classdef_item = self.dex_classdef_ids[idx]
+        access_str = self.__parse_access_flags("classes", classdef_item.access_flags)
+        class_str = self.dex_get_type(classdef_item.class_idx)
+        superclass_str = self.dex_get_type(classdef_item.superclass_idx)  # 父类好像是一定存在的...那么是0
+        interfaces_str = self.__parse_interfaces_off(classdef_item.interfaces_off)
+        source_file_str = self.dex_get_str(classdef_item.source_file_idx)
+
         out_str = ''
-        if len(classdef_item_tmp.access_flags.info) != 0:
-            out_str = out_str + classdef_item_tmp.access_flags.info + ' '
-        if len(classdef_item_tmp.class_idx.info) != 0:
-            out_str = out_str + classdef_item_tmp.class_idx.info + ' '
-        if len(classdef_item_tmp.superclass_idx.info) != 0:
-            out_str = out_str + "extends " + classdef_item_tmp.superclass_idx.info + ' '
-        if len(classdef_item_tmp.interfaces_off.info) != 0:
-            out_str = out_str + "implements " + classdef_item_tmp.interfaces_off.info + ' '
-        if len(classdef_item_tmp.source_file_idx.info) != 0:
-            out_str = out_str + "from " + classdef_item_tmp.source_file_idx.info
+        if len(access_str) != 0:
+            out_str = out_str + access_str + ' '
+        if len(class_str) != 0:
+            out_str = out_str + class_str + ' '
+        if len(superclass_str) != 0:
+            out_str = out_str + "extends " + superclass_str + ' '
+        if len(interfaces_str) != 0:
+            out_str = out_str + "implements " + interfaces_str + ' '
+        if len(source_file_str) != 0:
+            out_str = out_str + "from " + source_file_str
         return out_str
 
     def __parse_type_list_parameters_off(self, offset):
-        org_pos = self.file.tell()
-        # -------------------------
         if offset == 0:
             return None
         arg_cnt = struct.unpack('<L', self.data[offset: offset + 4])[0]
         if arg_cnt == 0:
             raise ValueError('[__parse_type_list_parameters_off] => arg_cnt == 0')
-
-        self.file.seek(offset)
-
-        @structure
-        class new_TypeList:
-            size_: c_uint32
-            list_: c_uint16 * arg_cnt  #不知道为什么是 list[int]类型,而不是list[uint16]
-
         info = "("
-        TypeListItem = read_file_from_struct(self.file, new_TypeList)
+        TypeListItem = read_buffer_from_struct(self.data, offset, Dex_TypeList(arg_cnt))
         for i in range(arg_cnt):
             info = info + self.dex_get_type(TypeListItem.list_[i])
             if i + 1 < arg_cnt:
                 info = info + ","
         info = info + ")"
-        new_TypeList.info = info
-        # -------------------------
-        self.file.seek(org_pos)
+        TypeListItem.info = info  # 结构体类是共用的, info 只能挂在实例上
         return TypeListItem
 
 
-    def __parse_annotations_off(self, offset):
-        if offset == 0:
-            return None
-        org_pos = self.file.tell()
-        self.file.seek(offset)
-        AnnotationsDirectory_Item_tmp = read_file_from_struct(self.file, Dex_AnnotationsDirectory_Item)
-
-        AnnotationsDirectory_Item_tmp.class_annotations_off.info = self.__parse_class_annotations_off(
-            AnnotationsDirectory_Item_tmp.class_annotations_off.value)
-
-        AnnotationsDirectory_Item_tmp.field_annotations = []
-        for i in range(AnnotationsDirectory_Item_tmp.annotated_fields_size.value):
-            FieldAnnotation_item = read_file_from_struct(self.file, Dex_FieldAnnotation)
-            AnnotationsDirectory_Item_tmp.field_annotations.append(
-                FieldAnnotation_item
-            )
-
-        AnnotationsDirectory_Item_tmp.method_annotations = []
-        for i in range(AnnotationsDirectory_Item_tmp.annotated_methods_size.value):
-            MethodAnnotation_item = read_file_from_struct(self.file, Dex_MethodAnnotation)
-            AnnotationsDirectory_Item_tmp.method_annotations.append(
-                MethodAnnotation_item
-            )
-
-        AnnotationsDirectory_Item_tmp.parameter_annotations = []
-        for i in range(AnnotationsDirectory_Item_tmp.annotated_parameters_size.value):
-            ParameterAnnotation_item = read_file_from_struct(self.file, Dex_ParameterAnnotation)
-            AnnotationsDirectory_Item_tmp.method_annotations.append(
-                ParameterAnnotation_item
-            )
-        self.file.seek(org_pos)
-        return AnnotationsDirectory_Item_tmp
-
     def __parse_class_data_fields(self,field_size,offset):
-        org_pos = self.file.tell()
         ret_list = []
+        # encoded_field 是 2 个 uleb128, 一次解出全部成员
+        values, ends = read_uleb128_spans(self.data, offset, field_size * 2)
+        diff = 0
         for i in range(field_size):
-            field_idx_diff, access_flags, size1, size2 = encoded_field(self.data, offset)
-            if i == 0:
-                diff = field_idx_diff
-            else:
-                diff += field_idx_diff
-
-            @structure
-            class new_class_data_field_item:
-                field_idx: c_byte * size1
-                access_flags: c_byte * size2
-
-            self.file.seek(offset)
-            class_data_field_item_tmp = read_file_from_struct(self.file, new_class_data_field_item)
+            diff += values[2 * i]
+            access_flags = values[2 * i + 1]
+            size1 = ends[2 * i] - offset
+            size2 = ends[2 * i + 1] - ends[2 * i]
+            class_data_field_item_tmp = read_buffer_from_struct(self.data, offset, Dex_EncodedField(size1, size2))
             class_data_field_item_tmp.field_idx.info = diff
             class_data_field_item_tmp.access_flags.info = access_flags
             class_data_field_item_tmp.info = self.__parse_access_flags("fields",class_data_field_item_tmp.access_flags.info) + " " + self.dex_get_field(class_data_field_item_tmp.field_idx.info)
 
             ret_list.append(class_data_field_item_tmp)
-            offset += (size1 + size2)
+            offset = ends[2 * i + 1]
 
-        self.file.seek(org_pos)
         return ret_list,offset
 
     def __parse_class_data_methods(self,method_size,offset):
-        org_pos = self.file.tell()
         ret_list = []
+        # encoded_method 是 3 个 uleb128, 一次解出全部成员
+        values, ends = read_uleb128_spans(self.data, offset, method_size * 3)
+        diff = 0
         for i in range(method_size):
-            method_idx_diff, access_flags, code_off, size1,size2,size3 = encoded_method(self.data, offset)
-            if i == 0:
-                diff = method_idx_diff
-            else:
-                diff += method_idx_diff
-
-            @structure
-            class new_class_data_method_item:
-                method_idx: c_byte * size1
-                access_flags: c_byte * size2
-                code_off: c_byte * size3
-
-            self.file.seek(offset)
-            class_data_method_item_tmp = read_file_from_struct(self.file, new_class_data_method_item)
+            diff += values[3 * i]
+            access_flags = values[3 * i + 1]
+            code_off = values[3 * i + 2]
+            size1 = ends[3 * i] - offset
+            size2 = ends[3 * i + 1] - ends[3 * i]
+            size3 = ends[3 * i + 2] - ends[3 * i + 1]
+            class_data_method_item_tmp = read_buffer_from_struct(self.data, offset,
+                                                                Dex_EncodedMethod(size1, size2, size3))
             class_data_method_item_tmp.method_idx.info = diff
             class_data_method_item_tmp.access_flags.info = access_flags
-            class_data_method_item_tmp.code_off.info = {
-                'value': code_off,
-                'info': None
-            }
-            class_data_method_item_tmp.code_off.info['info'] = self.__parse_code_item(class_data_method_item_tmp.code_off.info['value'])
+            class_data_method_item_tmp.code_off.info = code_off  # code_item 通过 .code 按需解析
             class_data_method_item_tmp.info = self.__parse_access_flags("methods", class_data_method_item_tmp.access_flags.info) +  " " +  self.dex_get_method(class_data_method_item_tmp.method_idx.info)
             ret_list.append(class_data_method_item_tmp)
-            offset += (size1 + size2 + size3)
-        self.file.seek(org_pos)
+            offset = ends[3 * i + 2]
         return ret_list,offset
 
     def __parse_class_data(self, offset):
         if offset == 0:
             return None
 
-        org_pos = self.file.tell()
-        # -------------------------
-
-        self.file.seek(offset)
-        static_field_size, sf_size = uleb128_value(self.data, offset)
-        offset += sf_size
-
-        instance_field_size, if_size = uleb128_value(self.data, offset)
-        offset += if_size
-
-        direct_method_size, dm_size = uleb128_value(self.data, offset)
-        offset += dm_size
-
-        virtual_method_size, vm_size = uleb128_value(self.data, offset)
-        offset += vm_size
-
-        @structure
-        class new_class_data_item:
-            static_fields_size : c_byte * sf_size
-            instance_fields_size : c_byte * if_size
-            direct_methods_size : c_byte * dm_size
-            virtual_methods_size : c_byte * vm_size
-
-        #self.file.seek(offset)
-        class_data_item_tmp = read_file_from_struct(self.file, new_class_data_item)
+        class_data_off = offset
+        sizes, ends = read_uleb128_spans(self.data, offset, 4)
+        static_field_size, instance_field_size, direct_method_size, virtual_method_size = sizes
+        sf_size = ends[0] - offset
+        if_size = ends[1] - ends[0]
+        dm_size = ends[2] - ends[1]
+        vm_size = ends[3] - ends[2]
+        offset = ends[3]
+        class_data_item_tmp = read_buffer_from_struct(self.data, class_data_off,
+                                                      Dex_ClassDataHeader(sf_size, if_size, dm_size, vm_size))
         class_data_item_tmp.static_fields_size.info = static_field_size
         class_data_item_tmp.instance_fields_size.info = instance_field_size
         class_data_item_tmp.direct_methods_size.info = direct_method_size
@@ -568,231 +637,126 @@ class Dexparser(QObject):  # 因为要发信号,所以得继承Qobject
         if virtual_method_size !=0:
             class_data_item_tmp.virtual_methods  ,offset = self.__parse_class_data_methods(virtual_method_size,offset)
 
-        # -------------------------
-        self.file.seek((org_pos))
         return class_data_item_tmp
 
-    def __parse_code_item(self, offset):
-        org_pos = self.file.tell()
-        self.file.seek(offset)
-        code_item_tmp = read_file_from_struct(self.file, Dex_CodeItem)
-        code_item_tmp.insns = self.file.read(code_item_tmp.insns_size.value)
-        self.file.seek((org_pos))
-        return code_item_tmp
-
-    def __parse_class_annotations_off(self, offset):
-        org_pos = self.file.tell()
-        self.file.seek(offset)
-        annotation_size = struct.unpack('<L', self.data[offset: offset + 4])[0]
-        if annotation_size == 0:
-            raise ValueError('annotation_size == 0')
-
-        @structure
-        class new_class_annotations_item:
-            size: c_uint32
-            entries: c_uint32 * annotation_size
-
-        class_annotations_item_tmp = read_file_from_struct(self.file, new_class_annotations_item)
-        #AnnotationsDirectory_Item_tmp = read_file_from_struct(self.file, Dex_AnnotationsDirectory_Item)
-
-        self.file.seek((org_pos))
-        return
-
-    def get_annotations(self, offset):
-        """Get annotation data from DEX file
+    def get_debug_info(self, offset):
+        """Get debug info (line table, parameter names and local variables) from 'debug_info_off' of a code item.
 
-        :param integer offset: annotation_off offset value
-        :returns: specific data of annotation
+        :param integer offset: debug_info_off offset value
+        :returns: specific data of debug info
 
         example:
             >>> dex = Dexparser(filedir='path/to/classes.dex')
-            >>> dex.get_annotations(offset=3022)
+            >>> dex.get_debug_info(offset=3022)
             {
-                'visibility': 3403,
-                'type_idx_diff': 3024,
-                'size_diff': 64,
-                'name_idx_diff': 30,
-                'value_type': 302,
-                'encoded_value': 7483
+                'line_start': 12,
+                'parameter_names': ['savedInstanceState'],
+                'positions': [(0, 12), (3, 13), (8, 14)],
+                'locals': [{'register': 0, 'name': 'this', 'type': 'com.example.MainActivity',
+                            'signature': None, 'start_address': 0, 'end_address': None}]
             }
         """
-        class_annotation_off = struct.unpack('<L', self.data[offset:offset + 4])[0]
-        class_annotation_size = struct.unpack('<L', self.data[class_annotation_off:class_annotation_off + 4])[0]
-        annotation_off_item = struct.unpack('<L', self.data[class_annotation_off + 4: class_annotation_off + 8])[0]
-        visibility = self.data[annotation_off_item: annotation_off_item + 1]
-        annotation = self.data[annotation_off_item + 1: annotation_off_item + 8]
-        annotation_data = encoded_annotation(self.data, annotation_off_item + 1)
-        type_idx_diff, size_diff, name_idx_diff, value_type, encoded_value = annotation_data
+        if offset == 0:
+            return None
+        line_start, offset = read_uleb128(self.data, offset)
+        parameters_size, offset = read_uleb128(self.data, offset)
+        parameter_idx, offset = read_uleb128p1_run(self.data, offset, parameters_size)
+
+        def index_str(idx):
+            return None if idx < 0 else self.dex_get_str(idx)
+
+        def index_type(idx):
+            return None if idx < 0 else self.dex_get_type(idx)
+
+        address = 0
+        line = line_start
+        positions = []
+        local_list = []
+        live_locals = {}  # register -> 当前的局部变量
+        while True:
+            opcode = self.data[offset]
+            offset += 1
+            if opcode == 0x00:  # DBG_END_SEQUENCE
+                break
+            elif opcode == 0x01:  # DBG_ADVANCE_PC
+                addr_diff, offset = read_uleb128(self.data, offset)
+                address += addr_diff
+            elif opcode == 0x02:  # DBG_ADVANCE_LINE
+                line_diff, offset = read_sleb128(self.data, offset)
+                line += line_diff
+            elif opcode == 0x03 or opcode == 0x04:  # DBG_START_LOCAL, DBG_START_LOCAL_EXTENDED
+                register, offset = read_uleb128(self.data, offset)
+                name_idx, offset = read_uleb128p1(self.data, offset)
+                type_idx, offset = read_uleb128p1(self.data, offset)
+                sig_idx = -1
+                if opcode == 0x04:
+                    sig_idx, offset = read_uleb128p1(self.data, offset)
+                if register in live_locals:
+                    live_locals[register]['end_address'] = address
+                local = {
+                    'register': register,
+                    'name': index_str(name_idx),
+                    'type': index_type(type_idx),
+                    'signature': index_str(sig_idx),
+                    'start_address': address,
+                    'end_address': None
+                }
+                live_locals[register] = local
+                local_list.append(local)
+            elif opcode == 0x05:  # DBG_END_LOCAL
+                register, offset = read_uleb128(self.data, offset)
+                if register in live_locals:
+                    live_locals[register]['end_address'] = address
+            elif opcode == 0x06:  # DBG_RESTART_LOCAL
+                register, offset = read_uleb128(self.data, offset)
+                if register in live_locals:
+                    local = dict(live_locals[register], start_address=address, end_address=None)
+                    live_locals[register] = local
+                    local_list.append(local)
+            elif opcode == 0x09:  # DBG_SET_FILE
+                _, offset = read_uleb128p1(self.data, offset)
+            elif opcode >= 0x0a:  # special opcode
+                adjusted_opcode = opcode - 0x0a
+                line += -4 + (adjusted_opcode % 15)
+                address += adjusted_opcode // 15
+                positions.append((address, line))
+            # 0x07 DBG_SET_PROLOGUE_END, 0x08 DBG_SET_EPILOGUE_BEGIN 没有参数
 
         return {
-            'visibility': ord(visibility),
-            'type_idx_diff': type_idx_diff,
-            'size_diff': size_diff,
-            'name_idx_diff': name_idx_diff,
-            'value_type': ord(value_type),
-            'encoded_value': ord(encoded_value)
+            'line_start': line_start,
+            'parameter_names': [index_str(idx) for idx in parameter_idx],
+            'positions': positions,
+            'locals': local_list
         }
 
+    def get_annotations(self, offset):
+        """Get the annotations directory at 'annotations_off' of a class_def.
+
+        :param integer offset: annotations_off offset value
+        :returns: AnnotationsDirectory, None when offset is 0
+
+        example:
+            >>> dex = Dexparser(filedir='path/to/classes.dex')
+            >>> directory = dex.get_annotations(offset=3022)
+            >>> directory.class_annotations()
+            (Annotation(visibility='system', type='Ldalvik/annotation/Signature;',
+                        elements={'value': ['Ljava/lang/Object;', 'Ljava/lang/Comparable<', ...]}),)
+            >>> directory.method_annotations()
+            {12: (Annotation(visibility='runtime', type='Ljava/lang/Deprecated;', elements={}),)}
+        """
+        return self.dex_annotations().directory(offset)
+
     def get_static_values(self, offset):
         """Get all static values parsed from 'static_values_off' classdef_data section.
 
         :param integer offset: static_values_off offset value
-        :returns: specific data of static values
+        :returns: values of the encoded_array_item, in the order of the static fields; [] when offset is 0
 
         example:
             >>> dex = Dexparser(filedir='path/to/classes.dex')
             >>> dex.get_static_values(offset=3022)
-            [b'android.annotation', 0.0, False, None]
+            ['android.annotation', 0.0, False, None]
         """
-        size, size_off = uleb128_value(self.data, offset)
-        offset += size_off
-        result = []
-
-        _strings = self.init_string_ids()
-
-        for _ in range(size):
-            value_arg = self.data[offset] >> 5
-            value_type = self.data[offset] & 0b11111
-            offset += 1
-
-            if value_type == 0x00 or \
-                    value_type == 0x02 or \
-                    value_type == 0x03 or \
-                    value_type == 0x04 or \
-                    value_type == 0x06 or \
-                    value_type == 0x18 or \
-                    value_type == 0x19 or \
-                    value_type == 0x1a or \
-                    value_type == 0x1b:
-                # VALUE_BYTE, VALUE_SHORT, VALUE_CHAR, VALUE_INT, VALUE_LONG, VALUE_TYPE
-                # VALUE_TYPE, VALUE_FIELD, VALUE_METHOD, VALUE_ENUM
-                value = 0
-                for i in range(value_arg + 1):
-                    value |= (self.data[offset] << 8 * i)
-                    offset += 1
-                result.append(value)
-
-            elif value_type == 0x10 or value_type == 0x11:  # VALUE_FLOAT, VALUE_DOUBLE
-                value = 0
-                for i in range(value_arg + 1):
-                    value |= (self.data[offset] << 8 * i)
-                    offset += 1
-                result.append(float(value))
-
-            elif value_type == 0x17:  # VALUE_STRING
-                string_off = 0
-                for i in range(value_arg + 1):
-                    string_off |= (self.data[offset] << 8 * i)
-                    offset += 1
-                result.append(_strings[string_off])
-
-            elif value_type == 0x1c:  # VALUE_ARRAY
-                result.append(self.get_static_values(offset))
-
-            elif value_type == 0x1d:  # VALUE_ANNOTATION
-                result.append(
-                    encoded_annotation(self.data, offset)
-                )
-
-            elif value_type == 0x1f:  # VALUE_BOOLEAN
-                result.append(bool(value_arg))
-
-            else:  # VALUE_NULL
-                result.append(None)
-
-        return result
-
-# apk fiels
-# class APKParser(object):
-#     """APK file format parser class
-#     :param string filedir: APK file path
-#     :param bytes fileobj: APK file object
-#     :param boolean deepscan: Scan all assets of APK file for detect adex file
-#     """
-#
-#     def __init__(self, filedir=None, fileobj=None, deepscan=False):
-#         if not filedir and not fileobj:
-#             raise InsufficientParameterError('fileobj or filedir parameter required.')
-#
-#         if filedir:
-#             if not os.path.isfile(filedir):  #检查给定的路径是否指向一个普通的文件
-#                 raise FileNotFoundError
-#
-#             if not is_zipfile(filedir):  #检查给定的路径是否指向一个zip文件
-#                 raise IsNotAPKFileFormatError("{} is not an APK file format.".format(filedir))
-#
-#             self.zfile = ZipFile(filedir)  #打开zip文件
-#
-#         if fileobj:
-#             if not is_zipfile(BytesIO(fileobj)):
-#                 raise IsNotAPKFileFormatError("Invalid APK file format.")
-#
-#             self.zfile = ZipFile(BytesIO(fileobj))
-#
-#         self.dexfiles = {}  #字典
-#
-#         if deepscan:
-#             for filename in self.zfile.namelist():
-#                 stream = self.zfile.read(filename)
-#                 if len(stream) < 8:
-#                     continue
-#
-#                 if stream[0:4] == "dex\x0a":
-#                     self.dexfiles[filename] = DEXParser(fileobj=stream)
-#
-#         else:
-#             for filename in self.zfile.namelist():
-#                 if filename.endswith(".dex"):
-#                     self.dexfiles[filename] = DEXParser(fileobj=self.zfile.read(filename))
-#
-#     @property
-#     def is_multidex(self):
-#         """Detect if APK is a multidex
-#         https://developer.android.com/studio/build/multidex
-#
-#         :returns: boolean
-#
-#         example:
-#             >>> APKParser(filedir='path/to/file.apk').is_multidex
-#             True
-#         """
-#         return len(self.dexfiles.keys()) > 1
-#
-#     def get_dex(self, filename="classes.dex"):
-#         """Get dex file with DEX parsed object
-#
-#         :params: name of dexfile (default: classes.dex)
-#         :returns: DEXParser object
-#
-#         example:
-#             >>> APKParser(filedir='path/to/file.apk').get_dex()
-#             True
-#         """
-#         return self.dexfiles[filename]
-#
-#     def get_all_dex_filenames(self):
-#         """Get all name of dex files
-#         :returns: list of dex filenames
-#
-#         example:
-#             >>> APKParser(filedir='path/to/file.apk').get_all_dex_filenames()
-#             ['classes.dex', 'classes1.dex']
-#         """
-#         return list(self.dexfiles.keys())
-#
-#
-# class AABParser(APKParser):
-#     """AAB (Android App Bundle) file format parser class
-#     :param string filedir: AAB file path
-#     :param bytes fileobj: AAB file object
-#     :param boolean deepscan: Scan all assets of AAB file for detect adex file
-#     """
-#     pass
-#
-#
-# class DEXParser(Dexparser):
-#     """DEX file format parser subclass
-#     :param string filedir: DEX file path
-#     :param bytes fileobj: DEX file object
-#     """
-#     pass
+        if offset == 0:
+            return []
+        return self.dex_values().read_array_item(offset)
@@ -0,0 +1,132 @@
+'''
+    注解的解码
+
+    annotations_directory_item -> annotation_set_ref_list / annotation_set_item -> annotation_item,
+    每一层都按偏移缓存: 很多类/方法共用同一个 annotation_item (例如 @Override 或者相同的 Signature),
+    同一个偏移只解码一次。目录只读取头部和三个 (下标, 偏移) 表, 具体的注解在访问时才解码。
+
+    directory = parser.dex_get_annotations(classdef_idx)
+    directory.class_annotations()       # -> (Annotation, ...)
+    directory.method_annotations()      # -> {method_idx: (Annotation, ...)}
+'''
+import struct
+from collections import namedtuple
+
+from packages.mm_type import read_buffer_from_struct, sizeof
+from packages.mm_type.mm_dextype import Dex_AnnotationsDirectory_Item, Dex_FieldAnnotation, Dex_MethodAnnotation, \
+    Dex_ParameterAnnotation
+from packages.mm_type.mm_table import StructTable
+
+VISIBILITY = {
+    0x00: 'build',
+    0x01: 'runtime',
+    0x02: 'system',
+}
+
+Annotation = namedtuple('Annotation', 'visibility type elements')
+Annotation.__doc__ = '''
+    annotation_item
+    visibility: build / runtime / system
+    type: 注解类型的描述符
+    elements: 元素名 -> 值, 值的表示见 encoded_value
+'''
+
+
+class AnnotationsDirectory:
+    '''
+        一个类的 annotations_directory_item, 各个 *_annotations() 在调用时才解码
+    '''
+
+    def __init__(self, decoder: "AnnotationDecoder", offset: int):
+        self.decoder = decoder
+        self.offset = offset
+        data = decoder.data
+        header = read_buffer_from_struct(data, offset, Dex_AnnotationsDirectory_Item)
+        self.class_annotations_off = header.class_annotations_off.value
+        offset += sizeof(Dex_AnnotationsDirectory_Item)
+        self.fields = StructTable(Dex_FieldAnnotation, data, offset, header.fields_size.value)
+        offset = self.fields.end_position
+        self.methods = StructTable(Dex_MethodAnnotation, data, offset, header.annotated_methods_size.value)
+        offset = self.methods.end_position
+        self.parameters = StructTable(Dex_ParameterAnnotation, data, offset, header.annotated_parameters_size.value)
+        self.end_position = self.parameters.end_position
+
+    def class_annotations(self) -> tuple:
+        return self.decoder.annotation_set(self.class_annotations_off)
+
+    def field_annotations(self) -> dict:
+        '''
+            field_idx -> (Annotation, ...)
+        '''
+        return {field_idx: self.decoder.annotation_set(off)
+                for field_idx, off in zip(self.fields.column('field_idx'), self.fields.column('annotations_off'))}
+
+    def method_annotations(self) -> dict:
+        '''
+            method_idx -> (Annotation, ...)
+        '''
+        return {method_idx: self.decoder.annotation_set(off)
+                for method_idx, off in zip(self.methods.column('method_idx'), self.methods.column('annotations_off'))}
+
+    def parameter_annotations(self) -> dict:
+        '''
+            method_idx -> 每个参数一个 (Annotation, ...)
+        '''
+        return {method_idx: self.decoder.annotation_set_ref_list(off)
+                for method_idx, off in zip(self.parameters.column('method_idx'),
+                                           self.parameters.column('annotations_off'))}
+
+
+class AnnotationDecoder:
+    '''
+        一个 dex 的注解解码器, 目录 / 注解集 / 注解都按偏移缓存
+    '''
+
+    def __init__(self, parser):
+        self.data = parser.data
+        self.values = parser.dex_values()
+        self.directories = {}
+        self.ref_lists = {}
+        self.sets = {}
+        self.items = {}
+
+    def directory(self, offset: int):
+        '''
+        :return: AnnotationsDirectory, offset 为 0 时返回 None
+        '''
+        if offset == 0:
+            return None
+        directory = self.directories.get(offset)
+        if directory is None:
+            directory = self.directories[offset] = AnnotationsDirectory(self, offset)
+        return directory
+
+    def annotation_set_ref_list(self, offset: int) -> tuple:
+        # 每一项是一个 annotation_set_item 的偏移, 0 表示这个参数没有注解
+        if offset == 0:
+            return ()
+        ref_list = self.ref_lists.get(offset)
+        if ref_list is None:
+            size = struct.unpack_from('<I', self.data, offset)[0]
+            ref_list = self.ref_lists[offset] = tuple(
+                self.annotation_set(off) for off in struct.unpack_from(f'<{size}I', self.data, offset + 4))
+        return ref_list
+
+    def annotation_set(self, offset: int) -> tuple:
+        if offset == 0:
+            return ()
+        annotation_set = self.sets.get(offset)
+        if annotation_set is None:
+            size = struct.unpack_from('<I', self.data, offset)[0]
+            annotation_set = self.sets[offset] = tuple(
+                self.annotation(off) for off in struct.unpack_from(f'<{size}I', self.data, offset + 4))
+        return annotation_set
+
+    def annotation(self, offset: int) -> Annotation:
+        annotation = self.items.get(offset)
+        if annotation is None:
+            visibility = self.data[offset]
+            encoded, _ = self.values.read_annotation(offset + 1)
+            annotation = self.items[offset] = Annotation(
+                VISIBILITY.get(visibility, visibility), encoded.type, encoded.elements)
+        return annotation
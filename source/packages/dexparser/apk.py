@@ -0,0 +1,212 @@
+'''
+    APK / AAB 容器解析
+
+    只读 zip 的中央目录, 列出其中的 classes*.dex。
+    未压缩 (stored) 的 dex 直接用 APK 的 mmap 切片交给 Dexparser, 不拷贝;
+    deflate 压缩的 dex 在第一次 get_dex 时才分块解压。
+
+    with APKParser('app.apk') as apk:
+        for name in apk.get_all_dex_filenames():
+            dex = apk.get_dex(name)
+'''
+import mmap
+import os
+import re
+import struct
+import zlib
+from zipfile import ZipFile, BadZipFile, is_zipfile, ZIP_STORED, ZIP_DEFLATED
+
+from packages.dexparser import Dexparser
+from packages.dexparser.errors import InsufficientParameterError, IsNotAPKFileFormatError
+
+DEX_MAGIC = b'dex\n'
+
+# local file header: 固定 30 字节, 文件名长度和 extra 长度在 26 处
+LOCAL_HEADER_SIZE = 30
+LOCAL_HEADER_LENGTHS = struct.Struct('<HH')
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+# 解压时每次喂给 zlib 的压缩数据大小
+INFLATE_CHUNK_SIZE = 0x100000
+
+
+def _dex_sort_key(name: str):
+    # classes.dex, classes2.dex, ..., classes10.dex 按数字排序
+    match = re.search(r'classes(\d*)\.dex$', name)
+    if match is None:
+        return name, 0
+    return name[:match.start()], int(match.group(1) or 1)
+
+
+class APKParser:
+    '''
+        APK 文件格式解析
+    :param filedir: APK 文件路径
+    :param fileobj: APK 的内容 (bytes-like)
+    :param deepscan: 按 magic 扫描所有条目找 dex (加固/插件里的 dex), 否则只看 classes*.dex
+    '''
+    DEX_ENTRY = re.compile(r'classes\d*\.dex')
+
+    def __init__(self, filedir=None, fileobj=None, deepscan=False):
+        if not filedir and fileobj is None:
+            raise InsufficientParameterError('fileobj or filedir parameter required.')
+
+        self.file = None
+        if filedir:
+            if not os.path.isfile(filedir):
+                raise FileNotFoundError
+            if not is_zipfile(filedir):
+                raise IsNotAPKFileFormatError("{} is not an APK file format.".format(filedir))
+            self.file = open(filedir, 'rb')
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = fileobj
+        self.view = memoryview(self.data)
+
+        try:
+            self.zfile = ZipFile(self.file if self.file else _BufferReader(self.view))
+        except BadZipFile:
+            raise IsNotAPKFileFormatError("Invalid APK file format.")
+
+        # 文件名 -> ZipInfo, 只是目录信息, 不读取内容
+        self.dex_entries = {}
+        for info in self.zfile.infolist():
+            if info.is_dir():
+                continue
+            if deepscan and info.file_size >= 0x70:
+                if self.read_entry_head(info, len(DEX_MAGIC)) == DEX_MAGIC:
+                    self.dex_entries[info.filename] = info
+            elif self.DEX_ENTRY.fullmatch(info.filename):
+                self.dex_entries[info.filename] = info
+        self.dex_entries = dict(sorted(self.dex_entries.items(), key=lambda item: _dex_sort_key(item[0])))
+        self.dexfiles = {}  # 文件名 -> 已经打开的 Dexparser
+
+    @property
+    def is_multidex(self) -> bool:
+        '''
+            https://developer.android.com/studio/build/multidex
+        '''
+        return len(self.dex_entries) > 1
+
+    def get_all_dex_filenames(self) -> list:
+        '''
+            >>> APKParser(filedir='path/to/file.apk').get_all_dex_filenames()
+            ['classes.dex', 'classes2.dex']
+        '''
+        return list(self.dex_entries)
+
+    def get_dex(self, filename=None, **kwargs) -> Dexparser:
+        '''
+            打开一个 dex, 第一次调用时才读取/解压; kwargs 传给 Dexparser (progress, load_tables 等)
+        :param filename: 默认是第一个 dex (classes.dex)
+        '''
+        if filename is None:
+            filename = next(iter(self.dex_entries))
+        if filename not in self.dexfiles:
+            self.dexfiles[filename] = Dexparser(fileobj=self.read_entry(self.dex_entries[filename]), **kwargs)
+        return self.dexfiles[filename]
+
+    def entry_data_offset(self, info) -> int:
+        '''
+            条目数据在 APK 中的偏移: 中央目录里的 extra 长度可能和 local header 的不一样, 要读 local header
+        '''
+        header = self.view[info.header_offset:info.header_offset + LOCAL_HEADER_SIZE]
+        if bytes(header[:4]) != LOCAL_HEADER_SIGNATURE:
+            raise BadZipFile("Bad local file header: {}".format(info.filename))
+        name_size, extra_size = LOCAL_HEADER_LENGTHS.unpack_from(header, 26)
+        return info.header_offset + LOCAL_HEADER_SIZE + name_size + extra_size
+
+    def read_entry(self, info):
+        '''
+            stored 的条目返回 APK 的 memoryview 切片 (不拷贝), deflate 的分块解压成 bytearray,
+            其它情况 (加密/别的压缩方式) 交给 zipfile
+        '''
+        if info.flag_bits & 0x1:
+            return self.zfile.read(info)
+        start = self.entry_data_offset(info)
+        raw = self.view[start:start + info.compress_size]
+        if info.compress_type == ZIP_STORED:
+            return raw
+        if info.compress_type == ZIP_DEFLATED:
+            return self.inflate(raw, info)
+        return self.zfile.read(info)
+
+    def read_entry_head(self, info, size: int) -> bytes:
+        '''
+            读取条目开头的 size 字节 (deflate 的只解压开头)
+        '''
+        if info.compress_type == ZIP_STORED and not info.flag_bits & 0x1:
+            start = self.entry_data_offset(info)
+            return bytes(self.view[start:start + size])
+        with self.zfile.open(info) as entry:
+            return entry.read(size)
+
+    @staticmethod
+    def inflate(raw, info) -> bytearray:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        out = bytearray()
+        crc = 0
+        for pos in range(0, len(raw), INFLATE_CHUNK_SIZE):
+            chunk = decompressor.decompress(raw[pos:pos + INFLATE_CHUNK_SIZE])
+            crc = zlib.crc32(chunk, crc)
+            out += chunk
+        chunk = decompressor.flush()
+        crc = zlib.crc32(chunk, crc)
+        out += chunk
+        if len(out) != info.file_size or crc != info.CRC:
+            raise BadZipFile("Bad CRC-32 for file {}".format(info.filename))
+        return out
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.dexfiles.clear()
+        self.zfile.close()
+        if self.file is not None:
+            try:
+                self.view.release()
+                self.data.close()
+            except BufferError:
+                pass  # 还有 Dexparser 在用 mmap 的切片, 交给 gc
+            self.file.close()
+
+
+class AABParser(APKParser):
+    '''
+        AAB (Android App Bundle) 文件格式解析, dex 在 <module>/dex/classes*.dex
+    '''
+    DEX_ENTRY = re.compile(r'[^/]+/dex/classes\d*\.dex')
+
+
+class _BufferReader:
+    '''
+        给 ZipFile 用的只读文件对象, 直接从 buffer 里读, 不像 BytesIO 那样先拷贝一份
+    '''
+
+    def __init__(self, view: memoryview):
+        self.view = view
+        self.pos = 0
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self.pos
+        elif whence == os.SEEK_END:
+            offset += len(self.view)
+        self.pos = max(0, offset)
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self.view) if size is None or size < 0 else min(self.pos + size, len(self.view))
+        data = bytes(self.view[self.pos:end])
+        self.pos = max(self.pos, end)
+        return data
@@ -0,0 +1,324 @@
+'''
+    批量扫描样本库
+
+    每个文件 (dex / apk / aab) 在工作进程里解析, 每个文件写一条记录到 JSON-lines 或 SQLite;
+    已经成功扫描过的文件再次运行时跳过 (崩溃后可以接着跑), 出错或超时的会重新扫描;
+    单个文件超时会杀掉工作进程并记为 timeout, 换一个新进程继续, 畸形样本不会卡住整个扫描。
+
+    sink = open_sink('corpus.jsonl')
+    stats = scan_corpus(collect_inputs(['samples/']), sink, workers=8, timeout=60)
+'''
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+from contextlib import closing
+from multiprocessing.connection import wait
+from zipfile import is_zipfile
+
+from packages.dexparser.multidex import iter_dex
+from packages.progress import Progress
+
+DEX_MAGIC = b'dex\n'
+ZIP_MAGIC = b'PK\x03\x04'
+DEFAULT_TIMEOUT = 60
+HASH_CHUNK_SIZE = 0x100000
+
+# 记录里的头部计数, 字段名 -> 记录里的键
+HEADER_COUNTS = {
+    'string_ids_size': 'strings',
+    'type_ids_size': 'types',
+    'proto_ids_size': 'protos',
+    'field_ids_size': 'fields',
+    'method_ids_size': 'methods',
+    'class_defs_size': 'classes',
+}
+
+
+def collect_inputs(paths, list_file: str = None) -> list:
+    '''
+        展开目录 (递归), 加上 list_file 里每行一个的路径, 只保留 dex magic 或 zip magic 开头的文件
+    :return: 去重后的绝对路径
+    '''
+    paths = list(paths)
+    if list_file:
+        with open(list_file, encoding='utf-8') as file:
+            paths += [line.strip() for line in file if line.strip()]
+
+    result = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    result.setdefault(os.path.abspath(os.path.join(root, name)), None)
+        elif os.path.isfile(path):
+            result.setdefault(os.path.abspath(path), None)
+    return [path for path in result if _magic(path) in (DEX_MAGIC, ZIP_MAGIC)]
+
+
+def _magic(path: str) -> bytes:
+    try:
+        with open(path, 'rb') as file:
+            return file.read(4)
+    except OSError:
+        return b''
+
+
+def file_sha256(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def dex_record(parser, name: str) -> dict:
+    header = parser.dex_header
+    record = {
+        'name': name,
+        'version': bytes(header.magic.value[4:7]).decode('ascii', errors='replace'),
+        'checksum': header.checksum.value,
+        'signature': bytes(header.signature.value).hex(),
+        'file_size': header.file_size.value,
+        'truncated': header.file_size.value > len(parser.data),
+    }
+    for field, key in HEADER_COUNTS.items():
+        record[key] = getattr(header, field).value
+    record['class_list'] = [
+        parser.dex_get_type_descriptor(class_idx) for class_idx in parser.dex_init_classdef_ids().column('class_idx')
+    ]
+    return record
+
+
+def scan_file(path: str) -> dict:
+    '''
+        解析一个样本, 生成一条记录
+    '''
+    start = time.perf_counter()
+    if is_zipfile(path):
+        kind = 'aab' if path.lower().endswith('.aab') else 'apk'
+    else:
+        kind = 'dex'
+    record = {'path': path, 'kind': kind, 'size': os.path.getsize(path), 'sha256': file_sha256(path), 'dex': []}
+    with closing(iter_dex(path, load_tables=False)) as dexes:
+        for source, parser in dexes:
+            record['dex'].append(dex_record(parser, source.entry or os.path.basename(path)))
+    record['elapsed'] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def _worker_loop(conn):
+    # 工作进程: 收到路径就解析, None 表示结束
+    while True:
+        path = conn.recv()
+        if path is None:
+            return
+        try:
+            record = scan_file(path)
+        except Exception as e:
+            record = {'path': path, 'error': f"{type(e).__name__}: {e}"}
+        conn.send(record)
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_loop, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.path = None
+        self.started = 0.0
+
+    def submit(self, path: str):
+        self.path = path
+        self.started = time.monotonic()
+        self.conn.send(path)
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class JsonLinesSink:
+    '''
+        每个文件一行 JSON, 追加写入, 每条都 flush
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+
+    def done_paths(self) -> set:
+        '''
+            成功扫描过的路径; 重新扫描会追加新的一行, 同一路径以最后一行为准
+        '''
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, encoding='utf-8', errors='replace') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                    path = record['path']
+                except (ValueError, KeyError, TypeError):
+                    continue  # 崩溃时写了一半的行
+                if 'error' in record:
+                    done.discard(path)
+                else:
+                    done.add(path)
+        return done
+
+    def open(self):
+        # 上次写了一半的行先结束掉, 不要和新记录连在一起
+        unterminated = False
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, 'rb') as file:
+                file.seek(-1, os.SEEK_END)
+                unterminated = file.read(1) != b'\n'
+        self.file = open(self.path, 'a', encoding='utf-8')
+        if unterminated:
+            self.file.write('\n')
+
+    def write(self, record: dict):
+        self.file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class SqliteSink:
+    '''
+        SQLite 表 records(path, sha256, error, record), record 是 JSON 文本; 每 commit_every 条提交一次
+    '''
+
+    def __init__(self, path: str, commit_every: int = 100):
+        self.path = path
+        self.commit_every = commit_every
+        self.db = None
+        self.uncommitted = 0
+
+    def _connect(self):
+        if self.db is None:
+            self.db = sqlite3.connect(self.path)
+            self.db.execute('CREATE TABLE IF NOT EXISTS records '
+                            '(path TEXT PRIMARY KEY, sha256 TEXT, error TEXT, record TEXT)')
+        return self.db
+
+    def done_paths(self) -> set:
+        # 出错/超时的记录不算完成, 重新扫描时被 INSERT OR REPLACE 覆盖
+        return {row[0] for row in self._connect().execute('SELECT path FROM records WHERE error IS NULL')}
+
+    def open(self):
+        self._connect()
+
+    def write(self, record: dict):
+        self.db.execute('INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)', (
+            record['path'], record.get('sha256'), record.get('error'),
+            json.dumps(record, ensure_ascii=False, separators=(',', ':'))))
+        self.uncommitted += 1
+        if self.uncommitted >= self.commit_every:
+            self.db.commit()
+            self.uncommitted = 0
+
+    def close(self):
+        if self.db is not None:
+            self.db.commit()
+            self.db.close()
+            self.db = None
+
+
+def open_sink(path: str):
+    '''
+        .db / .sqlite / .sqlite3 用 SQLite, 其它用 JSON-lines
+    '''
+    if path.lower().endswith(('.db', '.sqlite', '.sqlite3')):
+        return SqliteSink(path)
+    return JsonLinesSink(path)
+
+
+def scan_corpus(paths: list, sink, workers: int = None, timeout: float = DEFAULT_TIMEOUT, progress=None) -> dict:
+    '''
+        用 workers 个进程扫描 paths, 记录写入 sink; sink 里已经成功的路径跳过
+    :param timeout: 单个文件的秒数, 超时的工作进程被杀掉, 记录为 {'path', 'error': 'timeout'}
+    :return: {'total', 'skipped', 'scanned', 'errors'}
+    '''
+    done = sink.done_paths()
+    todo = [path for path in paths if path not in done]
+    stats = {'total': len(paths), 'skipped': len(paths) - len(todo), 'scanned': 0, 'errors': 0}
+    phase = Progress(progress).phase('scan', len(todo))
+    pending = iter(todo)
+    context = multiprocessing.get_context()
+
+    def feed(worker) -> bool:
+        path = next(pending, None)
+        if path is None:
+            worker.stop()
+            return False
+        worker.submit(path)
+        return True
+
+    def finish(record: dict):
+        sink.write(record)
+        stats['scanned'] += 1
+        stats['errors'] += 'error' in record
+        phase.update(stats['scanned'])
+
+    def replace(worker):
+        # 杀掉崩溃/超时的工作进程, 还有文件没扫时才换一个新的
+        worker.kill()
+        active.remove(worker)
+        path = next(pending, None)
+        if path is not None:
+            worker = _Worker(context)
+            worker.submit(path)
+            active.append(worker)
+
+    sink.open()
+    active = []
+    try:
+        for _ in range(min(workers or os.cpu_count() or 1, len(todo))):
+            worker = _Worker(context)
+            if feed(worker):
+                active.append(worker)
+
+        while active:
+            deadline = min(worker.started for worker in active) + timeout
+            ready = wait([worker.conn for worker in active], max(0.0, deadline - time.monotonic()))
+            now = time.monotonic()
+            for worker in list(active):
+                if worker.conn in ready:
+                    try:
+                        record = worker.conn.recv()
+                    except EOFError:
+                        # 工作进程自己崩了 (段错误 / 被系统杀掉)
+                        finish({'path': worker.path, 'error': 'worker exited'})
+                        replace(worker)
+                        continue
+                    finish(record)
+                    if not feed(worker):
+                        active.remove(worker)
+                elif now - worker.started >= timeout:
+                    finish({'path': worker.path, 'error': 'timeout'})
+                    replace(worker)
+    finally:
+        for worker in active:
+            worker.kill()
+        sink.close()
+    phase.finish()
+    return stats
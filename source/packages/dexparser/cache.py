@@ -0,0 +1,158 @@
+'''
+    解析结果的磁盘缓存
+
+    以 dex 头部的 signature + checksum + CACHE_VERSION 为键, 保存解码好的字符串和
+    type/proto/field/method/class_def 的显示文本。再次打开同一个 dex 时直接 mmap 缓存文件,
+    按下标切片取文本, 不再做 MUTF-8 解码和名字拼接。
+
+    文件格式 (小端):
+        header:  magic(8) version(u32) table_count(u32) signature(20) checksum(u32)
+        每个表:   name(16) count(u32) blob_size(u32)
+        每个表依次: offsets (count + 1 个 u32, 相对于该表 blob 的开头), blob (utf-8)
+'''
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+# 名字的生成方式变了 (例如 type2full) 就要加 1, 旧缓存自然失效
+CACHE_VERSION = 1
+CACHE_MAGIC = b'DVCACHE\x00'
+CACHE_SUFFIX = '.dvc'
+TABLES = ('strings', 'types', 'protos', 'fields', 'methods', 'classes')
+
+_HEADER = struct.Struct('<8sII20sI')
+_TABLE = struct.Struct('<16sII')
+
+
+def cache_key(signature: bytes, checksum: int) -> str:
+    return f"{bytes(signature).hex()}-{checksum:08x}-v{CACHE_VERSION}"
+
+
+def cache_path(cache_dir: str, signature: bytes, checksum: int) -> str:
+    return os.path.join(cache_dir, cache_key(signature, checksum) + CACHE_SUFFIX)
+
+
+class ParseCache:
+    '''
+        只读的缓存文件, get(表名, 下标) 返回文本
+    '''
+
+    def __init__(self, path: str, counts: dict = None):
+        '''
+        :param counts: 表名 -> dex 里对应 id 表的行数; 给出时缓存里必须有这些表且行数一致
+        :raise ValueError: 不是缓存文件, 或者文件被截断/损坏
+        '''
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.tables = {}  # 表名 -> (offsets, blob 在文件中的起点)
+        try:
+            self._read_tables(path, counts)
+        except Exception:
+            self.close()  # 不用的缓存马上解除映射, 否则之后 save_cache 在 Windows 上不能替换这个文件
+            raise
+
+    def _read_tables(self, path: str, counts: dict):
+        if len(self.data) < _HEADER.size:
+            raise ValueError(f"truncated cache: {path}")
+        magic, version, table_count, self.signature, self.checksum = _HEADER.unpack_from(self.data, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            raise ValueError(f"not a dex-viewer cache (version {CACHE_VERSION}): {path}")
+
+        entries = []
+        pos = _HEADER.size
+        if pos + table_count * _TABLE.size > len(self.data):
+            raise ValueError(f"truncated cache: {path}")
+        for _ in range(table_count):
+            name, count, blob_size = _TABLE.unpack_from(self.data, pos)
+            entries.append((name.rstrip(b'\x00').decode('ascii'), count, blob_size))
+            pos += _TABLE.size
+        for name, count, blob_size in entries:
+            # 截断或损坏的缓存不能用, 交给调用方重新解析
+            if pos + (count + 1) * 4 + blob_size > len(self.data):
+                raise ValueError(f"truncated cache: {path}")
+            offsets = memoryview(self.data)[pos:pos + (count + 1) * 4]
+            if sys.byteorder == 'little' and array('I').itemsize == 4:
+                offsets = offsets.cast('I')  # 直接用 mmap, 不拷贝
+            else:
+                offsets = struct.unpack(f'<{count + 1}I', offsets)
+            self.tables[name] = (offsets, pos + (count + 1) * 4)
+            if offsets[-1] > blob_size:
+                raise ValueError(f"corrupt cache table {name}: {path}")
+            pos += (count + 1) * 4 + blob_size
+
+        for name, count in (counts or {}).items():
+            if name not in self.tables or self.count(name) != count:
+                raise ValueError(f"cache table {name} does not match the dex: {path}")
+
+    def close(self):
+        # offsets 是 mmap 上的 memoryview, 先释放才能关闭 mmap
+        for offsets, _ in self.tables.values():
+            if isinstance(offsets, memoryview):
+                offsets.release()
+        self.tables = {}
+        self.data.close()
+
+    def __contains__(self, table: str) -> bool:
+        return table in self.tables
+
+    def count(self, table: str) -> int:
+        return len(self.tables[table][0]) - 1
+
+    def get(self, table: str, index: int) -> str:
+        offsets, base = self.tables[table]
+        return self.data[base + offsets[index]:base + offsets[index + 1]].decode('utf-8', errors='surrogatepass')
+
+
+def load_cache(cache_dir: str, signature: bytes, checksum: int, counts: dict = None):
+    '''
+        :param counts: 见 ParseCache
+        :return: ParseCache, 没有缓存或者缓存不可用 (截断/损坏/和 dex 对不上) 时为 None
+    '''
+    path = cache_path(cache_dir, signature, checksum)
+    if not os.path.isfile(path):
+        return None
+    try:
+        cache = ParseCache(path, counts)
+    except (ValueError, struct.error, OSError):
+        return None
+    if bytes(cache.signature) != bytes(signature) or cache.checksum != checksum:
+        cache.close()
+        return None
+    return cache
+
+
+def save_cache(cache_dir: str, signature: bytes, checksum: int, tables: dict) -> str:
+    '''
+        写缓存; 先写临时文件再改名, 其它进程不会读到写了一半的文件
+    :param tables: 表名 -> 文本列表
+    :return: 缓存文件路径
+    '''
+    os.makedirs(cache_dir, exist_ok=True)
+    parts = []
+    directory = []
+    for name, texts in tables.items():
+        encoded = [text.encode('utf-8', errors='surrogatepass') for text in texts]
+        offsets = [0]
+        total = 0
+        for raw in encoded:
+            total += len(raw)
+            offsets.append(total)
+        directory.append(_TABLE.pack(name.encode('ascii'), len(texts), total))
+        parts += [struct.pack(f'<{len(offsets)}I', *offsets), b''.join(encoded)]
+
+    path = cache_path(cache_dir, signature, checksum)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=CACHE_SUFFIX + '.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(directory), bytes(signature), checksum))
+            file.writelines(directory)
+            file.writelines(parts)
+        os.chmod(tmp_path, 0o644)  # mkstemp 建的文件只有自己能读
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
@@ -1,3 +1,7 @@
+from collections import namedtuple
+
+from packages.log import LOG
+
 opcode = {
     0x00: 'nop',
     0x01: 'move',
@@ -27,7 +31,7 @@ opcode = {
     0x18: 'const-wide',
     0x19: 'const-wide/high16',
     0x1A: 'const-string',
-    0x1B: 'const-string-jumbo',
+    0x1B: 'const-string/jumbo',
     0x1C: 'const-class',
     0x1D: 'monitor-enter',
     0x1E: 'monitor-exit',
@@ -38,7 +42,7 @@ opcode = {
     0x22: 'new-instance',
     0x23: 'new-array',
     0x24: 'filled-new-array',
-    0x25: 'filled-new-array-range',
+    0x25: 'filled-new-array/range',
     0x26: 'fill-array-data',
     0x27: 'throw',
     0x28: 'goto',
@@ -126,11 +130,11 @@ opcode = {
     0x75: 'invoke-super/range',
     0x76: 'invoke-direct/range',
     0x77: 'invoke-static/range',
-    0x78: 'invoke-interface-range',
+    0x78: 'invoke-interface/range',
     0x79: 'unused',
     0x7A: 'unused',
     0x7B: 'neg-int',
-    0x7C: 'not-long',
+    0x7C: 'not-int',
     0x7D: 'neg-long',
     0x7E: 'not-long',
     0x7F: 'neg-float',
@@ -251,25 +255,25 @@ opcode = {
     0xEB: 'unused',
     0xEC: 'unused',
     0xED: 'unused',
-    0xEE: 'execute-inline',
+    0xEE: 'unused',
     0xEF: 'unused',
 
-    0xF0: 'invoke-direct-empty',
+    0xF0: 'unused',
     0xF1: 'unused',
-    0xF2: 'iget-quick',
-    0xF3: 'iget-wide-quick',
-    0xF4: 'iget-object-quick',
-    0xF5: 'iput-quick',
-    0xF6: 'iput-wide-quick',
-    0xF7: 'iput-object-quick',
-    0xF8: 'invoke-virtual-quick',
-    0xF9: 'invoke-virtual-quick/range',
-    0xFA: 'invoke-super-quick',
-    0xFB: 'invoke-super-quick/range',
-    0xFC: 'unused',
-    0xFD: 'unused',
-    0xFE: 'unused',
-    0xFF: 'unused'
+    0xF2: 'unused',
+    0xF3: 'unused',
+    0xF4: 'unused',
+    0xF5: 'unused',
+    0xF6: 'unused',
+    0xF7: 'unused',
+    0xF8: 'unused',
+    0xF9: 'unused',
+    0xFA: 'invoke-polymorphic',
+    0xFB: 'invoke-polymorphic/range',
+    0xFC: 'invoke-custom',
+    0xFD: 'invoke-custom/range',
+    0xFE: 'const-method-handle',
+    0xFF: 'const-method-type'
 }
 
 # type code list
@@ -429,3 +433,345 @@ value_types = {
     0x1e: 'VALUE_NULL',
     0x1f: 'VALUE_BOOLEAN'
 }
+
+
+# ---------------------------------------------------------------------------
+# 指令解码
+# 每个 opcode 对应一种指令格式 (见 Dalvik 字节码格式文档), 格式决定指令长度(16位码元)
+# 和操作数的排布; 带索引的指令再按 INDEX_KIND 通过 Dexparser 的 dex_get_* 解析成文本
+# ---------------------------------------------------------------------------
+PACKED_SWITCH_PAYLOAD = 0x0100
+SPARSE_SWITCH_PAYLOAD = 0x0200
+FILL_ARRAY_DATA_PAYLOAD = 0x0300
+
+payload_names = {
+    PACKED_SWITCH_PAYLOAD: 'packed-switch-payload',
+    SPARSE_SWITCH_PAYLOAD: 'sparse-switch-payload',
+    FILL_ARRAY_DATA_PAYLOAD: 'fill-array-data-payload',
+}
+
+
+def _opcode_table(default, *ranges):
+    table = [default] * 256
+    for first, last, value in ranges:
+        for op in range(first, last + 1):
+            table[op] = value
+    return table
+
+
+# opcode -> 指令格式
+FORMAT = _opcode_table(
+    '10x',
+    (0x01, 0x01, '12x'), (0x02, 0x02, '22x'), (0x03, 0x03, '32x'),
+    (0x04, 0x04, '12x'), (0x05, 0x05, '22x'), (0x06, 0x06, '32x'),
+    (0x07, 0x07, '12x'), (0x08, 0x08, '22x'), (0x09, 0x09, '32x'),
+    (0x0A, 0x0D, '11x'), (0x0F, 0x11, '11x'),
+    (0x12, 0x12, '11n'), (0x13, 0x13, '21s'), (0x14, 0x14, '31i'), (0x15, 0x15, '21h'),
+    (0x16, 0x16, '21s'), (0x17, 0x17, '31i'), (0x18, 0x18, '51l'), (0x19, 0x19, '21h'),
+    (0x1A, 0x1A, '21c'), (0x1B, 0x1B, '31c'), (0x1C, 0x1C, '21c'),
+    (0x1D, 0x1E, '11x'), (0x1F, 0x1F, '21c'), (0x20, 0x20, '22c'), (0x21, 0x21, '12x'),
+    (0x22, 0x22, '21c'), (0x23, 0x23, '22c'), (0x24, 0x24, '35c'), (0x25, 0x25, '3rc'),
+    (0x26, 0x26, '31t'), (0x27, 0x27, '11x'),
+    (0x28, 0x28, '10t'), (0x29, 0x29, '20t'), (0x2A, 0x2A, '30t'), (0x2B, 0x2C, '31t'),
+    (0x2D, 0x31, '23x'), (0x32, 0x37, '22t'), (0x38, 0x3D, '21t'),
+    (0x44, 0x51, '23x'), (0x52, 0x5F, '22c'), (0x60, 0x6D, '21c'),
+    (0x6E, 0x72, '35c'), (0x74, 0x78, '3rc'),
+    (0x7B, 0x8F, '12x'), (0x90, 0xAF, '23x'), (0xB0, 0xCF, '12x'),
+    (0xD0, 0xD7, '22s'), (0xD8, 0xE2, '22b'),
+    (0xFA, 0xFA, '45cc'), (0xFB, 0xFB, '4rcc'), (0xFC, 0xFC, '35c'), (0xFD, 0xFD, '3rc'),
+    (0xFE, 0xFF, '21c'),
+)
+
+# opcode -> 索引指向的区段, None 表示没有索引操作数
+INDEX_KIND = _opcode_table(
+    None,
+    (0x1A, 0x1B, 'string'), (0x1C, 0x1C, 'type'), (0x1F, 0x20, 'type'),
+    (0x22, 0x25, 'type'), (0x52, 0x6D, 'field'), (0x6E, 0x78, 'method'),
+    (0xFA, 0xFB, 'method'), (0xFC, 0xFD, 'call_site'),
+    (0xFE, 0xFE, 'method_handle'), (0xFF, 0xFF, 'proto'),
+)
+
+def _s4(value):
+    return value - 0x10 if value & 0x8 else value
+
+
+def _s8(value):
+    return value - 0x100 if value & 0x80 else value
+
+
+def _s16(value):
+    return value - 0x10000 if value & 0x8000 else value
+
+
+def _s32(value):
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+# 各格式的解码函数: (insns, pc, 第一个码元) -> 操作数 tuple
+# 寄存器/字面量/跳转目标(绝对码元偏移)/索引按格式中出现的顺序排列
+def _decode_10x(insns, pc, unit):
+    return ()
+
+
+def _decode_12x(insns, pc, unit):
+    return (unit >> 8) & 0xF, unit >> 12
+
+
+def _decode_11n(insns, pc, unit):
+    return (unit >> 8) & 0xF, _s4(unit >> 12)
+
+
+def _decode_11x(insns, pc, unit):
+    return unit >> 8,
+
+
+def _decode_10t(insns, pc, unit):
+    return pc + _s8(unit >> 8),
+
+
+def _decode_20t(insns, pc, unit):
+    return pc + _s16(insns[pc + 1]),
+
+
+def _decode_22x(insns, pc, unit):
+    return unit >> 8, insns[pc + 1]
+
+
+def _decode_21t(insns, pc, unit):
+    return unit >> 8, pc + _s16(insns[pc + 1])
+
+
+def _decode_21s(insns, pc, unit):
+    return unit >> 8, _s16(insns[pc + 1])
+
+
+def _decode_21h(insns, pc, unit):
+    # const/high16 移到高16位, const-wide/high16 移到高16位(64位)
+    shift = 48 if unit & 0xFF == 0x19 else 16
+    return unit >> 8, _s16(insns[pc + 1]) << shift
+
+
+def _decode_21c(insns, pc, unit):
+    return unit >> 8, insns[pc + 1]
+
+
+def _decode_23x(insns, pc, unit):
+    second = insns[pc + 1]
+    return unit >> 8, second & 0xFF, second >> 8
+
+
+def _decode_22b(insns, pc, unit):
+    second = insns[pc + 1]
+    return unit >> 8, second & 0xFF, _s8(second >> 8)
+
+
+def _decode_22t(insns, pc, unit):
+    return (unit >> 8) & 0xF, unit >> 12, pc + _s16(insns[pc + 1])
+
+
+def _decode_22s(insns, pc, unit):
+    return (unit >> 8) & 0xF, unit >> 12, _s16(insns[pc + 1])
+
+
+def _decode_22c(insns, pc, unit):
+    return (unit >> 8) & 0xF, unit >> 12, insns[pc + 1]
+
+
+def _decode_30t(insns, pc, unit):
+    return pc + _s32(insns[pc + 1] | insns[pc + 2] << 16),
+
+
+def _decode_32x(insns, pc, unit):
+    return insns[pc + 1], insns[pc + 2]
+
+
+def _decode_31i(insns, pc, unit):
+    # const 和 const-wide/32 都是符号扩展的32位字面量
+    return unit >> 8, _s32(insns[pc + 1] | insns[pc + 2] << 16)
+
+
+def _decode_31t(insns, pc, unit):
+    return unit >> 8, pc + _s32(insns[pc + 1] | insns[pc + 2] << 16)
+
+
+def _decode_31c(insns, pc, unit):
+    return unit >> 8, insns[pc + 1] | insns[pc + 2] << 16
+
+
+def _decode_35c(insns, pc, unit):
+    count = unit >> 12
+    regs = insns[pc + 2]
+    args = ((regs & 0xF, (regs >> 4) & 0xF, (regs >> 8) & 0xF, regs >> 12, (unit >> 8) & 0xF)[:count])
+    return args + (insns[pc + 1],)
+
+
+def _decode_3rc(insns, pc, unit):
+    first = insns[pc + 2]
+    return tuple(range(first, first + (unit >> 8))) + (insns[pc + 1],)
+
+
+def _decode_45cc(insns, pc, unit):
+    return _decode_35c(insns, pc, unit) + (insns[pc + 3],)
+
+
+def _decode_4rcc(insns, pc, unit):
+    return _decode_3rc(insns, pc, unit) + (insns[pc + 3],)
+
+
+def _decode_51l(insns, pc, unit):
+    value = insns[pc + 1] | insns[pc + 2] << 16 | insns[pc + 3] << 32 | insns[pc + 4] << 48
+    if value & 0x8000000000000000:
+        value -= 0x10000000000000000
+    return unit >> 8, value
+
+
+# 格式 -> (长度(码元), 解码函数)
+FORMAT_INFO = {
+    '10x': (1, _decode_10x), '12x': (1, _decode_12x), '11n': (1, _decode_11n),
+    '11x': (1, _decode_11x), '10t': (1, _decode_10t),
+    '20t': (2, _decode_20t), '22x': (2, _decode_22x), '21t': (2, _decode_21t),
+    '21s': (2, _decode_21s), '21h': (2, _decode_21h), '21c': (2, _decode_21c),
+    '23x': (2, _decode_23x), '22b': (2, _decode_22b), '22t': (2, _decode_22t),
+    '22s': (2, _decode_22s), '22c': (2, _decode_22c),
+    '30t': (3, _decode_30t), '32x': (3, _decode_32x), '31i': (3, _decode_31i),
+    '31t': (3, _decode_31t), '31c': (3, _decode_31c), '35c': (3, _decode_35c),
+    '3rc': (3, _decode_3rc),
+    '45cc': (4, _decode_45cc), '4rcc': (4, _decode_4rcc),
+    '51l': (5, _decode_51l),
+}
+
+# opcode -> (长度, 解码函数), 解码时直接下标取, 不再查格式
+_DISPATCH = [FORMAT_INFO[fmt] for fmt in FORMAT]
+
+
+class Instruction(namedtuple('Instruction', 'offset opcode size args ref')):
+    '''
+        一条指令:
+        offset: 在 insns 中的偏移(码元), size: 长度(码元)
+        args: 按格式排列的寄存器/字面量/跳转目标/索引
+        ref: 索引操作数解析出的文本 (没有索引或没有传 parser 时为 None)
+        payload 伪指令的 opcode 是 0x0100/0x0200/0x0300
+    '''
+    __slots__ = ()
+
+    @property
+    def name(self) -> str:
+        if self.opcode > 0xFF:
+            return payload_names[self.opcode]
+        return opcode[self.opcode]
+
+    @property
+    def format(self) -> str:
+        if self.opcode > 0xFF:
+            return 'payload'
+        return FORMAT[self.opcode]
+
+    @property
+    def index(self):
+        '''
+            索引操作数 (45cc/4rcc 取方法索引), 没有则为 None
+        '''
+        if self.opcode > 0xFF or INDEX_KIND[self.opcode] is None:
+            return None
+        return self.args[-2] if self.format in ('45cc', '4rcc') else self.args[-1]
+
+    def __str__(self):
+        return f"{self.offset:04x}: {self.name} {_render(self)}".rstrip()
+
+
+def _render(insn: Instruction) -> str:
+    fmt = insn.format
+    args = insn.args
+    if fmt == 'payload':
+        return ', '.join(str(arg) for arg in args)
+    kind = INDEX_KIND[insn.opcode]
+    ref = insn.ref if insn.ref is not None else f"{kind}@{insn.index}" if kind else None
+    if fmt in ('35c', '3rc'):
+        return '{' + ', '.join(f"v{reg}" for reg in args[:-1]) + '}, ' + ref
+    if fmt in ('45cc', '4rcc'):
+        return '{' + ', '.join(f"v{reg}" for reg in args[:-2]) + '}, ' + ref + f", proto@{args[-1]}"
+    parts = []
+    for i, arg in enumerate(args):
+        if kind and i == len(args) - 1:
+            parts.append(ref)
+        elif fmt[-1] == 't' and i == len(args) - 1:
+            parts.append(f":{arg:04x}")
+        elif fmt[-1] in 'nsihbl' and i == len(args) - 1:
+            parts.append(f"#{arg}")
+        else:
+            parts.append(f"v{arg}")
+    return ', '.join(parts)
+
+
+def _payload(insns, pc, ident):
+    '''
+        switch / fill-array-data 的数据块, 返回 (长度, 参数)
+        packed-switch: (first_key, 相对 switch 指令的目标...)
+        sparse-switch: (key..., 目标...)
+        fill-array-data: (element_width, size)
+    '''
+    if ident == PACKED_SWITCH_PAYLOAD:
+        size = insns[pc + 1]
+        first_key = _s32(insns[pc + 2] | insns[pc + 3] << 16)
+        targets = tuple(_s32(insns[pc + 4 + 2 * i] | insns[pc + 5 + 2 * i] << 16) for i in range(size))
+        return size * 2 + 4, (first_key,) + targets
+    if ident == SPARSE_SWITCH_PAYLOAD:
+        size = insns[pc + 1]
+        values = tuple(_s32(insns[pc + 2 + 2 * i] | insns[pc + 3 + 2 * i] << 16) for i in range(size * 2))
+        return size * 4 + 2, values
+    element_width = insns[pc + 1]
+    size = insns[pc + 2] | insns[pc + 3] << 16
+    return (size * element_width + 1) // 2 + 4, (element_width, size)
+
+
+def _resolvers(parser):
+    if parser is None:
+        return {}
+    return {
+        'string': parser.dex_get_str,
+        'type': parser.dex_get_type,
+        'field': parser.dex_get_field,
+        'method': parser.dex_get_method,
+        'proto': parser.dex_get_proto,
+    }
+
+
+def iter_instructions(insns, parser=None):
+    '''
+        逐条解码 insns (16位码元序列, 例如 code_item.insns)
+    :param parser: Dexparser, 传入时索引操作数会解析成文本放在 ref 里
+    '''
+    resolvers = _resolvers(parser)
+    dispatch = _DISPATCH
+    index_kind = INDEX_KIND
+    make = Instruction._make
+    end = len(insns)
+    pc = 0
+    try:
+        while pc < end:
+            unit = insns[pc]
+            op = unit & 0xFF
+            if op == 0 and unit in payload_names:
+                size, args = _payload(insns, pc, unit)
+                yield make((pc, unit, size, args, None))
+                pc += size
+                continue
+            size, decode = dispatch[op]
+            args = decode(insns, pc, unit)
+            ref = None
+            kind = index_kind[op]
+            if kind is not None:
+                resolve = resolvers.get(kind)
+                if resolve is not None:
+                    ref = resolve(args[-2] if op in (0xFA, 0xFB) else args[-1])
+            yield make((pc, op, size, args, ref))
+            pc += size
+    except IndexError:
+        LOG.log_error(tag="disassemble", msg=f"truncated instruction at {pc:#x}")
+
+
+def disassemble(insns, parser=None) -> list:
+    '''
+        解码整段 insns, 返回 Instruction 列表
+    '''
+    return list(iter_instructions(insns, parser))
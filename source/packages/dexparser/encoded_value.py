@@ -0,0 +1,175 @@
+'''
+    encoded_value / encoded_array / encoded_annotation 的解码
+
+    值的表示:
+        byte/short/char/int/long -> int (有符号的做符号扩展), float/double -> float,
+        string -> str, boolean -> bool, null -> None, array -> list,
+        annotation -> EncodedAnnotation, type/field/method/enum/method_type/method_handle -> Ref
+'''
+import struct
+from collections import namedtuple
+
+from packages.dexparser.leb128 import read_uleb128
+
+VALUE_BYTE = 0x00
+VALUE_SHORT = 0x02
+VALUE_CHAR = 0x03
+VALUE_INT = 0x04
+VALUE_LONG = 0x06
+VALUE_FLOAT = 0x10
+VALUE_DOUBLE = 0x11
+VALUE_METHOD_TYPE = 0x15
+VALUE_METHOD_HANDLE = 0x16
+VALUE_STRING = 0x17
+VALUE_TYPE = 0x18
+VALUE_FIELD = 0x19
+VALUE_METHOD = 0x1a
+VALUE_ENUM = 0x1b
+VALUE_ARRAY = 0x1c
+VALUE_ANNOTATION = 0x1d
+VALUE_NULL = 0x1e
+VALUE_BOOLEAN = 0x1f
+
+SIGNED_TYPES = (VALUE_BYTE, VALUE_SHORT, VALUE_INT, VALUE_LONG)
+# 索引类的值 -> Ref.kind
+REF_KINDS = {
+    VALUE_METHOD_TYPE: 'method_type',
+    VALUE_METHOD_HANDLE: 'method_handle',
+    VALUE_TYPE: 'type',
+    VALUE_FIELD: 'field',
+    VALUE_METHOD: 'method',
+    VALUE_ENUM: 'enum',
+}
+
+Ref = namedtuple('Ref', 'kind index name')
+Ref.__doc__ = '''
+    对 type/field/method 等的引用, name 是解析出来的文本 (type 为描述符, method_handle 为 None)
+'''
+
+EncodedAnnotation = namedtuple('EncodedAnnotation', 'type elements')
+EncodedAnnotation.__doc__ = '''
+    type: 注解类型的描述符, 例如 Ldalvik/annotation/Signature;
+    elements: 元素名 -> 值 (按 dex 里的顺序)
+'''
+
+
+class ValueReader:
+    '''
+        按偏移解码, 索引通过 parser 解析成文本; read_* 返回 (值, 结束偏移)
+        数组和注解用显式的栈展开, 嵌套再深也不会碰到递归深度的限制
+    '''
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.data = parser.data
+        self.arrays = {}  # encoded_array_item 的偏移 -> 值列表, 多个类共用的 static_values 只解码一次
+
+    def read_value(self, offset: int):
+        return self._read(offset, None)
+
+    def read_array(self, offset: int):
+        return self._read(offset, VALUE_ARRAY)
+
+    def read_annotation(self, offset: int):
+        return self._read(offset, VALUE_ANNOTATION)
+
+    def read_array_item(self, offset: int) -> list:
+        '''
+            encoded_array_item (例如 static_values_off), 按偏移缓存; 返回的列表是共用的, 不要修改
+        '''
+        values = self.arrays.get(offset)
+        if values is None:
+            values = self.arrays[offset] = self.read_array(offset)[0]
+        return values
+
+    def _read(self, offset: int, start_type):
+        data = self.data
+        parser = self.parser
+        # 每一层未完成的数组/注解: [列表或 EncodedAnnotation, 还差几个值, 当前元素名]
+        stack = []
+        value_type = start_type
+        while True:
+            if value_type is None:
+                value_arg = data[offset] >> 5
+                value_type = data[offset] & 0x1F
+                offset += 1
+            else:
+                value_arg = 0  # 数组/注解本身作为起点时没有头部字节
+            size = value_arg + 1
+
+            opened = False
+            if value_type in SIGNED_TYPES:
+                value = int.from_bytes(data[offset:offset + size], 'little', signed=True)
+                offset += size
+            elif value_type == VALUE_CHAR:
+                value = int.from_bytes(data[offset:offset + size], 'little')
+                offset += size
+            elif value_type == VALUE_FLOAT:
+                # 只存了高位的字节, 低位补 0
+                bits = int.from_bytes(data[offset:offset + size], 'little') << 8 * (4 - size)
+                value = struct.unpack('<f', bits.to_bytes(4, 'little'))[0]
+                offset += size
+            elif value_type == VALUE_DOUBLE:
+                bits = int.from_bytes(data[offset:offset + size], 'little') << 8 * (8 - size)
+                value = struct.unpack('<d', bits.to_bytes(8, 'little'))[0]
+                offset += size
+            elif value_type == VALUE_STRING:
+                value = parser.dex_get_str(int.from_bytes(data[offset:offset + size], 'little'))
+                offset += size
+            elif value_type in REF_KINDS:
+                value = self.ref(value_type, int.from_bytes(data[offset:offset + size], 'little'))
+                offset += size
+            elif value_type == VALUE_ARRAY:
+                count, offset = read_uleb128(data, offset)
+                stack.append([[], count, None])
+                opened = True
+            elif value_type == VALUE_ANNOTATION:
+                type_idx, offset = read_uleb128(data, offset)
+                count, offset = read_uleb128(data, offset)
+                stack.append([EncodedAnnotation(parser.dex_get_type_descriptor(type_idx), {}), count, None])
+                opened = True
+            elif value_type == VALUE_NULL:
+                value = None
+            elif value_type == VALUE_BOOLEAN:
+                value = bool(value_arg)
+            else:
+                raise ValueError(f"bad encoded_value type 0x{value_type:02x} at 0x{offset - 1:x}")
+            value_type = None
+
+            # 把完成的值交给上一层, 上一层收满了就也算完成, 继续往上交
+            while True:
+                if opened:
+                    if stack[-1][1] > 0:
+                        break  # 还要读它的成员
+                    value = stack.pop()[0]
+                    opened = False
+                if not stack:
+                    return value, offset
+                frame = stack[-1]
+                if type(frame[0]) is list:
+                    frame[0].append(value)
+                else:
+                    frame[0].elements[frame[2]] = value
+                frame[1] -= 1
+                if frame[1] > 0:
+                    break
+                opened = True
+
+            frame = stack[-1]
+            if type(frame[0]) is not list:  # 注解的成员先是名字, 再是值
+                name_idx, offset = read_uleb128(data, offset)
+                frame[2] = parser.dex_get_str(name_idx)
+
+    def ref(self, value_type: int, index: int) -> Ref:
+        parser = self.parser
+        if value_type == VALUE_TYPE:
+            name = parser.dex_get_type_descriptor(index)
+        elif value_type in (VALUE_FIELD, VALUE_ENUM):
+            name = parser.dex_get_field(index)
+        elif value_type == VALUE_METHOD:
+            name = parser.dex_get_method(index)
+        elif value_type == VALUE_METHOD_TYPE:
+            name = parser.dex_get_proto(index)
+        else:
+            name = None  # method_handles 区段没有解析
+        return Ref(REF_KINDS[value_type], index, name)
@@ -0,0 +1,263 @@
+'''
+    类继承关系
+
+    节点是类型描述符 (Ljava/lang/Object;), 编号是整数; dex 里引用到但没有定义的类 (系统类) 也是节点。
+    建立时一次算好:
+        - 父类森林的先序编号 pre/post: X 的所有子类就是 order[pre[X] + 1:post[X]], 一次切片
+        - 每个类实现的全部接口 (包括父类和父接口带来的), 按接口倒过来排成 CSR 就是实现者列表
+    多个 dex 合并时按描述符对齐, 同一个类定义了多次以先加入的为准 (和类加载器的顺序一致)。
+
+    hierarchy = parser.dex_class_hierarchy()
+    hierarchy.names(hierarchy.subclasses('Landroid/app/Activity;'))
+    hierarchy.names(hierarchy.implementers('Ljava/lang/Runnable;'))
+'''
+import struct
+from array import array
+from bisect import bisect_left
+
+from packages.dexparser.xref import CSR, INDEX_TYPECODE
+
+ACC_INTERFACE = 0x200
+
+
+def class_rows(parser) -> list:
+    '''
+        class_defs 的继承信息: [(描述符, 父类描述符或 None, 接口描述符 tuple, access_flags)]
+    '''
+    classdefs = parser.dex_init_classdef_ids()
+    type_count = len(parser.dex_init_type_ids())
+    data = parser.data
+    rows = []
+    for class_idx, superclass_idx, interfaces_off, access_flags in zip(
+            classdefs.column('class_idx'), classdefs.column('superclass_idx'),
+            classdefs.column('interfaces_off'), classdefs.column('access_flags')):
+        if class_idx >= type_count:
+            continue
+        superclass = parser.dex_get_type_descriptor(superclass_idx) if superclass_idx < type_count else None
+        interfaces = ()
+        if interfaces_off and interfaces_off + 4 <= len(data):
+            count = struct.unpack_from('<I', data, interfaces_off)[0]
+            if interfaces_off + 4 + count * 2 <= len(data):
+                interfaces = tuple(
+                    parser.dex_get_type_descriptor(type_idx)
+                    for type_idx in struct.unpack_from(f'<{count}H', data, interfaces_off + 4)
+                    if type_idx < type_count
+                )
+        rows.append((parser.dex_get_type_descriptor(class_idx), superclass, interfaces, access_flags))
+    return rows
+
+
+def to_descriptor(name: str) -> str:
+    '''
+        java.lang.Object -> Ljava/lang/Object;, 已经是描述符的原样返回
+    '''
+    if name.startswith('[') or name.startswith('L') and name.endswith(';'):
+        return name
+    return 'L' + name.replace('.', '/') + ';'
+
+
+class ClassHierarchy:
+    '''
+        先 add_classes (可以多次, 每个 dex 一次), 再 build; 查询的参数是描述符或者节点编号, 结果是节点编号
+    '''
+
+    def __init__(self):
+        self.ids = {}  # 描述符 -> 节点编号
+        self.descriptors = []
+        self.parent = array('i')  # 父类的节点编号, -1 表示没有 (java.lang.Object 或者未定义的类)
+        self.flags = array('I')
+        self.origin = []  # 定义所在的 dex 名, 未定义的为 None
+        self.direct_interfaces = []
+        self.built = False
+
+    def node(self, name: str) -> int:
+        '''
+            描述符对应的节点, 不存在时新建一个未定义的节点
+        '''
+        node_id = self.ids.get(name)
+        if node_id is None:
+            node_id = self.ids[name] = len(self.descriptors)
+            self.descriptors.append(name)
+            self.parent.append(-1)
+            self.flags.append(0)
+            self.origin.append(None)
+            self.direct_interfaces.append(())
+        return node_id
+
+    def add_classes(self, rows, origin: str = ''):
+        '''
+        :param rows: class_rows 的结果
+        :param origin: dex 名, 例如 classes2.dex
+        '''
+        for descriptor, superclass, interfaces, access_flags in rows:
+            node_id = self.node(descriptor)
+            if self.origin[node_id] is not None:
+                continue  # 重复定义, 保留先加入的
+            self.origin[node_id] = origin
+            self.flags[node_id] = access_flags
+            self.parent[node_id] = self.node(superclass) if superclass is not None else -1
+            self.direct_interfaces[node_id] = tuple(self.node(name) for name in interfaces)
+        self.built = False
+
+    def build(self):
+        count = len(self.descriptors)
+        parent = self.parent
+
+        # 父类森林的先序编号; 畸形 dex 里的继承环没有根, 从环上任意一点开始
+        children = CSR(count, array(INDEX_TYPECODE, (p for p in parent if p >= 0)),
+                       array(INDEX_TYPECODE, (i for i, p in enumerate(parent) if p >= 0)))
+        pre = array('i', [-1]) * count
+        post = array('i', [0]) * count
+        order = array(INDEX_TYPECODE)
+        roots = [i for i in range(count) if parent[i] < 0] + list(range(count))
+        for root in roots:
+            if pre[root] >= 0:
+                continue
+            pre[root] = len(order)
+            order.append(root)
+            stack = [(root, iter(children[root]))]
+            while stack:
+                node_id, pending = stack[-1]
+                for child in pending:
+                    if pre[child] < 0:
+                        pre[child] = len(order)
+                        order.append(child)
+                        stack.append((child, iter(children[child])))
+                        break
+                else:
+                    post[node_id] = len(order)
+                    stack.pop()
+
+        # 每个节点的全部接口: 父类的全部接口 + 每个直接接口及其父接口; 先序保证父类先算
+        closure = {}  # 接口 -> 它自己和全部父接口
+        all_interfaces = [frozenset()] * count
+        for node_id in order:
+            interfaces = all_interfaces[parent[node_id]] if parent[node_id] >= 0 else frozenset()
+            if self.direct_interfaces[node_id]:
+                interfaces = interfaces.union(*(self._closure(i, closure) for i in self.direct_interfaces[node_id]))
+            all_interfaces[node_id] = interfaces
+
+        # 节点 -> 接口 的边按节点升序生成, 倒过来以后每一行也是升序
+        edges = {False: (array(INDEX_TYPECODE), array(INDEX_TYPECODE)),
+                 True: (array(INDEX_TYPECODE), array(INDEX_TYPECODE))}
+        for node_id, interfaces in enumerate(all_interfaces):
+            nodes, targets = edges[bool(self.flags[node_id] & ACC_INTERFACE)]
+            for interface in sorted(interfaces):
+                nodes.append(node_id)
+                targets.append(interface)
+        self.children = children
+        self.pre = pre
+        self.post = post
+        self.order = order
+        self.interfaces_csr = CSR(count, edges[False][0] + edges[True][0], edges[False][1] + edges[True][1])
+        self.implementers_csr = CSR(count, edges[False][1], edges[False][0])  # 接口 -> 实现它的类
+        self.subinterfaces_csr = CSR(count, edges[True][1], edges[True][0])  # 接口 -> 继承它的接口
+        self.built = True
+        return self
+
+    def _closure(self, interface: int, closure: dict) -> frozenset:
+        # 接口自己加上全部父接口; 用显式的栈, 接口环只会少算, 不会死循环
+        if interface in closure:
+            return closure[interface]
+        path = {interface}  # 当前路径上的接口, 再遇到就是环
+        stack = [(interface, iter(self.direct_interfaces[interface]))]
+        while stack:
+            current, pending = stack[-1]
+            for i in pending:
+                if i not in closure and i not in path:
+                    path.add(i)
+                    stack.append((i, iter(self.direct_interfaces[i])))
+                    break
+            else:
+                stack.pop()
+                path.discard(current)
+                closure[current] = frozenset([current]).union(
+                    *(closure[i] for i in self.direct_interfaces[current] if i in closure))
+        return closure[interface]
+
+    # -- 查询 --------------------------------------------------------------------------------
+
+    def _id(self, node) -> int:
+        if not self.built:
+            self.build()
+        if isinstance(node, int):
+            return node
+        return self.ids.get(to_descriptor(node), -1)
+
+    def name(self, node_id: int) -> str:
+        return self.descriptors[node_id]
+
+    def names(self, node_ids) -> list:
+        return [self.descriptors[node_id] for node_id in node_ids]
+
+    def is_interface(self, node) -> bool:
+        node_id = self._id(node)
+        return node_id >= 0 and bool(self.flags[node_id] & ACC_INTERFACE)
+
+    def superclass(self, node) -> int:
+        node_id = self._id(node)
+        return self.parent[node_id] if node_id >= 0 else -1
+
+    def superclasses(self, node) -> list:
+        '''
+            从直接父类到根的链
+        '''
+        node_id = self._id(node)
+        chain = []
+        while node_id >= 0 and len(chain) < len(self.descriptors):
+            node_id = self.parent[node_id]
+            if node_id >= 0:
+                chain.append(node_id)
+        return chain
+
+    def subclasses(self, node, direct: bool = False) -> array:
+        '''
+            全部子类 (先序, 子树连续), direct 时只有直接子类
+        '''
+        node_id = self._id(node)
+        if node_id < 0:
+            return array(INDEX_TYPECODE)
+        if direct:
+            return self.children[node_id]
+        return self.order[self.pre[node_id] + 1:self.post[node_id]]
+
+    def interfaces(self, node) -> array:
+        '''
+            实现的全部接口, 包括从父类和父接口继承来的
+        '''
+        node_id = self._id(node)
+        return self.interfaces_csr[node_id] if node_id >= 0 else array(INDEX_TYPECODE)
+
+    def implementers(self, node) -> array:
+        '''
+            直接或间接 (通过父类或子接口) 实现了接口 node 的类
+        '''
+        node_id = self._id(node)
+        return self.implementers_csr[node_id] if node_id >= 0 else array(INDEX_TYPECODE)
+
+    def subinterfaces(self, node) -> array:
+        '''
+            直接或间接继承了接口 node 的接口
+        '''
+        node_id = self._id(node)
+        return self.subinterfaces_csr[node_id] if node_id >= 0 else array(INDEX_TYPECODE)
+
+    def is_subtype(self, node, ancestor) -> bool:
+        '''
+            node 是否是 ancestor 的子类/实现者 (自己也算)
+        '''
+        node_id = self._id(node)
+        ancestor_id = self._id(ancestor)
+        if node_id < 0 or ancestor_id < 0:
+            return False
+        if self.pre[ancestor_id] <= self.pre[node_id] < self.post[ancestor_id]:
+            return True
+        interfaces = self.interfaces_csr[node_id]
+        i = bisect_left(interfaces, ancestor_id)
+        return i < len(interfaces) and interfaces[i] == ancestor_id
+
+
+def build_hierarchy(parser, origin: str = '') -> ClassHierarchy:
+    hierarchy = ClassHierarchy()
+    hierarchy.add_classes(class_rows(parser), origin)
+    return hierarchy.build()
@@ -0,0 +1,161 @@
+'''
+    LEB128 解码 (ULEB128 / SLEB128 / ULEB128p1)
+
+    data 可以是 bytes / mmap / memoryview, 下标访问返回 int 即可。
+    单个值的接口返回 (value, end_offset), 批量接口一次扫描解出连续的 count 个值,
+    返回 array 和结束位置, 避免每个值都分配一个 tuple。
+'''
+from array import array
+
+# dex 中的 LEB128 最多5字节, 表示32位的值
+ULEB128_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+SLEB128_TYPECODE = ULEB128_TYPECODE.lower()
+
+
+def read_uleb128(data, offset: int):
+    '''
+        读取一个 ULEB128
+    :return: (value, end_offset)
+    '''
+    result = data[offset]
+    offset += 1
+    if result < 0x80:
+        return result, offset
+    result &= 0x7f
+    shift = 7
+    while True:
+        cur = data[offset]
+        offset += 1
+        result |= (cur & 0x7f) << shift
+        if cur < 0x80 or shift >= 28:
+            return result & 0xffffffff, offset
+        shift += 7
+
+
+def read_uleb128p1(data, offset: int):
+    '''
+        读取一个 ULEB128p1 (编码值为 value + 1, 0 表示 NO_INDEX 即 -1)
+    :return: (value, end_offset)
+    '''
+    value, offset = read_uleb128(data, offset)
+    return value - 1, offset
+
+
+def read_sleb128(data, offset: int):
+    '''
+        读取一个 SLEB128
+    :return: (value, end_offset)
+    '''
+    result = 0
+    shift = 0
+    while True:
+        cur = data[offset]
+        offset += 1
+        result |= (cur & 0x7f) << shift
+        shift += 7
+        if cur < 0x80 or shift >= 35:
+            break
+    if shift >= 35:
+        # 5字节的情况只取低32位
+        result &= 0xffffffff
+        if result & 0x80000000:
+            result -= 0x100000000
+    elif cur & 0x40:
+        result -= 1 << shift  # 符号扩展
+    return result, offset
+
+
+def read_uleb128_run(data, offset: int, count: int):
+    '''
+        连续读取 count 个 ULEB128
+    :return: (array of values, end_offset)
+    '''
+    values = array(ULEB128_TYPECODE)
+    append = values.append
+    for _ in range(count):
+        result = data[offset]
+        offset += 1
+        if result >= 0x80:
+            result &= 0x7f
+            shift = 7
+            while True:
+                cur = data[offset]
+                offset += 1
+                result |= (cur & 0x7f) << shift
+                if cur < 0x80 or shift >= 28:
+                    break
+                shift += 7
+            result &= 0xffffffff
+        append(result)
+    return values, offset
+
+
+def read_uleb128_spans(data, offset: int, count: int):
+    '''
+        连续读取 count 个 ULEB128, 同时记录每个值的结束位置,
+        第 i 个值占用 [ends[i - 1], ends[i]) (ends[-1] 之前是 offset)
+    :return: (array of values, array of end offsets)
+    '''
+    values = array(ULEB128_TYPECODE)
+    ends = array(ULEB128_TYPECODE)
+    append = values.append
+    append_end = ends.append
+    for _ in range(count):
+        result = data[offset]
+        offset += 1
+        if result >= 0x80:
+            result &= 0x7f
+            shift = 7
+            while True:
+                cur = data[offset]
+                offset += 1
+                result |= (cur & 0x7f) << shift
+                if cur < 0x80 or shift >= 28:
+                    break
+                shift += 7
+            result &= 0xffffffff
+        append(result)
+        append_end(offset)
+    return values, ends
+
+
+def read_uleb128p1_run(data, offset: int, count: int):
+    '''
+        连续读取 count 个 ULEB128p1, NO_INDEX 为 -1
+    :return: (array of values, end_offset)
+    '''
+    values, offset = read_uleb128_run(data, offset, count)
+    return array('q', [value - 1 for value in values]), offset
+
+
+def read_sleb128_run(data, offset: int, count: int):
+    '''
+        连续读取 count 个 SLEB128
+    :return: (array of values, end_offset)
+    '''
+    values = array(SLEB128_TYPECODE)
+    append = values.append
+    for _ in range(count):
+        cur = data[offset]
+        offset += 1
+        if cur < 0x80:
+            append(cur - 0x80 if cur & 0x40 else cur)  # 单字节的符号扩展
+            continue
+        result = cur & 0x7f
+        shift = 7
+        while True:
+            cur = data[offset]
+            offset += 1
+            result |= (cur & 0x7f) << shift
+            shift += 7
+            if cur < 0x80 or shift >= 35:
+                break
+        if shift >= 35:
+            # 5字节的情况只取低32位
+            result &= 0xffffffff
+            if result & 0x80000000:
+                result -= 0x100000000
+        elif cur & 0x40:
+            result -= 1 << shift  # 符号扩展
+        append(result)
+    return values, offset
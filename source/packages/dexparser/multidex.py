@@ -0,0 +1,172 @@
+'''
+    多 dex 并行解析
+
+    每个 dex 在单独的进程里解析, 子进程只收到 (文件路径, dex 条目名), 自己 mmap 打开 APK,
+    不在进程间传 dex 的字节; 返回的只有字符串/类/方法的索引, 在主进程里合并成一个视图。
+
+    index = index_multidex('app.apk')
+    index.find_class('androidx.activity.R$id')   # -> [('classes.dex', 0)]
+'''
+import os
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from zipfile import is_zipfile
+
+from packages.dexparser import Dexparser
+from packages.dexparser.apk import APKParser, AABParser
+from packages.dexparser.hierarchy import ClassHierarchy, class_rows
+from packages.progress import Progress
+
+DexSource = namedtuple('DexSource', 'path entry')
+DexSource.__doc__ = '''
+    path: dex / apk / aab 的路径
+    entry: 容器里的 dex 条目名, 单独的 dex 文件为 None
+'''
+
+DexIndex = namedtuple('DexIndex', 'name strings classes methods class_rows')
+DexIndex.__doc__ = '''
+    一个 dex 的索引, 下标和 dex 里的一致
+    strings: string_ids 对应的字符串
+    classes: class_defs 对应的类名
+    methods: method_ids 对应的方法签名
+    class_rows: hierarchy.class_rows 的结果, 用来合并继承关系
+'''
+
+
+def open_container(path: str) -> APKParser:
+    return (AABParser if path.lower().endswith('.aab') else APKParser)(path)
+
+
+def dex_sources(path: str) -> list:
+    '''
+        列出 path 中的所有 dex (apk/aab 里的 classes*.dex, 或者 dex 本身)
+    '''
+    if not is_zipfile(path):
+        return [DexSource(path, None)]
+    with open_container(path) as container:
+        return [DexSource(path, name) for name in container.get_all_dex_filenames()]
+
+
+@contextmanager
+def open_dex(source: DexSource, **kwargs):
+    '''
+        with open_dex(source) as parser: ...
+        退出时关闭 parser 以及它所在的 apk/aab
+    '''
+    if source.entry is None:
+        parser = Dexparser(source.path, **kwargs)
+        try:
+            yield parser
+        finally:
+            parser.close()
+        return
+    with open_container(source.path) as container:
+        yield container.get_dex(source.entry, **kwargs)
+
+
+def iter_dex(path: str, **kwargs):
+    '''
+        依次打开 path 中的每个 dex, 产生 (DexSource, Dexparser);
+        apk/aab 只打开一次, 每个 dex 用完就释放 (解压出来的内容不留到最后), 结束时关闭容器
+    '''
+    if not is_zipfile(path):
+        source = DexSource(path, None)
+        with open_dex(source, **kwargs) as parser:
+            yield source, parser
+        return
+    with open_container(path) as container:
+        for name in container.get_all_dex_filenames():
+            parser = container.get_dex(name, **kwargs)
+            try:
+                yield DexSource(path, name), parser
+            finally:
+                container.dexfiles.pop(name, None)
+                parser.close()
+
+
+def index_dex(source: DexSource) -> DexIndex:
+    '''
+        在子进程里运行: 打开一个 dex 并生成索引
+    '''
+    with open_dex(source) as parser:
+        return DexIndex(
+            source.entry or os.path.basename(source.path),
+            [parser.dex_get_str(i) for i in range(len(parser.dex_string_ids))],
+            [parser.dex_get_type(class_idx) for class_idx in parser.dex_classdef_ids.column('class_idx')],
+            [parser.dex_get_method(i) for i in range(len(parser.dex_method_ids))],
+            class_rows(parser),
+        )
+
+
+class MultiDexIndex:
+    '''
+        合并后的索引: 名字 -> [(dex 名, 在该 dex 中的下标)]
+        同一个字符串/方法引用会出现在多个 dex 里, 类的定义一般只在一个 dex 里
+    '''
+
+    def __init__(self, indexes: list):
+        self.dex_names = [index.name for index in indexes]
+        self.indexes = indexes
+        self.__hierarchy = None
+        self.strings = {}
+        self.classes = {}
+        self.methods = {}
+        for index in indexes:
+            for table, names in ((self.strings, index.strings), (self.classes, index.classes),
+                                 (self.methods, index.methods)):
+                for idx, name in enumerate(names):
+                    table.setdefault(name, []).append((index.name, idx))
+
+    def find_string(self, text: str) -> list:
+        return self.strings.get(text, [])
+
+    def find_class(self, name: str) -> list:
+        return self.classes.get(name, [])
+
+    def find_method(self, signature: str) -> list:
+        return self.methods.get(signature, [])
+
+    def duplicate_classes(self) -> dict:
+        '''
+            在多个 dex 里都有定义的类
+        '''
+        return {name: places for name, places in self.classes.items() if len(places) > 1}
+
+    def hierarchy(self) -> ClassHierarchy:
+        '''
+            所有 dex 合并后的类继承关系, 重复定义的类以靠前的 dex 为准
+        '''
+        if self.__hierarchy is None:
+            hierarchy = ClassHierarchy()
+            for index in self.indexes:
+                hierarchy.add_classes(index.class_rows, index.name)
+            self.__hierarchy = hierarchy.build()
+        return self.__hierarchy
+
+
+def index_multidex(path: str, processes: int = None, progress=None) -> MultiDexIndex:
+    '''
+        并行解析 path 中的所有 dex 并合并索引
+    :param processes: 进程数, 默认 CPU 核数; 为 1 或者只有一个 dex 时在当前进程里解析
+    :param progress: 进度回调, 按完成的 dex 个数上报
+    '''
+    sources = dex_sources(path)
+    phase = Progress(progress).phase('multidex', len(sources))
+    processes = min(processes or os.cpu_count() or 1, len(sources))
+
+    if processes <= 1:
+        indexes = []
+        for source in sources:
+            indexes.append(index_dex(source))
+            phase.update(len(indexes))
+    else:
+        indexes = [None] * len(sources)
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {pool.submit(index_dex, source): i for i, source in enumerate(sources)}
+            for done, future in enumerate(as_completed(futures), 1):
+                indexes[futures[future]] = future.result()
+                phase.update(done)
+    phase.finish()
+    # 按 classes.dex, classes2.dex ... 的顺序合并, 和完成的先后无关
+    return MultiDexIndex(indexes)
@@ -0,0 +1,172 @@
+'''
+    opcode 直方图扫描
+
+    只按指令长度表在 insns 上跳, 不创建 Instruction 对象, 也不解析 class_data 的结构体对象,
+    用于对大量 dex 批量统计特征 (反射/加密/native 调用等)。
+    有 NumPy 时直方图是 numpy.ndarray, 没有时退化成 array.array。
+'''
+import struct
+from array import array
+from collections import Counter, namedtuple
+
+from packages.dexparser.disassembler import FORMAT, FORMAT_INFO, PACKED_SWITCH_PAYLOAD, SPARSE_SWITCH_PAYLOAD, \
+    FILL_ARRAY_DATA_PAYLOAD
+from packages.dexparser.leb128 import read_uleb128_run
+from packages.log import LOG
+from packages.mm_type import sizeof
+from packages.mm_type.mm_ctype import DataToCClass
+from packages.mm_type.mm_dextype import Dex_CodeItem, insns_view
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CODE_ITEM_HEADER_SIZE = sizeof(Dex_CodeItem)  # insns 紧跟在 16 字节的头部之后
+
+# opcode -> 指令长度(码元)
+WIDTH = bytes(FORMAT_INFO[fmt][0] for fmt in FORMAT)
+
+OpcodeScan = namedtuple('OpcodeScan', 'method_idx per_method total code_units')
+OpcodeScan.__doc__ = '''
+    method_idx: 每个有 code_item 的方法在 method_ids 中的下标, 与 per_method 的行对应
+    per_method: 每个方法一行 256 列的计数 (numpy 为二维数组, 否则为 array 的列表)
+    total: 整个文件的 256 列计数
+    code_units: 扫描过的码元数 (乘 2 即字节数)
+'''
+
+
+def payload_size(units, pc: int, unit: int) -> int:
+    '''
+        pc 处 payload 数据块占的码元数; unit 不是 payload 的 ident 时返回 0, 头部被截断时返回 -1
+    '''
+    end = len(units)
+    if unit == PACKED_SWITCH_PAYLOAD:
+        return units[pc + 1] * 2 + 4 if pc + 1 < end else -1
+    if unit == SPARSE_SWITCH_PAYLOAD:
+        return units[pc + 1] * 4 + 2 if pc + 1 < end else -1
+    if unit == FILL_ARRAY_DATA_PAYLOAD:
+        return ((units[pc + 2] | units[pc + 3] << 16) * units[pc + 1] + 1) // 2 + 4 if pc + 3 < end else -1
+    return 0
+
+
+def opcode_stream(insns) -> bytearray:
+    '''
+        按顺序返回 insns 中每条指令的 opcode (payload 数据块跳过, 不计入)
+    '''
+    units = insns.tolist() if hasattr(insns, 'tolist') else insns
+    width = WIDTH
+    ops = bytearray()
+    append = ops.append
+    end = len(units)
+    pc = 0
+    while pc < end:
+        unit = units[pc]
+        op = unit & 0xFF
+        if op == 0 and unit:
+            size = payload_size(units, pc, unit)
+            if size < 0:
+                LOG.log_error(tag="opcode_scan", msg=f"truncated payload at {pc:#x}")
+                break
+            if size:
+                pc += size
+                continue
+        append(op)
+        pc += width[op]
+    return ops
+
+
+def histogram(ops):
+    '''
+        opcode 序列 -> 256 列计数
+    '''
+    if numpy is not None:
+        return numpy.bincount(numpy.frombuffer(bytes(ops), dtype=numpy.uint8), minlength=256).astype(numpy.uint32)
+    return _counts_array(Counter(ops), 'L')
+
+
+def _counts_array(counter, typecode):
+    counts = array(typecode, [0]) * 256
+    for op, count in counter.items():
+        counts[op] = count
+    return counts
+
+
+def method_histogram(insns):
+    return histogram(opcode_stream(insns))
+
+
+def iter_method_insns(parser):
+    '''
+        遍历 dex 中所有有 code_item 的方法, 直接按偏移读 class_data / code_item
+    :return: (method_idx, insns) 的生成器, insns 为 'H' 的 memoryview
+    '''
+    data = parser.data
+    data_size = len(data)
+    u32 = struct.Struct('<I' if DataToCClass.order == 'little' else '>I').unpack_from
+    for class_data_off in parser.dex_init_classdef_ids().column('class_data_off'):
+        if class_data_off == 0:
+            continue
+        if class_data_off >= data_size:
+            LOG.log_error(tag="opcode_scan", msg=f"class_data at {class_data_off:#x} beyond end of file")
+            continue
+        # 截断/畸形的样本只跳过读不到的部分, 不中断整个扫描
+        try:
+            sizes, offset = read_uleb128_run(data, class_data_off, 4)
+            field_count = sizes[0] + sizes[1]
+            if field_count:
+                _, offset = read_uleb128_run(data, offset, field_count * 2)
+            direct_methods, offset = read_uleb128_run(data, offset, sizes[2] * 3)
+            virtual_methods, offset = read_uleb128_run(data, offset, sizes[3] * 3)
+        except IndexError:
+            LOG.log_error(tag="opcode_scan", msg=f"truncated class_data at {class_data_off:#x}")
+            continue
+        # direct_methods 和 virtual_methods 的 method_idx 各自从 0 开始差分
+        for values in (direct_methods, virtual_methods):
+            method_idx = 0
+            for i in range(0, len(values), 3):
+                method_idx += values[i]
+                code_off = values[i + 2]
+                if code_off == 0:
+                    continue
+                if code_off + CODE_ITEM_HEADER_SIZE > data_size:
+                    LOG.log_error(tag="opcode_scan", msg=f"code_item at {code_off:#x} beyond end of file")
+                    continue
+                insns_size = u32(data, code_off + 12)[0]
+                available = (data_size - code_off - CODE_ITEM_HEADER_SIZE) // 2
+                if insns_size > available:
+                    LOG.log_error(tag="opcode_scan", msg=f"truncated code_item at {code_off:#x}")
+                    insns_size = available
+                yield method_idx, insns_view(data, code_off + CODE_ITEM_HEADER_SIZE, insns_size)
+
+
+def scan_opcodes(parser) -> OpcodeScan:
+    '''
+        统计 dex 中每个方法以及整个文件的 opcode 直方图
+    '''
+    method_idx = array('L')
+    lengths = array('L')
+    streams = []
+    for idx, insns in iter_method_insns(parser):
+        method_idx.append(idx)
+        ops = opcode_stream(insns)
+        lengths.append(len(ops))
+        streams.append((ops, len(insns)))
+    code_units = sum(size for _, size in streams)
+
+    if numpy is not None:
+        # 所有方法的 opcode 拼在一起, 行号 * 256 + opcode 一次 bincount 出二维计数
+        ops = numpy.frombuffer(b''.join(ops for ops, _ in streams), dtype=numpy.uint8)
+        rows = numpy.repeat(numpy.arange(len(streams), dtype=numpy.int64), numpy.array(lengths, dtype=numpy.int64))
+        per_method = numpy.bincount(rows * 256 + ops, minlength=len(streams) * 256)
+        per_method = per_method.astype(numpy.uint32).reshape(len(streams), 256)
+        total = per_method.sum(axis=0, dtype=numpy.uint64)
+        return OpcodeScan(numpy.array(method_idx, dtype=numpy.uint32), per_method, total, code_units)
+
+    per_method = []
+    total = Counter()
+    for ops, _ in streams:
+        counter = Counter(ops)
+        total.update(counter)
+        per_method.append(_counts_array(counter, 'L'))
+    return OpcodeScan(method_idx, per_method, _counts_array(total, 'Q'), code_units)
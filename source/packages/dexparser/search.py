@@ -0,0 +1,180 @@
+'''
+    字符串 / 类型 / 字段 / 方法的全文搜索
+
+    每个表的文本用 '\\n' 连成一个大字符串 (blob), 再记下每一行的起点;
+    子串查询先用 trigram 倒排表求候选行, 再在 blob 上核对, 短于 3 个字符的直接在 blob 上 find;
+    正则在 blob 上用 re.M 扫描, 命中的行再单独核对一次。结果都是行号 (也就是 ids 表的下标)。
+    索引在每个表第一次查询时建立, 之后的查询不再遍历整个表。
+
+    search = parser.dex_search()
+    search.find('methods', 'onCreate')               # -> array of method_ids 下标
+    search.find('strings', r'^https?://', regex=True)
+'''
+import re
+from array import array
+from bisect import bisect_right
+
+SEARCH_TABLES = ('strings', 'types', 'protos', 'fields', 'methods')
+ROW_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+# 只折叠 ASCII 的大小写, 保证折叠前后每个字符的位置不变
+_ASCII_FOLD = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+def fold_case(text: str) -> str:
+    return text.translate(_ASCII_FOLD)
+
+
+class TextIndex:
+    '''
+        一组文本的搜索索引, 行号就是文本在列表里的下标
+    '''
+
+    def __init__(self, texts):
+        # 文本里的换行在 blob 中换成空格, '\\n' 只用来分隔行
+        self.blob = '\n'.join(text.replace('\n', ' ') for text in texts)
+        self.folded = fold_case(self.blob)
+        self.starts = array('q', [0])
+        for text in texts:
+            self.starts.append(self.starts[-1] + len(text) + 1)
+        self._trigrams = None
+
+    def __len__(self) -> int:
+        return len(self.starts) - 1
+
+    def text(self, row: int) -> str:
+        return self.blob[self.starts[row]:self.starts[row + 1] - 1]
+
+    def row_of(self, position: int) -> int:
+        return bisect_right(self.starts, position) - 1
+
+    # -- trigram 索引 ------------------------------------------------------------------------
+
+    def trigrams(self):
+        if self._trigrams is None:
+            self._trigrams = _build_trigrams(self)
+        return self._trigrams
+
+    def candidates(self, folded_query: str):
+        '''
+            包含 folded_query 所有 trigram 的行 (有序), 不足 3 个字符返回 None
+        '''
+        if len(folded_query) < 3:
+            return None
+        grams = sorted({folded_query[i:i + 3] for i in range(len(folded_query) - 2)})
+        postings = [self.trigrams().get(gram) for gram in grams]
+        if any(rows is None for rows in postings):
+            return []
+        postings.sort(key=len)  # 从最短的开始求交集
+        rows = set(postings[0])
+        for other in postings[1:]:
+            rows.intersection_update(other)
+        return sorted(rows)
+
+    # -- 查询 --------------------------------------------------------------------------------
+
+    def find(self, query: str, ignore_case: bool = False, limit: int = None) -> array:
+        '''
+            包含子串 query 的行号
+        '''
+        result = array(ROW_TYPECODE)
+        if not query:
+            return result
+        if '\n' in query:
+            query = query.replace('\n', ' ')
+        haystack, needle = (self.folded, fold_case(query)) if ignore_case else (self.blob, query)
+        starts = self.starts
+
+        candidates = self.candidates(fold_case(query))
+        if candidates is not None:
+            for row in candidates:
+                if haystack.find(needle, starts[row], starts[row + 1] - 1) >= 0:
+                    result.append(row)
+                    if limit is not None and len(result) >= limit:
+                        break
+            return result
+
+        position = haystack.find(needle)
+        while position >= 0:
+            row = self.row_of(position)
+            result.append(row)
+            if limit is not None and len(result) >= limit:
+                break
+            position = haystack.find(needle, starts[row + 1])
+        return result
+
+    def find_regex(self, pattern: str, ignore_case: bool = False, limit: int = None) -> array:
+        '''
+            re.search 能匹配的行号; ^ 和 $ 对应每一行的首尾
+        '''
+        flags = re.M | (re.I if ignore_case else 0)
+        regex = re.compile(pattern, flags)
+        result = array(ROW_TYPECODE)
+        blob = self.blob
+        starts = self.starts
+        end = len(blob)
+        position = 0
+        while position <= end:
+            match = regex.search(blob, position)
+            if match is None:
+                break
+            row = self.row_of(match.start())
+            if row >= len(self):
+                break
+            # 匹配可能跨过了行尾 (例如 \s 匹配到分隔符), 在这一行里重新确认
+            if match.end() <= starts[row + 1] - 1 or regex.search(self.text(row)):
+                result.append(row)
+                if limit is not None and len(result) >= limit:
+                    break
+            position = starts[row + 1]
+        return result
+
+
+def _build_trigrams(index: TextIndex) -> dict:
+    # trigram -> 包含它的行号 (升序, 不重复)
+    trigrams = {}
+    folded = index.folded
+    starts = index.starts
+    for row in range(len(index)):
+        text = folded[starts[row]:starts[row + 1] - 1]
+        for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            rows = trigrams.get(gram)
+            if rows is None:
+                rows = trigrams[gram] = array(ROW_TYPECODE)
+            rows.append(row)
+    return trigrams
+
+
+class DexSearch:
+    '''
+        一个 dex 的搜索入口, 每个表的索引在第一次查询时建立
+    '''
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.indexes = {}
+
+    def index(self, table: str) -> TextIndex:
+        if table not in self.indexes:
+            parser = self.parser
+            getters = {
+                'strings': (parser.dex_get_str, parser.dex_init_string_ids),
+                'types': (parser.dex_get_type, parser.dex_init_type_ids),
+                'protos': (parser.dex_get_proto, parser.dex_init_proto_ids),
+                'fields': (parser.dex_get_field, parser.dex_init_field_ids),
+                'methods': (parser.dex_get_method, parser.dex_init_method_ids),
+            }
+            getter, init = getters[table]
+            self.indexes[table] = TextIndex([getter(i) for i in range(len(init()))])
+        return self.indexes[table]
+
+    def find(self, table: str, query: str, regex: bool = False, ignore_case: bool = False,
+             limit: int = None) -> array:
+        '''
+        :param table: SEARCH_TABLES 之一
+        :return: 匹配的行号 (ids 表的下标), 升序
+        '''
+        index = self.index(table)
+        if regex:
+            return index.find_regex(query, ignore_case, limit)
+        return index.find(query, ignore_case, limit)
@@ -0,0 +1,61 @@
+from functools import lru_cache
+
+from packages.dexparser.utils import uleb128_value
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+def mutf8_decode(raw: bytes) -> str:
+    '''
+        MUTF-8 解码: \\0 编码成 C0 80, 补充平面字符编码成两个3字节的代理项
+    :param raw: string_data_item 中去掉长度前缀和结尾 \\0 的字节
+    :return:
+    '''
+    if b'\xc0\x80' not in raw:
+        try:
+            return raw.decode('utf-8')  # 绝大多数字符串都是合法的 utf-8
+        except UnicodeDecodeError:
+            pass
+    try:
+        text = raw.replace(b'\xc0\x80', b'\x00').decode('utf-8', errors='surrogatepass')
+        # 把成对的代理项合并成一个字符, 落单的保持原样
+        return text.encode('utf-16-le', errors='surrogatepass').decode('utf-16-le', errors='surrogatepass')
+    except UnicodeDecodeError:
+        return raw.decode('utf-8', errors='ignore')
+
+
+class StringPool:
+    '''
+        按需解码的字符串池: 只保存 string_data_off 列,
+        第一次访问某个下标时才去解码, 结果放在有上限的 LRU 缓存里
+    '''
+
+    def __init__(self, data, string_data_off, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.data = data
+        self.string_data_off = string_data_off
+        self.get = lru_cache(maxsize=cache_size)(self.decode)
+
+    def __len__(self) -> int:
+        return len(self.string_data_off)
+
+    def __getitem__(self, index: int) -> str:
+        return self.get(index)
+
+    def byte_range(self, index: int):
+        '''
+            返回字符串内容(不含长度前缀和结尾 \\0)在文件中的 [start, end)
+        '''
+        offset = self.string_data_off[index]
+        utf16_size, len_size = uleb128_value(self.data, offset)
+        start = offset + len_size
+        # 每个 utf-16 码元的 MUTF-8 编码最多3字节, 只在这个范围里找结尾的 \0 (memoryview 没有 find)
+        limit = min(start + utf16_size * 3 + 1, len(self.data))
+        end = bytes(self.data[start:limit]).find(b'\x00')
+        return start, (start + end if end >= 0 else limit)
+
+    def decode(self, index: int) -> str:
+        start, end = self.byte_range(index)
+        return mutf8_decode(bytes(self.data[start:end]))
+
+    def cache_info(self):
+        return self.get.cache_info()
@@ -1,3 +1,4 @@
+from packages.dexparser.leb128 import read_uleb128, read_uleb128_spans
 from packages.log import LOG
 
 SHORT_TYPES = {
@@ -63,67 +64,24 @@ def uleb128_value(data, off):
         ULEB128 编码的整数值的读取方法
     :param data:
     :param off:
-    :return:
+    :return: (value, size)
     '''
-    size = 1
-    result = data[off + 0]
-    if result > 0x7f:
-        cur = data[off + 1]
-        result = (result & 0x7f) | ((cur & 0x7f) << 7)
-        size += 1
-        if cur > 0x7f:
-            cur = data[off + 2]
-            result |= ((cur & 0x7f) << 14)
-            size += 1
-            if cur > 0x7f:
-                cur = data[off + 3]
-                result |= ((cur & 0x7f) << 21)
-                size += 1
-                if cur > 0x7f:
-                    cur = data[off + 4]
-                    result |= (cur << 28)
-                    size += 1
-
-    return result, size
+    result, end = read_uleb128(data, off)
+    return result, end - off
 
 
 def encoded_field(data, offset):
-    myoff = offset
+    values, ends = read_uleb128_spans(data, offset, 2)
+    field_idx_diff, access_flags = values
 
-    field_idx_diff, size1 = uleb128_value(data, myoff)
-    myoff += size1
-    access_flags, size2 = uleb128_value(data, myoff)
-    myoff += size2
-
-    return [field_idx_diff, access_flags, size1,size2]
+    return [field_idx_diff, access_flags, ends[0] - offset, ends[1] - ends[0]]
 
 
 def encoded_method(data, offset):
-    myoff = offset
-
-    method_idx_diff, size1 = uleb128_value(data, myoff)
-    myoff += size1
-    access_flags, size2 = uleb128_value(data, myoff)
-    myoff += size2
-    code_off, size3 = uleb128_value(data, myoff)
-    myoff += size3
-
-    return [method_idx_diff, access_flags, code_off, size1,size2,size3]
-
-
-def encoded_annotation(data, offset):
-    myoff = offset
-
-    type_idx_diff, size = uleb128_value(data, myoff)
-    myoff += size
-    size_diff, size = uleb128_value(data, myoff)
-    myoff += size
-    name_idx_diff, size = uleb128_value(data, myoff)
-    myoff += size
-    value_type = data[myoff:myoff + 1]
-    encoded_value = data[myoff + 1:myoff + 2]
+    values, ends = read_uleb128_spans(data, offset, 3)
+    method_idx_diff, access_flags, code_off = values
 
-    return [type_idx_diff, size_diff, name_idx_diff, value_type, encoded_value]
+    return [method_idx_diff, access_flags, code_off, ends[0] - offset, ends[1] - ends[0], ends[2] - ends[1]]
 
 
 def type2full(type_str, hash_list=False) -> str:
@@ -0,0 +1,168 @@
+'''
+    交叉引用索引
+
+    一次扫描所有 code_item, 记录每个方法引用的 method / field / string / type,
+    然后按被引用的下标排成 CSR (offsets + values 两个整数数组):
+        refs.values[refs.offsets[i]:refs.offsets[i + 1]] 就是引用了 i 的方法 (method_ids 下标)
+    查询是一次切片, 内存只和引用的条数成正比。同一个方法里重复的引用只记一次。
+
+    xrefs = parser.dex_xrefs()
+    xrefs.callers(method_idx), xrefs.callees(method_idx)
+    xrefs.field_readers(field_idx), xrefs.field_writers(field_idx)
+    xrefs.string_users(string_idx), xrefs.instantiations(type_idx)
+'''
+from array import array
+
+from packages.dexparser.opcode_scan import WIDTH, iter_method_insns, payload_size
+from packages.log import LOG
+
+INDEX_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+# opcode -> 引用的种类; 除了 const-string/jumbo 的 32 位索引, 索引都在第二个码元
+CALL = 1
+FIELD_READ = 2
+FIELD_WRITE = 3
+STRING = 4
+NEW = 5
+
+REF_KIND = bytearray(256)
+for _op in range(0x6E, 0x79):  # invoke-* / invoke-*/range (0x73 未使用)
+    REF_KIND[_op] = CALL if _op != 0x73 else 0
+REF_KIND[0xFA] = REF_KIND[0xFB] = CALL  # invoke-polymorphic(/range)
+for _op in range(0x52, 0x59):  # iget*
+    REF_KIND[_op] = FIELD_READ
+for _op in range(0x59, 0x60):  # iput*
+    REF_KIND[_op] = FIELD_WRITE
+for _op in range(0x60, 0x67):  # sget*
+    REF_KIND[_op] = FIELD_READ
+for _op in range(0x67, 0x6E):  # sput*
+    REF_KIND[_op] = FIELD_WRITE
+REF_KIND[0x1A] = REF_KIND[0x1B] = STRING  # const-string(/jumbo)
+for _op in range(0x22, 0x26):  # new-instance, new-array, filled-new-array(/range)
+    REF_KIND[_op] = NEW
+del _op
+
+
+class CSR:
+    '''
+        压缩稀疏行: 第 i 行是 values[offsets[i]:offsets[i + 1]]
+    '''
+    __slots__ = ('offsets', 'values')
+
+    def __init__(self, rows: int, keys: array, values: array):
+        # 计数排序, 同一行里保持扫描的顺序
+        offsets = array(INDEX_TYPECODE, [0]) * (rows + 1)
+        for key in keys:
+            offsets[key + 1] += 1
+        for i in range(rows):
+            offsets[i + 1] += offsets[i]
+        cursor = offsets[:-1]
+        ordered = array(INDEX_TYPECODE, [0]) * len(values)
+        for key, value in zip(keys, values):
+            ordered[cursor[key]] = value
+            cursor[key] += 1
+        self.offsets = offsets
+        self.values = ordered
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> array:
+        return self.values[self.offsets[row]:self.offsets[row + 1]]
+
+    def count(self, row: int) -> int:
+        return self.offsets[row + 1] - self.offsets[row]
+
+
+class XrefIndex:
+    '''
+        callees 按调用方排, 其余按被引用的下标排, 行里的值都是 method_ids 的下标
+    '''
+
+    def __init__(self, method_count: int, field_count: int, string_count: int, type_count: int, edges: dict):
+        callers, callees = edges[CALL]
+        self.callees_csr = CSR(method_count, callers, callees)
+        self.callers_csr = CSR(method_count, callees, callers)
+        self.readers_csr = CSR(field_count, edges[FIELD_READ][1], edges[FIELD_READ][0])
+        self.writers_csr = CSR(field_count, edges[FIELD_WRITE][1], edges[FIELD_WRITE][0])
+        self.strings_csr = CSR(string_count, edges[STRING][1], edges[STRING][0])
+        self.new_csr = CSR(type_count, edges[NEW][1], edges[NEW][0])
+
+    def callers(self, method_idx: int) -> array:
+        return self.callers_csr[method_idx]
+
+    def callees(self, method_idx: int) -> array:
+        return self.callees_csr[method_idx]
+
+    def field_readers(self, field_idx: int) -> array:
+        return self.readers_csr[field_idx]
+
+    def field_writers(self, field_idx: int) -> array:
+        return self.writers_csr[field_idx]
+
+    def string_users(self, string_idx: int) -> array:
+        return self.strings_csr[string_idx]
+
+    def instantiations(self, type_idx: int) -> array:
+        return self.new_csr[type_idx]
+
+
+def method_refs(insns):
+    '''
+        一个方法里按出现顺序去重的 (种类, 下标), 跳过 payload
+    '''
+    units = insns.tolist() if hasattr(insns, 'tolist') else insns
+    width = WIDTH
+    ref_kind = REF_KIND
+    seen = set()
+    refs = []
+    end = len(units)
+    pc = 0
+    while pc < end:
+        unit = units[pc]
+        op = unit & 0xFF
+        if op == 0 and unit:
+            size = payload_size(units, pc, unit)
+            if size < 0:
+                LOG.log_error(tag="xref", msg=f"truncated payload at {pc:#x}")
+                break
+            if size:
+                pc += size
+                continue
+        kind = ref_kind[op]
+        if kind and pc + width[op] <= end:
+            index = units[pc + 1] | units[pc + 2] << 16 if op == 0x1B else units[pc + 1]
+            ref = (kind, index)
+            if ref not in seen:
+                seen.add(ref)
+                refs.append(ref)
+        pc += width[op]
+    return refs
+
+
+def build_xrefs(parser) -> XrefIndex:
+    '''
+        扫描 parser 中所有的 code_item, 建立交叉引用; 截断/畸形的 dex 只包含能读到的部分
+    '''
+    header = parser.dex_header
+    limits = {
+        CALL: header.method_ids_size.value,
+        FIELD_READ: header.field_ids_size.value,
+        FIELD_WRITE: header.field_ids_size.value,
+        STRING: header.string_ids_size.value,
+        NEW: header.type_ids_size.value,
+    }
+    # 种类 -> (引用方的 method_idx, 被引用的下标)
+    edges = {kind: (array(INDEX_TYPECODE), array(INDEX_TYPECODE)) for kind in limits}
+    for method_idx, insns in iter_method_insns(parser):
+        if method_idx >= limits[CALL]:
+            # 畸形的 class_data 里差分出来的下标, 留着会让按调用方排的 CSR 越界
+            LOG.log_error(tag="xref", msg=f"method_idx {method_idx} out of range")
+            continue
+        for kind, index in method_refs(insns):
+            if index >= limits[kind]:
+                continue  # 坏的索引不进索引, 反汇编里照样能看到
+            sources, targets = edges[kind]
+            sources.append(method_idx)
+            targets.append(index)
+    return XrefIndex(limits[CALL], limits[FIELD_READ], limits[STRING], limits[NEW], edges)
@@ -15,6 +15,6 @@ $ hd2 -h
 """
 
 # Import for everyone to use
-from .hexdump2 import hexdump, hd, color_always
+from .hexdump2 import hexdump, hd, color_always, bulk_line_gen, block_gen, chunk_line_gen, format_lines
 
-__all__ = ["hexdump", "hd", "color_always"]
+__all__ = ["hexdump", "hd", "color_always", "bulk_line_gen", "block_gen", "chunk_line_gen", "format_lines"]
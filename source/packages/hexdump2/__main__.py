@@ -2,18 +2,30 @@
 Main function module for hexdump2
 """
 import argparse
+import os
 import sys
 from os import linesep
 from pathlib import Path
 
 try:
     # Python 3.8+ should have this module
-    from importlib.metadata import version
+    from importlib.metadata import PackageNotFoundError, version
 except ModuleNotFoundError:
     # For Python 3.6 and 3.7
-    from importlib_metadata import version
+    from importlib_metadata import PackageNotFoundError, version
 
-from hexdump2 import hexdump
+from .hexdump2 import COLOR_ALWAYS, block_gen, chunk_line_gen
+
+# Bytes read and formatted at a time, must be a multiple of 16
+CHUNK_SIZE = 0x100000
+
+
+def _version():
+    try:
+        return version("hexdump2")
+    except PackageNotFoundError:
+        # Vendored copy, not installed as a distribution
+        return "unknown"
 
 
 def _setup_arg_parser():
@@ -35,7 +47,7 @@ def _setup_arg_parser():
         description="An imperfect replica of hexdump -C",
     )
     parser.add_argument(
-        "--version", action="version", version=f"%(prog)s {version('hexdump2')}"
+        "--version", action="version", version=f"%(prog)s {_version()}"
     )
     parser.add_argument(
         "-n",
@@ -73,6 +85,49 @@ def _setup_arg_parser():
     return parser
 
 
+def read_chunks(file_obj, length: int = None, chunk_size: int = CHUNK_SIZE):
+    """Yields `chunk_size` reads from the current position until `length` bytes or EOF.
+
+    :param file_obj: binary file object, already positioned at the first byte to dump
+    :param length: number of bytes to read, None for all
+    :param chunk_size: bytes per read, must be a multiple of 16
+    """
+    while length is None or length > 0:
+        size = chunk_size if length is None else min(chunk_size, length)
+        # A buffered reader only returns short at EOF, so every chunk but the last stays 16-aligned
+        chunk = file_obj.read(size)
+        if not chunk:
+            return
+        if length is not None:
+            length -= len(chunk)
+        yield chunk
+
+
+def dump_file(file_obj, out, offset: int = 0, length: int = None, collapse: bool = True, color: bool = False):
+    """Streams the hexdump of `file_obj` to the text stream `out` without reading the whole file.
+
+    :param file_obj: binary file object
+    :param out: text stream, e.g. sys.stdout
+    :param offset: bytes to skip from the start of the file; also the first printed address
+    :param length: bytes to dump, None for up to EOF
+    :param collapse: flag to turn on/off collapsing multiple same lines
+    :param color: enable color output
+    """
+    if offset:
+        file_obj.seek(offset)
+    chunks = read_chunks(file_obj, length)
+    if color or COLOR_ALWAYS:
+        gen = chunk_line_gen(chunks, offset, collapse, True)
+    else:
+        gen = block_gen(chunks, offset, collapse)
+    write = out.write
+    for text in gen:
+        write(text)
+
+    # Add newline for last item
+    write(linesep)
+
+
 def main():
     """Main function run by console script hexdump2 or hd2.  Also run by `python -m hexdump2` on
     command line.
@@ -81,22 +136,28 @@ def main():
     parser = _setup_arg_parser()
     args = parser.parse_args()
 
+    # Lines are written in chunk-sized pieces, keep stdout from flushing on every newline
+    out = open(sys.stdout.fileno(), "w", buffering=CHUNK_SIZE, encoding=sys.stdout.encoding, newline="",
+               closefd=False)
     try:
         for file in args.file:
             with file.open("rb") as file_obj:
-                file_size = file.lstat().st_size
-                read_start = args.offset if args.offset is not None else 0
-                length = args.length if args.length is not None else file_size
-
-                hexdump(
-                    file_obj.read(length),
-                    offset=read_start,
+                dump_file(
+                    file_obj,
+                    out,
+                    offset=args.offset or 0,
+                    length=args.length,
                     collapse=args.verbose_output,
                     color=args.color,
                 )
     except KeyboardInterrupt:
         # Caught interrupt; print a newline to make sure we're clear.
-        print("")
+        out.write(linesep)
+    except BrokenPipeError:
+        # e.g. `| head`; send whatever is still buffered to devnull so closing does not fail again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        out.close()
 
     sys.exit(0)
 
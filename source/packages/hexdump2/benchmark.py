@@ -0,0 +1,69 @@
+"""
+Micro-benchmark of `line_gen` (one line at a time) against `bulk_line_gen` (one block at a time).
+
+$ python -m packages.hexdump2.benchmark [file] [-n size] [-r repeat]
+
+Without a file, the input is a mix of random lines and runs of zero lines so that the collapsed path
+has something to collapse.
+"""
+import argparse
+import os
+import random
+import timeit
+
+from .hexdump2 import bulk_line_gen, line_gen
+
+
+def _sample_data(size: int) -> bytes:
+    rnd = random.Random(0)
+    lines = []
+    while len(lines) * 16 < size:
+        if rnd.random() < 0.2:
+            lines.extend([bytes(16)] * rnd.randrange(2, 16))
+        else:
+            lines.append(rnd.randbytes(16) if hasattr(rnd, "randbytes") else os.urandom(16))
+    return b"".join(lines)[:size]
+
+
+def run(data: bytes, repeat: int = 5) -> list:
+    """Times both generators on `data` for the collapsed and non-collapsed paths.
+
+    :return: list of (name, collapse, best seconds, MB/s)
+    """
+    results = []
+    for collapse in (False, True):
+        for name, gen in (("line_gen", line_gen), ("bulk_line_gen", bulk_line_gen)):
+            best = min(timeit.repeat(lambda: "".join(gen(data, 0, collapse)), number=1, repeat=repeat))
+            results.append((name, collapse, best, len(data) / best / 1e6))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="hexdump2 line_gen vs bulk_line_gen")
+    parser.add_argument("file", nargs="?", help="input file, default is generated data")
+    parser.add_argument("-n", dest="size", type=lambda value: int(value, 0), default=0x800000,
+                        help="bytes to format (default 8 MiB)")
+    parser.add_argument("-r", dest="repeat", type=int, default=5, help="best of this many runs")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "rb") as file_obj:
+            data = file_obj.read(args.size)
+    else:
+        data = _sample_data(args.size)
+
+    # Both paths must render the same text before their times mean anything
+    for collapse in (False, True):
+        assert "".join(line_gen(data, 0, collapse)) == "".join(bulk_line_gen(data, 0, collapse))
+
+    print(f"{len(data)} bytes, best of {args.repeat}")
+    print(f"{'generator':<16}{'collapse':<10}{'seconds':>10}{'MB/s':>10}")
+    baseline = {}
+    for name, collapse, seconds, throughput in run(data, args.repeat):
+        baseline.setdefault(collapse, seconds)
+        speedup = baseline[collapse] / seconds
+        print(f"{name:<16}{str(collapse):<10}{seconds:>10.3f}{throughput:>10.1f}  x{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 Contains the functionality for creating hexdump lines from input data.
 """
 from os import environ, linesep, name as os_name
-from typing import ByteString, Generator, Iterator, Literal, Union
+from typing import ByteString, Generator, Iterable, Iterator, List, Literal, Union
 
 try:
     import colorama
@@ -65,6 +65,23 @@ _ascii_str_map = (
     b"..............................................................."
 )
 
+# Default amount of data formatted per call in the bulk path (multiple of 16)
+BULK_BLOCK_SIZE = 0x10000
+
+
+def _as_bytes(data) -> Union[bytes, bytearray]:
+    # Some sequences don't slice nicely (e.g. array.array('I', bytes(16));
+    # test if we should convert to bytes
+    if not isinstance(data, (bytes, bytearray)):
+        if isinstance(data, str):
+            # Use the `iso-8859-1` or `latin-1` encodings to map 0x00 to 0xff to bytes
+            # 0x00 to 0xff.
+            # c.f. https://docs.python.org/3/library/codecs.html#encodings-and-unicode
+            data = bytes(data, encoding="iso-8859-1")
+        else:
+            data = bytes(data)
+    return data
+
 
 def line_gen(
     data: ByteString, offset: int = 0x0, collapse: bool = True, color: bool = False
@@ -77,6 +94,21 @@ def line_gen(
     :param color: enable color output; should only be used when outputting to stdout
     :return:
     """
+    return chunk_line_gen((data,), offset, collapse, color)
+
+
+def chunk_line_gen(
+    chunks: Iterable[ByteString], offset: int = 0x0, collapse: bool = True, color: bool = False
+) -> Generator[str, None, None]:
+    """Same as `line_gen` for a stream of chunks, as if they were concatenated; collapsing of
+    same lines carries over chunk boundaries.
+
+    :param chunks: iterable of bytes-like data; every chunk but the last must be a multiple of 16 bytes
+    :param offset: offset for address
+    :param collapse: flag to turn on/off collapsing multiple same lines
+    :param color: enable color output; should only be used when outputting to stdout
+    :return:
+    """
     # Set color; colorama will import as None if not installed.
     if color and colorama:
         # address area
@@ -98,8 +130,42 @@ def line_gen(
         char_map_ascii = _non_color_map_ascii
         char_map_hex_str = _non_color_map_hex_str
 
+    chunk_offset = offset
+    last_line_data = None
+    yield_star = True
+    for data in chunks:
+        data = _as_bytes(data)
+        for addr in range(0, len(data), 16):
+            line_data = data[addr : addr + 16]
+            if collapse and line_data == last_line_data:
+                # Only show the star once
+                if yield_star:
+                    yield_star = False
+                    tmp = f"{star_line_color}*{linesep}"
+                    yield tmp
+                else:
+                    # Otherwise, just goto the next data
+                    continue
+            else:
+                if color:
+                    # 8 octets * (2 per + 1 space) + 1 spaces at the end = 25, up to 8 octets * (5 color per) = 40
+                    first_pad = 25 + min(len(line_data) * 5, 40)
+                    second_pad = 25 + min(max(0, len(line_data) - 8) * 5, 40)
+                    # Need to decode first as the translate() method for bytes does not allow a one-to-many mapping
+                    tmp = f"{addr_color}{addr + chunk_offset:08X} | {line_data[:8].decode(encoding='iso-8859-1').translate(char_map_hex_str): <{first_pad}}{line_data[8:].decode(encoding='iso-8859-1').translate(char_map_hex_str): <{second_pad}}{reset_color}|{line_data.decode(encoding='iso-8859-1').translate(char_map_ascii)}{reset_color}|{linesep}"
+                    yield tmp
+                else:
+                    # Provides a modest speed-up vs using .join() 只修改了这里
+                    tmp = f"{addr + chunk_offset:08X} | {line_data[:8].hex(' ').upper():<23} {line_data[8:].hex(' ').upper():<23} |{line_data.translate(_ascii_str_map).decode('ascii'):<16}|{linesep}"
+                    yield tmp
+
+                yield_star = True
+
+            last_line_data = line_data
+        chunk_offset += len(data)
+
     # Empty data begets empty line
-    if len(data) == 0:
+    if chunk_offset == offset:
         if offset:
             # Manifests when we've read past the end of a file, which results in an empty buffer.
             # However, the offset we're reading at is still there.  Show the end address in this case.
@@ -110,50 +176,113 @@ def line_gen(
         # Return; this will cause a StopIteration
         return
 
-    # Some sequences don't slice nicely (e.g. array.array('I', bytes(16));
-    # test if we should convert to bytes
-    if not isinstance(data, (bytes, bytearray)):
-        if isinstance(data, str):
-            # Use the `iso-8859-1` or `latin-1` encodings to map 0x00 to 0xff to bytes
-            # 0x00 to 0xff.
-            # c.f. https://docs.python.org/3/library/codecs.html#encodings-and-unicode
-            data = bytes(data, encoding="iso-8859-1")
-        else:
-            data = bytes(data)
+    # The last line; assume that receiver is using a function that will add a line seperator.
+    tmp = f"{addr_color}{chunk_offset:08X}{reset_color}"
+    yield tmp
 
-    last_line_data = None
-    yield_star = True
-    for addr in range(0, len(data), 16):
-        line_data = data[addr : addr + 16]
-        if collapse and line_data == last_line_data:
+
+def _bulk_lines(block: bytes, addr: int, collapse: bool, last_line_data, yield_star: bool, sep: str = linesep):
+    """Formats a whole block at once: the hex and ascii columns are produced for the entire block
+    with one `hex()` and one `translate()` call, lines are then just slices of those two strings.
+
+    :param block: data to format; every line but the last must be 16 bytes
+    :param addr: address of the first byte in the block
+    :param collapse: flag to turn on/off collapsing multiple same lines
+    :param last_line_data: last line of the previous block, for collapsing across blocks
+    :param yield_star: whether a `*` may still be emitted for the current run of same lines
+    :param sep: line separator appended to every line
+    :return: (list of lines, last_line_data, yield_star)
+    """
+    hex_str = block.hex(" ").upper()
+    ascii_str = block.translate(_ascii_str_map).decode("ascii")
+    # Pad a short last line up front so every line is a plain slice of 47 + 16 characters
+    tail = len(block) % 16
+    if tail:
+        hex_str += " " * (48 - tail * 3)
+        ascii_str += " " * (16 - tail)
+
+    if not collapse:
+        lines = [
+            f"{addr + pos:08X} | {hex_str[pos * 3:pos * 3 + 47]} |{ascii_str[pos:pos + 16]}|{sep}"
+            for pos in range(0, len(block), 16)
+        ]
+        return lines, block[-16:], True
+
+    lines = []
+    append = lines.append
+    for pos in range(0, len(block), 16):
+        line_data = block[pos:pos + 16]
+        if line_data == last_line_data:
             # Only show the star once
             if yield_star:
                 yield_star = False
-                tmp = f"{star_line_color}*{linesep}"
-                yield tmp
-            else:
-                # Otherwise, just goto the next data
-                continue
-        else:
-            if color:
-                # 8 octets * (2 per + 1 space) + 1 spaces at the end = 25, up to 8 octets * (5 color per) = 40
-                first_pad = 25 + min(len(line_data) * 5, 40)
-                second_pad = 25 + min(max(0, len(line_data) - 8) * 5, 40)
-                # Need to decode first as the translate() method for bytes does not allow a one-to-many mapping
-                tmp = f"{addr_color}{addr + offset:08X} | {line_data[:8].decode(encoding='iso-8859-1').translate(char_map_hex_str): <{first_pad}}{line_data[8:].decode(encoding='iso-8859-1').translate(char_map_hex_str): <{second_pad}}{reset_color}|{line_data.decode(encoding='iso-8859-1').translate(char_map_ascii)}{reset_color}|{linesep}"
-                yield tmp
-            else:
-                # Provides a modest speed-up vs using .join() 只修改了这里
-                tmp = f"{addr + offset:08X} | {line_data[:8].hex(' ').upper():<23} {line_data[8:].hex(' ').upper():<23} |{line_data.translate(_ascii_str_map).decode('ascii'):<16}|{linesep}"
-                yield tmp
+                append(f"*{sep}")
+            continue
+        append(f"{addr + pos:08X} | {hex_str[pos * 3:pos * 3 + 47]} |{ascii_str[pos:pos + 16]}|{sep}")
+        last_line_data = line_data
+        yield_star = True
+    return lines, last_line_data, yield_star
 
-            yield_star = True
 
-        last_line_data = line_data
+def block_gen(chunks: Iterable[ByteString], offset: int = 0x0, collapse: bool = True) -> Generator[str, None, None]:
+    """Bulk counterpart of `line_gen` for a stream of chunks, yields one string per chunk.
 
-    # The last line; assume that receiver is using a function that will add a line seperator.
-    tmp = f"{addr_color}{len(data) + offset:08X}{reset_color}"
-    yield tmp
+    The concatenated output is identical to `"".join(line_gen(b"".join(chunks), ...))` without color,
+    collapsing of same lines carries over chunk boundaries.
+
+    :param chunks: iterable of bytes-like data; every chunk but the last must be a multiple of 16 bytes
+    :param offset: offset for address
+    :param collapse: flag to turn on/off collapsing multiple same lines
+    :return:
+    """
+    addr = offset
+    last_line_data = None
+    yield_star = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        chunk = _as_bytes(chunk)
+        lines, last_line_data, yield_star = _bulk_lines(chunk, addr, collapse, last_line_data, yield_star)
+        addr += len(chunk)
+        yield "".join(lines)
+
+    if addr != offset:
+        # The last line; assume that receiver is using a function that will add a line seperator.
+        yield f"{addr:08X}"
+    elif offset:
+        # Same as `line_gen`: reading past the end still shows the address
+        yield f"{offset:08x}{linesep}"
+
+
+def bulk_line_gen(
+    data: ByteString, offset: int = 0x0, collapse: bool = True, block_size: int = BULK_BLOCK_SIZE
+) -> Generator[str, None, None]:
+    """Same output as `line_gen` without color, but formats `block_size` bytes at a time.
+
+    :param data: input data, must be bytes-like
+    :param offset: offset for address
+    :param collapse: flag to turn on/off collapsing multiple same lines
+    :param block_size: bytes formatted per yielded string, rounded down to a multiple of 16
+    :return:
+    """
+    block_size = max(16, block_size - block_size % 16)
+    try:
+        view = memoryview(data).cast("B")
+    except TypeError:
+        # e.g. range or a list of ints
+        view = memoryview(bytes(data))
+    return block_gen((view[pos:pos + block_size] for pos in range(0, len(view), block_size)), offset, collapse)
+
+
+def format_lines(data: ByteString, offset: int = 0x0) -> List[str]:
+    """Formats every line of `data` without collapsing and without line separators,
+    e.g. the rows of a viewport.
+
+    :param data: input data, must be bytes-like
+    :param offset: address of the first byte
+    :return: list of lines
+    """
+    return _bulk_lines(bytes(data), offset, False, None, True, "")[0]
 
 
 def hexdump(
@@ -176,7 +305,11 @@ def hexdump(
     if COLOR_ALWAYS:
         color = COLOR_ALWAYS
 
-    gen = line_gen(data, offset, collapse, color)
+    if result in ("print", "return") and not color and not isinstance(data, str):
+        # Output is the same, formatting whole blocks is much faster than line by line
+        gen = bulk_line_gen(data, offset, collapse)
+    else:
+        gen = line_gen(data, offset, collapse, color)
     if result == "print":
         for line in gen:
             print(line, end="")
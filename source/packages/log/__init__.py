@@ -1,10 +1,12 @@
 class LOG:
+    stream = None  # 输出位置, None 表示 stdout (命令行输出 JSON 时改成 stderr)
+
     @staticmethod
     def log_info(tag: str = "info", msg: str = ""):  # green
         text = f"\033[92m[{tag}]\033[0m: {msg}"
-        print(text)
+        print(text, file=LOG.stream)
 
     @staticmethod
     def log_error(tag: str = "error", msg: str = ""):  # red
         text = f"\033[91m[{tag}]\033[0m: {msg}"
-        print(text)
\ No newline at end of file
+        print(text, file=LOG.stream)
\ No newline at end of file
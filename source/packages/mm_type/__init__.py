@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from inspect import isclass
-from typing import Union, Any, TypeVar, BinaryIO
-from io import BytesIO
+from struct import Struct, calcsize as _struct_calcsize, unpack as _struct_unpack
+from typing import Union, Any, TypeVar, BinaryIO, Sequence
 from _io import _BufferedIOBase
 from ctypes import (
     c_char,
@@ -12,78 +12,207 @@ from _ctypes import _SimpleCData
 
 # ----------------------------------------------------------------------------
 from packages.mm_type.mm_const import *
-from packages.mm_type.mm_ctype import data_to_ctypes
+from packages.mm_type.mm_ctype import DataToCClass
 
 _CData = tuple(x for x in c_char.mro() if x.__name__ == "_CData")[0]
 
-class BaseStructure:
+class FieldValue:
     """
-    该类实现了结构体的基础方法。
+    结构体成员的值, 保留 .value / ._data_ / ._start_position_ / ._end_position_ 接口,
+    _data_ 和位置都是按需从所属结构体的缓冲区算出来的, 不额外拷贝数据。
     """
 
-    def __init__(self,base_position=0, data: Union[bytes, _BufferedIOBase]=None) -> None:
-        # 初始化类，data可以是字节流或文件流
-        self._source = b""  # 用于存储读取的数据源
-        if isinstance(data, bytes):
-            # 如果data是字节流，将其转换为BytesIO对象，以便像文件一样读取
-            data = BytesIO(data)
+    __slots__ = ("value", "_owner_", "_field_", "__dict__")
+
+    def __init__(self, value, owner: "BaseStructure", field: "FieldSpec") -> None:
+        self.value = value
+        self._owner_ = owner
+        self._field_ = field
+
+    @property
+    def _start_position_(self) -> int:
+        return self._owner_._start_position_ + self._field_.offset
+
+    @property
+    def _end_position_(self) -> int:
+        return self._owner_._start_position_ + self._field_.offset + self._field_.size
+
+    @property
+    def _data_(self) -> bytes:
+        owner = self._owner_
+        start = owner._offset_ + self._field_.offset
+        return bytes(owner._buffer_[start:start + self._field_.size])
+
+    def __int__(self) -> int:
+        return int(self.value)
+
+    def __index__(self) -> int:
+        return self.value
+
+    def __repr__(self):
+        return f"{self._field_.ctype.__name__}({self.value!r})"
+
+
+class ArrayValue(FieldValue):
+    """
+    数组成员的值, 支持下标和迭代, 元素类型和原来的ctypes数组一致。
+    """
 
-        # 遍历类的所有属性
-        for attribute_name, attribute_value in self.__annotations__.items():
-            start_position = data.tell()  # 记录当前的读取位置
+    __slots__ = ()
+
+    def _items_(self) -> Sequence:
+        field = self._field_
+        if field.code in "bc":
+            # 单字节数组是按 bytes 整块解出来的, 有符号/字符元素在访问时再展开
+            return _struct_unpack(f"<{field.count}{field.code}", self.value)
+        return self.value
+
+    def __getitem__(self, index):
+        return self._items_()[index]
+
+    def __len__(self) -> int:
+        return self._field_.count
+
+    def __iter__(self):
+        return iter(self._items_())
+
+    def __repr__(self):
+        return f"{self._field_.ctype.__name__}{tuple(self._items_())!r}"
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """
+    编译后的结构体成员描述。
+    """
+
+    name: str
+    ctype: type
+    offset: int
+    size: int
+    slot: int  # 在 unpack 结果中的下标, 嵌套结构体为 -1
+    count: int = 1  # 数组元素个数, 标量为 1
+    code: str = ""  # struct 格式字符
+
+    def make(self, owner: "BaseStructure"):
+        values = owner._values_
+        if self.slot < 0:
+            # 嵌套结构体, 直接在同一个缓冲区上解析
+            return self.ctype.from_buffer(
+                owner._buffer_,
+                owner._offset_ + self.offset,
+                owner._start_position_ - owner._offset_,
+            )
+        if issubclass(self.ctype, Array):
+            if self.code in "bBc":
+                return ArrayValue(values[self.slot], owner, self)
+            return ArrayValue(values[self.slot:self.slot + self.count], owner, self)
+        return FieldValue(values[self.slot], owner, self)
+
+
+class StructLayout:
+    """
+    结构体编译结果: 一个 struct.Struct 加上成员表, 每个结构体类按端序只编译一次。
+    """
 
+    def __init__(self, cls: type, order: str) -> None:
+        fmt = ["<" if order == "little" else ">"]
+        fields = []
+        offset = 0
+        slot = 0
+        for name, attribute_value in cls.__annotations__.items():
             if issubclass(attribute_value, Array):
-                # 如果属性是一个数组类型
-                cClass = self.array_to_cclass(attribute_value)  # 获取数组中元素的C类型
-                cClass_size = sizeof(cClass)  # 获取C类型的大小
-                used_data = data.read(sizeof(attribute_value))  # 读取相应大小的数据
-                self._source += used_data  # 将读取的数据存储到_source中
-                # 使用读取的数据构建数组对象，并赋值给类的属性
-                # value = attribute_value(
-                #     *(
-                #         data_to_ctypes[cClass](
-                #             used_data[x * cClass_size : (x + 1) * cClass_size]
-                #         )
-                #         for x in range(attribute_value._length_)
-                #     )
-                # )
-                # 创建一个空列表用于存放转换后的数据
-                elements = []
-                # 遍历数组的每个元素
-                for x in range(attribute_value._length_):
-                    # 提取当前元素的数据块
-                    element_data = used_data[x * cClass_size: (x + 1) * cClass_size]
-
-                    # 将数据块转换为对应的C类型对象
-                    ctype_object = data_to_ctypes[cClass](element_data)
-
-                    # 将转换后的对象添加到列表中
-                    elements.append(ctype_object)
-
-                # 使用转换后的列表来创建属性值
-                value = attribute_value(*elements)
-
-                setattr(self, attribute_name, value)
+                code = _ctype_code(BaseStructure.array_to_cclass(attribute_value))
+                count = attribute_value._length_
+                if code in "bBc":
+                    # 单字节数组整块解成 bytes, 避免逐元素构造
+                    piece = f"{count}s"
+                    used = 1
+                else:
+                    piece = f"{count}{code}"
+                    used = count
             elif issubclass(attribute_value, BaseStructure):
-                # 如果属性是一个BaseStructure的子类
-                used_data = data.read(sizeof(attribute_value))  # 读取相应大小的数据
-                self._source += used_data  # 将读取的数据存储到_source中
-                # 使用读取的数据构建子结构对象，并赋值给类的属性
-                value = attribute_value(used_data)
-                setattr(self, attribute_name, value)
+                fmt.append(f"{sizeof(attribute_value)}x")
+                fields.append(FieldSpec(name, attribute_value, offset, sizeof(attribute_value), -1))
+                offset += sizeof(attribute_value)
+                continue
             else:
-                # 如果属性是其他类型
-                cClass = self.class_to_cclass(attribute_value)  # 获取该类型的C类型
-                used_data = data.read(sizeof(cClass))  # 读取相应大小的数据
-                value = data_to_ctypes[cClass](used_data)  # bug 将读取的数据转换为对应的C类型对象
-                self._source += used_data  # 将读取的数据存储到_source中
-                setattr(self, attribute_name, value)  # 将值赋给类的属性
-
-            # 记录读取数据的起始位置和结束位置
-            value._data_ = used_data
-            value._start_position_ = base_position + start_position
-            value._end_position_ = base_position + data.tell()
-        pass
+                code = _ctype_code(BaseStructure.class_to_cclass(attribute_value))
+                count = 1
+                piece = code
+                used = 1
+            fmt.append(piece)
+            size = _struct_calcsize("<" + piece)
+            fields.append(FieldSpec(name, attribute_value, offset, size, slot, count, code))
+            offset += size
+            slot += used
+
+        self.struct = Struct("".join(fmt))
+        self.size = self.struct.size
+        self.fields = tuple(fields)
+        self.index = {field.name: field for field in fields}
+
+
+class BaseStructure:
+    """
+    该类实现了结构体的基础方法。
+    每个结构体类第一次使用时编译成 StructLayout, 之后的实例只需要一次 unpack_from,
+    成员对象 (FieldValue) 在第一次访问时才创建。
+    """
+
+    def __init__(self, base_position=0, data: Union[bytes, _BufferedIOBase] = None) -> None:
+        # 初始化类，data可以是字节流或文件流
+        if not isinstance(data, (bytes, bytearray, memoryview)) and hasattr(data, "read"):
+            data = data.read(sizeof(type(self)))
+        self._bind_(data, 0, base_position)
+
+    @classmethod
+    def from_buffer(cls, buffer, offset: int = 0, base_position: int = 0) -> "BaseStructure":
+        """
+        直接从缓冲区(bytes/mmap/memoryview)的 offset 处解析, 不拷贝数据。
+        成员的文件位置为 base_position + 缓冲区内偏移。
+        """
+        instance = cls.__new__(cls)
+        instance._bind_(buffer, offset, base_position + offset)
+        return instance
+
+    def _bind_(self, buffer, offset: int, position: int) -> None:
+        layout = type(self)._layout_()
+        self._values_ = layout.struct.unpack_from(buffer, offset)
+        self._buffer_ = buffer
+        self._offset_ = offset
+        self._start_position_ = position
+        self._end_position_ = position + layout.size
+
+    def __getattr__(self, name: str):
+        # 只有实例字典里找不到时才会进来, 成员对象按需创建并缓存
+        if name.startswith("_"):
+            raise AttributeError(name)
+        field = type(self)._layout_().index.get(name)
+        if field is None:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        value = field.make(self)
+        self.__dict__[name] = value
+        return value
+
+    @classmethod
+    def _layout_(cls) -> StructLayout:
+        """
+        返回该类在当前端序下的编译结果。
+        """
+        layouts = cls.__dict__.get("_layouts_")
+        if layouts is None:
+            layouts = {}
+            cls._layouts_ = layouts
+        layout = layouts.get(DataToCClass.order)
+        if layout is None:
+            layout = layouts[DataToCClass.order] = StructLayout(cls, DataToCClass.order)
+        return layout
+
+    @property
+    def _source(self) -> bytes:
+        # 用于存储读取的数据源
+        return bytes(self._buffer_[self._offset_:self._offset_ + sizeof(type(self))])
 
     @classmethod
     def array_to_cclass(cls, array: Array) -> type:
@@ -109,11 +238,7 @@ class BaseStructure:
         """
         返回构建实例所需的字节数。
         """
-        counter = 0
-        # 计算所有属性所占的内存大小
-        for value in cls.__annotations__.values():
-            counter += sizeof(value)
-        return counter
+        return cls._layout_().size
 
     def __repr__(self):
         # 返回类名和数据源的字符串表示
@@ -124,22 +249,31 @@ class BaseStructure:
         return (
                 self.__class__.__name__
                 + "("
-                + ", ".join(
-            f"{attr}="
-            + (
-                (
-                        getattr(self, attr).__class__.__name__
-                        + f"({getattr(self, attr).value})"
-                )
-                if isinstance(getattr(self, attr), Array)
-                else getattr(self, attr)
-            )
-            for attr in self.__annotations__
-        )
+                + ", ".join(f"{attr}={getattr(self, attr)!r}" for attr in self.__annotations__)
                 + ")"
         )
 
 
+# ctypes 的 _type_ 字符 -> struct 格式字符, 按 ctypes 的实际大小选择标准大小的格式
+_SIGNED_CODES = {1: "b", 2: "h", 4: "i", 8: "q"}
+_UNSIGNED_CODES = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+
+def _ctype_code(cclass: type) -> str:
+    """
+    This function returns the struct format character of a ctypes simple type.
+    """
+
+    type_code = getattr(cclass, "_type_", None)
+    if type_code in ("?", "c", "f", "d"):
+        return type_code
+    if type_code in ("b", "h", "i", "l", "q"):
+        return _SIGNED_CODES[_sizeof(cclass)]
+    if type_code in ("B", "H", "I", "L", "Q", "P"):
+        return _UNSIGNED_CODES[_sizeof(cclass)]
+    raise TypeError(f"unsupported structure member type: {cclass!r}")
+
+
 def sizeof(object: Union[_CData, type]) -> int:
     """
     This function returns the size of this object.
@@ -201,4 +335,12 @@ def read_file_from_struct(file: BinaryIO, structure: type) -> Structure:
     """
     base_pos = file.tell()
     data = file.read(sizeof(structure))
-    return structure(base_pos,data)#这么传递进去,感觉不太对
\ No newline at end of file
+    return structure.from_buffer(data, 0, base_pos)
+
+
+def read_buffer_from_struct(buffer, offset: int, structure: type) -> Structure:
+    """
+    This function parses the Structure located at offset
+    of a buffer (bytes, mmap or memoryview) without copying it.
+    """
+    return structure.from_buffer(buffer, offset)
\ No newline at end of file
@@ -1,4 +1,6 @@
-
+import sys
+from array import array
+from functools import lru_cache, cached_property
 from ctypes import (
     c_byte,
     c_ubyte,
@@ -10,7 +12,8 @@ from ctypes import (
     c_char,
 )
 
-from packages.mm_type import BaseStructure
+from packages.mm_type import BaseStructure, sizeof
+from packages.mm_type.mm_ctype import DataToCClass
 
 
 def structure(cls: type) -> type:
@@ -118,6 +121,26 @@ class Dex_CodeItem :
     insns_size: c_uint32
   #// Variable length data follow for complete code item.
 
+    @cached_property
+    def insns(self):
+        # 指令紧跟在头部之后, insns_size 是 16 位码元的个数
+        return insns_view(self._buffer_, self._offset_ + sizeof(type(self)), self.insns_size.value)
+
+
+def insns_view(buffer, offset: int, insns_size: int) -> memoryview:
+    '''
+        offset 处 insns_size 个 16 位码元的视图; 直接在 mmap 上切片再 cast 成 'H', 不拷贝数据
+    '''
+    insns = memoryview(buffer)[offset:offset + insns_size * 2]
+    if DataToCClass.order != sys.byteorder:
+        # 端序和本机不同时只能拷贝一份再交换; 要用 frombytes, array("H", insns) 会每个字节算一个元素
+        swapped = array("H")
+        swapped.frombytes(insns)
+        swapped.byteswap()
+        return memoryview(swapped)
+    return insns.cast("H")
+
+
 @structure
 class Dex_AnnotationsDirectory_Item :
   class_annotations_off:c_uint32
@@ -145,6 +168,75 @@ class Dex_ParameterAnnotation :
    annotations_off: c_uint32
 
 
+# 变长的记录(type_list, class_data 里的 uleb128 成员...)按长度缓存结构体类,
+# 同样形状的记录共用一个类, 不再每条记录调用一次 type()
+@lru_cache(maxsize=None)
+def Dex_TypeList(size: int) -> type:
+    @structure
+    class Dex_TypeList:
+        size_: c_uint32
+        list_: c_uint16 * size
+    return Dex_TypeList
+
+
+@lru_cache(maxsize=None)
+def Dex_AnnotationSetItem(size: int) -> type:
+    @structure
+    class Dex_AnnotationSetItem:
+        size: c_uint32
+        entries: c_uint32 * size
+    return Dex_AnnotationSetItem
+
+
+@lru_cache(maxsize=None)
+def Dex_ClassDataHeader(sf_size: int, if_size: int, dm_size: int, vm_size: int) -> type:
+    @structure
+    class Dex_ClassDataHeader:
+        static_fields_size: c_byte * sf_size
+        instance_fields_size: c_byte * if_size
+        direct_methods_size: c_byte * dm_size
+        virtual_methods_size: c_byte * vm_size
+    return Dex_ClassDataHeader
+
+
+@lru_cache(maxsize=None)
+def Dex_EncodedField(idx_size: int, flags_size: int) -> type:
+    @structure
+    class Dex_EncodedField:
+        field_idx: c_byte * idx_size
+        access_flags: c_byte * flags_size
+    return Dex_EncodedField
+
+
+@lru_cache(maxsize=None)
+def Dex_EncodedMethod(idx_size: int, flags_size: int, code_size: int) -> type:
+    @structure
+    class Dex_EncodedMethod:
+        method_idx: c_byte * idx_size
+        access_flags: c_byte * flags_size
+        code_off: c_byte * code_size
+
+        @cached_property
+        def code(self):
+            # code_item 第一次访问时才解析, abstract/native 方法没有 code_item
+            code_off = _uleb128_from_bytes(self.code_off.value)
+            if code_off == 0:
+                return None
+            return Dex_CodeItem.from_buffer(self._buffer_, code_off, self._start_position_ - self._offset_)
+    return Dex_EncodedMethod
+
+
+def _uleb128_from_bytes(data: bytes) -> int:
+    """
+    This function decodes an ULEB128 which spans all of data.
+    """
+
+    result = 0
+    for i, cur in enumerate(data):
+        result |= (cur & 0x7f) << (7 * i)
+    return result & 0xffffffff
+
+
 
 
 
@@ -0,0 +1,158 @@
+import sys
+from array import array
+
+from packages.mm_type import sizeof
+from packages.mm_type.mm_ctype import DataToCClass
+from packages.log import LOG
+
+
+class StructRow:
+    """
+    This class implements a lightweight view of one row of a StructTable.
+    Member access returns plain ints read from the table columns.
+    """
+
+    __slots__ = ("_table_", "_index_")
+
+    def __init__(self, table: "StructTable", index: int) -> None:
+        self._table_ = table
+        self._index_ = index
+
+    def __getattr__(self, name: str):
+        column = self._table_.columns.get(name)
+        if column is None:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        return column[self._index_]
+
+    @property
+    def _start_position_(self) -> int:
+        return self._table_.offset + self._index_ * self._table_.item_size
+
+    @property
+    def _end_position_(self) -> int:
+        return self._start_position_ + self._table_.item_size
+
+    def __repr__(self):
+        return (
+            f"{self._table_.structure.__name__}[{self._index_}]("
+            + ", ".join(f"{name}={column[self._index_]}" for name, column in self._table_.columns.items())
+            + ")"
+        )
+
+
+class StructTable:
+    """
+    This class implements a columnar table of a fixed-size structure array.
+
+    The whole section is decoded at once: every member becomes one
+    array column (e.g. class_idx as uint16, name_idx as uint32), rows
+    are only created as StructRow views when they are indexed.
+    """
+
+    def __init__(self, structure: type, buffer, offset: int, count: int, row_type: type = StructRow,
+                 owner=None) -> None:
+        self.structure = structure
+        self.owner = owner  # 行视图需要回到解析器时用 (例如按需解析 class_data)
+        self.offset = offset
+        self.item_size = sizeof(structure)
+        available = max(len(buffer) - offset, 0) // self.item_size if self.item_size else count
+        if count > available:
+            # 区段被截断: 按实际能读到的行数建表, 否则各列会比 count 短, 按下标取行时越界
+            LOG.log_error(tag=structure.__name__,
+                          msg=f"truncated at 0x{offset:x}: {count} items declared, {available} available")
+            count = available
+        self.count = count
+        self.row_type = row_type
+        self.columns = _decode_columns(structure, buffer, offset, count)
+
+    @property
+    def start_position(self) -> int:
+        return self.offset
+
+    @property
+    def end_position(self) -> int:
+        return self.offset + self.count * self.item_size
+
+    def column(self, name: str):
+        return self.columns[name]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f"{self.structure.__name__} index out of range")
+        return self.row_type(self, index)
+
+    def __iter__(self):
+        row_type = self.row_type
+        for index in range(self.count):
+            yield row_type(self, index)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.structure.__name__}, count={self.count})"
+
+
+def _array_code(code: str, size: int):
+    """
+    This function returns an array typecode whose item size
+    matches the struct format character, or None.
+    """
+
+    if code in ("f", "d"):
+        return code
+    if not code or code not in "bBhHiIqQ":
+        return None
+    for candidate in ("bhilq" if code.islower() else "BHILQ"):
+        if array(candidate).itemsize == size:
+            return candidate
+    return None
+
+
+def _decode_columns(structure: type, buffer, offset: int, count: int) -> dict:
+    """
+    This function decodes count structures starting at offset
+    into one array per member.
+    """
+
+    layout = structure._layout_()
+    item_size = layout.size
+    raw = bytes(buffer[offset:offset + count * item_size])
+    swap = DataToCClass.order != sys.byteorder
+
+    columns = {}
+    whole = {}  # struct 格式 -> 整段按该宽度解释的 array, 同宽度的成员共用
+    fallback = []
+    for field in layout.fields:
+        is_scalar = field.slot >= 0 and not hasattr(field.ctype, "_length_")
+        typecode = _array_code(field.code, field.size) if is_scalar else None
+        if typecode is None or field.offset % field.size or item_size % field.size:
+            fallback.append(field)
+            continue
+        values = whole.get(typecode)
+        if values is None:
+            values = array(typecode)
+            values.frombytes(raw[:len(raw) - len(raw) % field.size])
+            if swap:
+                values.byteswap()
+            whole[typecode] = values
+        step = item_size // field.size
+        columns[field.name] = values[field.offset // field.size::step]
+
+    if fallback:
+        # 不能按宽度切片的成员(数组/嵌套结构体/非对齐), 逐行 unpack
+        rows = list(layout.struct.iter_unpack(raw))
+        for field in fallback:
+            if field.slot < 0:
+                columns[field.name] = [
+                    field.ctype.from_buffer(buffer, offset + i * item_size + field.offset) for i in range(count)
+                ]
+            elif field.count > 1 and field.code not in "bBc":
+                columns[field.name] = [row[field.slot:field.slot + field.count] for row in rows]
+            else:
+                columns[field.name] = [row[field.slot] for row in rows]
+
+    # 保持成员声明顺序
+    return {field.name: columns[field.name] for field in layout.fields}
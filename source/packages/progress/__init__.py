@@ -0,0 +1,102 @@
+'''
+    合并/节流的进度上报
+
+    Progress 把 [0, 1] 按权重分给若干阶段 (phase), 阶段里按条目数更新进度;
+    只有整体进度前进超过 step, 或者距上次上报超过 interval 秒时才调用回调。
+    阶段内部的 update 只做一次比较, 可以放在每一行的循环里。
+
+    progress = Progress(callback, {'strings': 2, 'types': 1})
+    phase = progress.phase('strings', n)
+    for i in range(n):
+        ...
+        phase.update(i)
+    phase.finish()
+'''
+import math
+import time
+
+DEFAULT_STEP = 0.01
+DEFAULT_INTERVAL = 0.1
+
+
+class Phase:
+    '''
+        一个阶段, 占整体进度的 [start, start + span)
+    '''
+    __slots__ = ('progress', 'name', 'start', 'span', 'total', 'stride', 'next_at')
+
+    def __init__(self, progress: "Progress", name: str, start: float, span: float, total: int):
+        self.progress = progress
+        self.name = name
+        self.start = start
+        self.span = span
+        self.total = max(total, 1)
+        # 不带权重的阶段会从头开始, 让节流从这个阶段的起点重新计算
+        progress.root.last_value = min(progress.root.last_value, start)
+        if progress.root.callback is None:
+            self.stride = self.next_at = math.inf  # 没有回调时 update 永远走不到上报
+        else:
+            # 整体前进一个 step 需要多少条
+            self.stride = max(1, int(self.total * progress.root.step / span)) if span > 0 else math.inf
+            self.next_at = 0
+
+    def update(self, done: int):
+        if done < self.next_at:
+            return
+        self.next_at = done + self.stride
+        self.progress.root.emit(self.start + self.span * min(done, self.total) / self.total)
+
+    def finish(self):
+        self.next_at = math.inf
+        self.progress.root.emit(self.start + self.span, force=True)
+
+    def nested(self, weights: dict = None) -> "Progress":
+        '''
+            把这个阶段再按权重分成子阶段
+        '''
+        return Progress(weights=weights, parent=self)
+
+
+class Progress:
+    '''
+        进度上报器, weights 为 {阶段名: 权重}; 没有 weights 时每个阶段都占满整个范围
+        (适合互不相关、依次进行的任务)
+    '''
+
+    def __init__(self, callback=None, weights: dict = None, step: float = DEFAULT_STEP,
+                 interval: float = DEFAULT_INTERVAL, parent: Phase = None):
+        self.weights = dict(weights or {})
+        if parent is None:
+            self.root = self
+            self.callback = callback
+            self.step = step
+            self.interval = interval
+            self.start, self.span = 0.0, 1.0
+            self.last_value = -1.0
+            self.last_time = 0.0
+        else:
+            self.root = parent.progress.root
+            self.start, self.span = parent.start, parent.span
+
+        # 每个阶段的起点 (按 weights 的顺序依次排列)
+        weight_sum = sum(self.weights.values())
+        self._ranges = {}
+        offset = 0.0
+        for name, weight in self.weights.items():
+            span = self.span * weight / weight_sum if weight_sum else 0.0
+            self._ranges[name] = (self.start + offset, span)
+            offset += span
+
+    def phase(self, name: str, total: int = 1) -> Phase:
+        start, span = self._ranges.get(name, (self.start, self.span))
+        return Phase(self, name, start, span, total)
+
+    def emit(self, value: float, force: bool = False):
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if not force and value - self.last_value < self.step and now - self.last_time < self.interval:
+            return
+        self.last_value = value
+        self.last_time = now
+        self.callback(value)